@@ -0,0 +1,169 @@
+"""
+批量评分引擎 - advanced_evaluator v2.0 评分模型的列式实现
+
+与 advanced_evaluator.py 中的五维度 score_* 标量函数逐项对应，
+维度得分为各子项得分的算术平均，综合评分使用侧边栏归一化后的权重。
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import (
+    DIMENSIONS,
+    FALLBACK_RECOMMENDATION,
+    FALLBACK_SCORE,
+    comprehensive_evaluation_array,
+    extract_flag,
+    extract_numeric_inputs,
+    get_recommendation_array,
+)
+from column_schema import ColumnSchema
+from result_store import round_scores
+from scoring_rules import ADVANCED_RULES, compile_rules
+from validation import build_validation_rules
+
+# 评分模型版本：阈值、权重或评级规则变化时递增，已缓存的评分结果随之失效
+MODEL_VERSION = "v2.0-2"
+
+# --- 批量输入字段 (内部键, 列名, 缺列时的默认值)，列名与单个评估的输入项一致 ---
+ADVANCED_INPUTS = [
+    ("vertical_ratio", "垂类专注度", 0.75),
+    ("viral_ratio", "爆文率", 0.12),
+    ("video_ratio", "视频占比", 0.6),
+    ("completion_rate", "平均完播率", 0.35),
+    ("cpe", "CPE", 15.0),
+    ("cpm", "CPM", 200.0),
+    ("collect_ratio", "收藏占比", 0.3),
+    ("comment_ratio", "评论占比", 0.08),
+    ("stability", "数据稳定性系数", 0.6),
+    ("audience_match", "粉丝画像重合度", 0.75),
+    ("real_interaction", "真实互动率", 0.85),
+    ("fan_activity", "粉丝活跃度", 0.92),
+    ("high_end_ratio", "高端品牌合作占比", 0.4),
+    ("commercial_ratio", "商业化比例", 0.25),
+    ("search_ratio", "搜索发现占比", 0.3),
+    ("recommend_ratio", "首页推荐占比", 0.4),
+]
+
+# 批量评估读取的列：读取时只加载这些列（含别名），表头映射为标准列名，占比列统一换算为小数
+INPUT_SCHEMA = ColumnSchema(
+    [("name", "达人昵称"), ("followers", "粉丝数")]
+    + [(key, column) for key, column, _ in ADVANCED_INPUTS]
+    + [("growth_trend", "粉丝增长趋势"), ("has_negative", "负面舆情")]
+)
+
+# 上传数据的校验规则：数值类型与范围、增长趋势的可选取值等
+VALIDATION_RULES = build_validation_rules(INPUT_SCHEMA, ADVANCED_RULES["growth_trend"]["scores"])
+
+# 由规则表编译的评分函数：标量版供单个评估使用，列式版供批量评估使用
+SCALAR_SCORERS, ARRAY_SCORERS = compile_rules(ADVANCED_RULES)
+
+DIMENSION_LABELS = {
+    "content": "内容得分",
+    "data": "数据得分",
+    "audience": "粉丝得分",
+    "business": "商业得分",
+    "growth": "成长得分",
+}
+
+
+# --- 输入提取与评分 ---
+def extract_inputs(df):
+    """把上传数据整理为评分所需的列数组"""
+    inputs, invalid = extract_numeric_inputs(df, ADVANCED_INPUTS)
+
+    if "粉丝增长趋势" in df.columns:
+        inputs["growth_trend"] = df["粉丝增长趋势"].to_numpy()
+    else:
+        inputs["growth_trend"] = np.full(len(df), "平稳上扬", dtype=object)
+
+    inputs["has_negative"] = extract_flag(df, "负面舆情")
+    inputs["invalid"] = invalid
+    return inputs
+
+
+def compute_sub_scores(inputs):
+    """计算所有子项得分，键名与标量评分函数同名"""
+    a = ARRAY_SCORERS
+    interaction_points = a["collect_share"](inputs["collect_ratio"]) + a["comment_share"](inputs["comment_ratio"])
+    return {
+        "score_content_focus": a["content_focus"](inputs["vertical_ratio"]),
+        "score_viral_rate": a["viral_rate"](inputs["viral_ratio"]),
+        "score_completion_rate": a["completion_rate"](inputs["video_ratio"], inputs["completion_rate"]),
+        "score_cpe": a["cpe"](inputs["cpe"]),
+        "score_cpm": a["cpm"](inputs["cpm"]),
+        "score_interaction_health": a["interaction_health"](interaction_points),
+        "score_data_stability": a["data_stability"](inputs["stability"]),
+        "score_audience_match": a["audience_match"](inputs["audience_match"]),
+        "score_real_interaction": a["real_interaction"](inputs["real_interaction"]),
+        "score_fan_activity": a["fan_activity"](inputs["fan_activity"]),
+        "score_brand_level": a["brand_level"](inputs["high_end_ratio"]),
+        "score_commercialization": a["commercialization"](inputs["commercial_ratio"]),
+        "score_growth_trend": a["growth_trend"](inputs["growth_trend"]),
+        "score_fan_source": a["fan_source"](inputs["search_ratio"] + inputs["recommend_ratio"]),
+    }
+
+
+def compute_dimension_scores(sub_scores):
+    """各维度得分 = 该维度子项得分的平均值"""
+    s = sub_scores
+    return {
+        "content": (s["score_content_focus"] + s["score_viral_rate"] + s["score_completion_rate"]) / 3,
+        "data": (s["score_cpe"] + s["score_cpm"] + s["score_interaction_health"] + s["score_data_stability"]) / 4,
+        "audience": (s["score_audience_match"] + s["score_real_interaction"] + s["score_fan_activity"]) / 3,
+        "business": (s["score_brand_level"] + s["score_commercialization"]) / 2,
+        "growth": (s["score_growth_trend"] + s["score_fan_source"]) / 2,
+    }
+
+
+def score_batch(df, weights_dict):
+    """对整张表评分，返回包含子项、维度、综合评分与建议的数组字典"""
+    inputs = extract_inputs(df)
+    sub_scores = compute_sub_scores(inputs)
+    dimension_scores = compute_dimension_scores(sub_scores)
+    final_scores = comprehensive_evaluation_array(dimension_scores, weights_dict)
+    recommendations = get_recommendation_array(final_scores, inputs["has_negative"])
+
+    invalid = inputs["invalid"]
+    if invalid.any():
+        final_scores = np.where(invalid, FALLBACK_SCORE, final_scores)
+        recommendations = np.where(invalid, FALLBACK_RECOMMENDATION, recommendations)
+        for key in DIMENSIONS:
+            dimension_scores[key] = np.where(invalid, 0.0, dimension_scores[key])
+
+    return {
+        "sub_scores": sub_scores,
+        "dimension_scores": dimension_scores,
+        "final_score": final_scores,
+        "recommendation": recommendations,
+        "invalid": invalid,
+    }
+
+
+def build_result_frame(df, scored, evaluated_at=None):
+    """生成与单个评估保存记录相同列结构的结果表"""
+    if evaluated_at is None:
+        evaluated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    if "达人昵称" in df.columns:
+        names = df["达人昵称"].to_numpy()
+    else:
+        names = ("达人" + pd.Series(df.index + 1, index=df.index).astype(str)).to_numpy()
+    followers = df["粉丝数"].to_numpy() if "粉丝数" in df.columns else np.zeros(len(df), dtype=np.int64)
+
+    result = {
+        "达人昵称": names,
+        "综合评分": round_scores(scored["final_score"]),
+        "推荐等级": scored["recommendation"],
+        "粉丝数": followers,
+    }
+    for key in DIMENSIONS:
+        result[DIMENSION_LABELS[key]] = round_scores(scored["dimension_scores"][key])
+    result["评估时间"] = evaluated_at
+    return pd.DataFrame(result, index=df.index)
+
+
+def evaluate_batch(df, weights_dict, evaluated_at=None):
+    """批量评估入口：DataFrame -> 结果表"""
+    return build_result_frame(df, score_batch(df, weights_dict), evaluated_at)
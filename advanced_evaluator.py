@@ -1,10 +1,21 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
+from advanced_batch_scoring import INPUT_SCHEMA, MODEL_VERSION, SCALAR_SCORERS as SCORERS, VALIDATION_RULES, evaluate_batch
+from batch_scoring import TIERS, comprehensive_evaluation
+from batch_io import (COMPRESSIONS, FILE_FORMATS, UPLOAD_TYPES, SessionExport, build_summary, count_rows,
+                      detect_format, export_filename, export_mime, iter_frame_chunks, iter_scored_chunks,
+                      iter_table_chunks, list_excel_sheets, read_table)
+from batch_progress import ProgressReporter
+from result_charts import MAX_SCATTER_POINTS, follower_score_scatter, score_histogram
+from result_store import ADVANCED_RESULT_SCHEMA, ResultStore
+from results_browser import ResultBrowser
+from history_db import HistoryStore
+from upload_cache import UploadCache, content_hash, weights_key
+from validation import MAX_ERRORS_PER_COLUMN, ValidationReport
 
 # --- 页面基础设置 ---
 st.set_page_config(
@@ -13,167 +24,128 @@ st.set_page_config(
     layout="wide"
 )
 
+# --- 评估历史记录库（进程内共享一个实例）---
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+history_store = get_history_store()
+
+# --- 上传文件解析/评分结果缓存（按文件内容哈希，进程内共享）---
+@st.cache_resource
+def get_upload_cache():
+    return UploadCache()
+
+upload_cache = get_upload_cache()
+
 # --- 初始化Session State ---
 if 'evaluation_results' not in st.session_state:
-    st.session_state.evaluation_results = []
+    st.session_state.evaluation_results = ResultStore(ADVANCED_RESULT_SCHEMA)
+# 已写入结果的批量评估（上传缓存键），避免重复写入
+if 'recorded_batches' not in st.session_state:
+    st.session_state.recorded_batches = set()
 if 'batch_mode' not in st.session_state:
     st.session_state.batch_mode = False
+# 最近一次批量评估的结果（翻页等重新运行时继续显示）与其导出文件
+if 'batch_result' not in st.session_state:
+    st.session_state.batch_result = None
+if 'batch_export' not in st.session_state:
+    st.session_state.batch_export = SessionExport()
 
-# --- 核心评分函数（基于专业标准）---
+# --- 核心评分函数（基于专业标准，阈值定义见 scoring_rules.ADVANCED_RULES）---
 
 # 1. 内容维度评分
 def score_content_focus(vertical_ratio):
     """内容垂类专注度评分 (>70%为优秀)"""
-    if vertical_ratio >= 0.8: return 5
-    if vertical_ratio >= 0.7: return 4
-    if vertical_ratio >= 0.5: return 3
-    if vertical_ratio >= 0.3: return 2
-    return 1
+    return SCORERS["content_focus"](vertical_ratio)
 
 def score_viral_rate(viral_ratio):
     """爆文率评分 (>10%为优秀)"""
-    if viral_ratio >= 0.15: return 5
-    if viral_ratio >= 0.1: return 4
-    if viral_ratio >= 0.05: return 3
-    if viral_ratio >= 0.02: return 2
-    return 1
+    return SCORERS["viral_rate"](viral_ratio)
 
 def score_completion_rate(video_ratio, completion_rate):
     """视频完播率评分"""
-    if video_ratio >= 0.5 and completion_rate >= 0.4: return 5
-    if video_ratio >= 0.5 and completion_rate >= 0.3: return 4
-    if video_ratio >= 0.3 and completion_rate >= 0.25: return 3
-    if completion_rate >= 0.2: return 2
-    return 1
+    return SCORERS["completion_rate"](video_ratio, completion_rate)
 
 # 2. 数据维度评分
 def score_cpe(cpe):
     """CPE评分 (<20为优秀)"""
-    if cpe <= 10: return 5
-    if cpe <= 20: return 4
-    if cpe <= 35: return 3
-    if cpe <= 50: return 2
-    return 1
+    return SCORERS["cpe"](cpe)
 
 def score_cpm(cpm):
     """CPM评分 (<250为优秀)"""
-    if cpm <= 150: return 5
-    if cpm <= 250: return 4
-    if cpm <= 400: return 3
-    if cpm <= 600: return 2
-    return 1
+    return SCORERS["cpm"](cpm)
 
 def score_interaction_health(like_ratio, collect_ratio, comment_ratio):
     """互动健康度评分"""
-    score = 0
-    # 收藏占比评分 (>25%为优秀)
-    if collect_ratio >= 0.25: score += 2
-    elif collect_ratio >= 0.15: score += 1.5
-    elif collect_ratio >= 0.1: score += 1
-    
-    # 评论占比评分 (5%-15%为健康)
-    if 0.05 <= comment_ratio <= 0.15: score += 2
-    elif 0.03 <= comment_ratio <= 0.2: score += 1.5
-    elif comment_ratio >= 0.03: score += 1
-    
-    # 整体健康度
-    if score >= 3.5: return 5
-    if score >= 2.5: return 4
-    if score >= 1.5: return 3
-    if score >= 0.5: return 2
-    return 1
+    # 收藏占比得分 + 评论占比得分，再按总分分档
+    score = SCORERS["collect_share"](collect_ratio) + SCORERS["comment_share"](comment_ratio)
+    return SCORERS["interaction_health"](score)
 
 def score_data_stability(stability_coefficient):
     """数据稳定性评分 (<0.8为优秀)"""
-    if stability_coefficient <= 0.5: return 5
-    if stability_coefficient <= 0.8: return 4
-    if stability_coefficient <= 1.2: return 3
-    if stability_coefficient <= 1.8: return 2
-    return 1
+    return SCORERS["data_stability"](stability_coefficient)
 
 # 3. 粉丝维度评分
 def score_audience_match(match_ratio):
     """粉丝画像重合度评分 (>70%为优秀)"""
-    if match_ratio >= 0.8: return 5
-    if match_ratio >= 0.7: return 4
-    if match_ratio >= 0.6: return 3
-    if match_ratio >= 0.5: return 2
-    return 1
+    return SCORERS["audience_match"](match_ratio)
 
 def score_real_interaction(real_ratio):
     """真实互动率评分 (>80%为优秀)"""
-    if real_ratio >= 0.9: return 5
-    if real_ratio >= 0.8: return 4
-    if real_ratio >= 0.7: return 3
-    if real_ratio >= 0.6: return 2
-    return 1
+    return SCORERS["real_interaction"](real_ratio)
 
 def score_fan_activity(activity_ratio):
     """粉丝活跃度评分 (>90%为优秀)"""
-    if activity_ratio >= 0.95: return 5
-    if activity_ratio >= 0.9: return 4
-    if activity_ratio >= 0.85: return 3
-    if activity_ratio >= 0.8: return 2
-    return 1
+    return SCORERS["fan_activity"](activity_ratio)
 
 # 4. 商业维度评分
 def score_brand_level(high_end_ratio):
     """历史合作品牌调性评分 (>50%高端品牌为优秀)"""
-    if high_end_ratio >= 0.7: return 5
-    if high_end_ratio >= 0.5: return 4
-    if high_end_ratio >= 0.3: return 3
-    if high_end_ratio >= 0.1: return 2
-    return 1
+    return SCORERS["brand_level"](high_end_ratio)
 
 def score_commercialization(commercial_ratio):
     """商业化比例评分 (<30%为优秀)"""
-    if commercial_ratio <= 0.15: return 5
-    if commercial_ratio <= 0.3: return 4
-    if commercial_ratio <= 0.45: return 3
-    if commercial_ratio <= 0.6: return 2
-    return 1
+    return SCORERS["commercialization"](commercial_ratio)
 
 # 5. 成长性维度评分
 def score_growth_trend(growth_type):
     """粉丝增长趋势评分"""
-    if growth_type == "平稳上扬": return 5
-    if growth_type == "缓慢增长": return 4
-    if growth_type == "波动增长": return 3
-    if growth_type == "停滞": return 2
-    return 1
+    return SCORERS["growth_trend"](growth_type)
 
 def score_fan_source(search_ratio, recommend_ratio):
     """粉丝来源评分 (搜索+推荐占比高为优秀)"""
-    total_quality_ratio = search_ratio + recommend_ratio
-    if total_quality_ratio >= 0.7: return 5
-    if total_quality_ratio >= 0.5: return 4
-    if total_quality_ratio >= 0.3: return 3
-    if total_quality_ratio >= 0.15: return 2
-    return 1
-
-# --- 综合评估函数 ---
-def comprehensive_evaluation(scores_dict, weights_dict):
-    """计算综合评分"""
-    final_score = sum(scores_dict[key] * weights_dict[key] for key in scores_dict.keys())
-    return final_score
+    return SCORERS["fan_source"](search_ratio + recommend_ratio)
 
+# --- 综合评估函数（comprehensive_evaluation 定义见 batch_scoring，与批量评估共用）---
 def get_recommendation(final_score, has_risk=False):
-    """生成合作建议"""
-    if has_risk:
-        return "❌ 高风险 - 不建议合作"
-    
-    if final_score >= 4.5:
-        return "💎 S级 - 顶级人选，立即签约"
-    elif final_score >= 4.0:
-        return "🏆 A+级 - 优质人选，优先合作"
-    elif final_score >= 3.5:
-        return "✅ A级 - 良好人选，推荐合作"
-    elif final_score >= 3.0:
-        return "👍 B级 - 备选人选，考虑合作"
-    elif final_score >= 2.5:
-        return "⚠️ C级 - 谨慎考虑"
-    else:
-        return "❌ D级 - 不建议合作"
+    """生成合作建议（分档见 scoring_rules.MODERN_TIERS，与批量评估共用）"""
+    return TIERS.recommendation(final_score, has_risk)
+
+# --- 表格分页：在服务端排序与分页，只把当前页发送到浏览器 ---
+RESULT_SORT_OPTIONS = {
+    "原始顺序": (None, False),
+    "综合评分（高→低）": ("综合评分", True),
+    "综合评分（低→高）": ("综合评分", False),
+    "粉丝数（多→少）": ("粉丝数", True),
+}
+
+def render_paged_table(browser, key, sort_options=None, page_size=50):
+    """表格的排序/分页控件与当前页表格，返回当前页 DataFrame"""
+    sort_by, descending = None, False
+    col1, col2 = st.columns([1, 3])
+    if sort_options:
+        with col1:
+            sort_by, descending = sort_options[st.selectbox("排序", list(sort_options), key=f"{key}_sort")]
+    total_pages = max(1, -(-len(browser) // page_size))
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = total_pages
+    with col2:
+        page = st.number_input(f"页码（共 {total_pages:,} 页，每页 {page_size} 条）", min_value=1,
+                               max_value=total_pages, value=1, step=1, key=f"{key}_page")
+    page_df, _ = browser.page(page, page_size, sort_by=sort_by, descending=descending)
+    st.dataframe(page_df, use_container_width=True, hide_index=True)
+    return page_df
 
 # --- 侧边栏：评估模式选择 ---
 st.sidebar.title("🎯 评估系统设置")
@@ -414,6 +386,7 @@ if evaluation_mode == "单个达人评估":
                     "评估时间": datetime.now().strftime("%Y-%m-%d %H:%M")
                 }
                 st.session_state.evaluation_results.append(result_data)
+                history_store.insert_records("advanced", [result_data])
                 st.success("✅ 评估结果已保存！")
 
 elif evaluation_mode == "批量达人评估":
@@ -421,54 +394,131 @@ elif evaluation_mode == "批量达人评估":
     st.header("📊 批量达人评估")
     
     # 文件上传
-    uploaded_file = st.file_uploader("上传达人数据文件", type=['csv', 'xlsx'])
+    uploaded_file = st.file_uploader("上传达人数据文件", type=UPLOAD_TYPES)
     
     if uploaded_file is not None:
-        # 读取文件
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
+        upload_format = detect_format(uploaded_file.name)
+        upload_hash = content_hash(uploaded_file)
+        sheet = None
+        uploaded_file.seek(0)
+        if upload_format == "xlsx":
+            # Excel 以只读模式流式解析：预览只读取前几行，评估时逐块读取并评分，不整表载入内存
+            sheets = list_excel_sheets(uploaded_file)
+            sheet = st.selectbox("选择工作表", sheets) if len(sheets) > 1 else sheets[0]
+            uploaded_file.seek(0)
+            df = None
+            preview_chunks = iter_table_chunks(uploaded_file, "xlsx", first_chunksize=5, columns=INPUT_SCHEMA, sheet=sheet)
+            preview_df = next(preview_chunks)
+            preview_chunks.close()
         else:
-            df = pd.read_excel(uploaded_file)
+            # 读取文件：按文件内容缓存解析结果，重新运行时不再重复解析；只读取评分需要的列
+            df = upload_cache.get_or_compute(("parsed", "advanced", upload_format, upload_hash),
+                                             lambda: read_table(uploaded_file, upload_format, INPUT_SCHEMA))
+            preview_df = df.head()
         
         st.write("预览上传的数据：")
-        st.dataframe(df.head())
+        st.dataframe(preview_df)
+        # 表头别名与百分数列已统一为评分使用的列名和小数
+        column_mapping = preview_df.attrs.get("column_mapping")
+        if column_mapping is not None and column_mapping.describe():
+            st.caption(f"🔁 {column_mapping.describe()}")
+        
+        export_format = st.selectbox("导出格式", list(FILE_FORMATS), format_func=lambda f: FILE_FORMATS[f]["label"])
+        compression = None
+        if export_format == "csv":
+            compression = st.selectbox("压缩", [None] + list(COMPRESSIONS),
+                                       format_func=lambda c: "不压缩" if c is None else COMPRESSIONS[c]["label"])
         
         if st.button("🚀 开始批量评估"):
-            progress_bar = st.progress(0)
-            results = []
+            if total_weight == 0:
+                st.error("权重总和不能为0，请先调整侧边栏权重配置")
+                st.stop()
             
-            for idx, row in df.iterrows():
-                # 这里可以根据实际CSV列名进行调整
-                # 简化版批量评估逻辑
-                mock_score = np.random.uniform(2.5, 4.8)  # 示例随机评分
-                mock_recommendation = get_recommendation(mock_score)
-                
-                result = {
-                    "达人昵称": row.get('达人昵称', f'达人{idx+1}'),
-                    "综合评分": round(mock_score, 2),
-                    "推荐等级": mock_recommendation,
-                    "粉丝数": row.get('粉丝数', 0),
-                }
-                results.append(result)
-                progress_bar.progress((idx + 1) / len(df))
+            # 同一文件、相同权重与评分模型的评估结果直接从缓存读取
+            score_key = ("advanced", upload_hash, sheet, weights_key(weights), MODEL_VERSION)
+            cached = upload_cache.get(score_key)
+            if cached is not None:
+                results_df, validation = cached
+            else:
+                if df is None:
+                    uploaded_file.seek(0)
+                    total_rows = count_rows(uploaded_file, "xlsx", sheet)
+                    uploaded_file.seek(0)
+                    chunks = iter_table_chunks(uploaded_file, "xlsx", columns=INPUT_SCHEMA, sheet=sheet)
+                else:
+                    total_rows = len(df)
+                    chunks = iter_frame_chunks(df)
+                # 列式批量评分：基于五维度评分函数与侧边栏权重按块计算，进度按节流间隔刷新
+                # 逐块校验，只有通过校验的行参与评分
+                reporter = ProgressReporter(st.progress(0), total_rows=total_rows, min_interval=0.5)
+                validation = ValidationReport(VALIDATION_RULES)
+                result_chunks = []
+                for results_chunk in iter_scored_chunks(validation.filter(chunks), weights, evaluate=evaluate_batch):
+                    result_chunks.append(results_chunk)
+                    reporter.update(validation.rows_checked)
+                reporter.finish(validation.rows_checked)
+                results_df = pd.concat(result_chunks) if result_chunks else evaluate_batch(preview_df.iloc[:0], weights)
+                upload_cache.put(score_key, (results_df, validation))
+            
+            # 评估完成后一次性保存到评估列表，供数据分析对比使用；同一文件只记录一次，
+            # 换权重重新评估不会重复写入会话结果与历史记录库
+            history_key = ("advanced", upload_hash, sheet, MODEL_VERSION)
+            if history_key not in st.session_state.recorded_batches:
+                st.session_state.recorded_batches.add(history_key)
+                st.session_state.evaluation_results.extend(results_df)
+                history_store.insert_frame("advanced", results_df)
             
             st.success("✅ 批量评估完成！")
+            # 结果保存在会话中，翻页、排序等重新运行时继续显示；浏览器缓存排序索引
+            st.session_state.batch_result = {
+                "key": score_key,
+                "weights": dict(weights),
+                "results": ResultBrowser(results_df),
+                "validation": validation,
+            }
+        
+        batch_result = st.session_state.batch_result
+        if batch_result is not None and batch_result["key"][1:3] == (upload_hash, sheet):
+            results_df = batch_result["results"].frame
+            validation = batch_result["validation"]
             
-            # 显示结果
-            results_df = pd.DataFrame(results)
-            st.dataframe(results_df, use_container_width=True)
+            # 显示结果：只发送当前页
+            st.subheader("📋 评估结果")
+            render_paged_table(batch_result["results"], "batch_results", RESULT_SORT_OPTIONS)
             
-            # 导出功能
-            csv = results_df.to_csv(index=False).encode('utf-8-sig')
-            st.download_button(
-                label="📥 下载评估结果",
-                data=csv,
-                file_name=f"批量评估结果_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                mime="text/csv"
-            )
+            # 未通过数据校验的行不参与评分
+            if validation.rows_invalid:
+                st.warning(f"⚠️ {validation.rows_invalid:,} 行数据未通过校验，未参与评分")
+                render_paged_table(ResultBrowser(validation.errors), "batch_errors")
+                if validation.errors_suppressed:
+                    st.caption(f"每列最多列出 {MAX_ERRORS_PER_COLUMN:,} 条错误，另有 "
+                               f"{validation.errors_suppressed:,} 条未列出")
+            
+            # 导出功能：只在点击时分块写入临时文件（Excel 另含汇总与校验错误工作表），
+            # 同一结果与格式的文件在之后的重新运行中直接提供下载
+            export_key = (batch_result["key"], export_format, compression)
+            export_path = st.session_state.batch_export.existing(export_key)
+            if export_path is None and st.button("📦 生成下载文件"):
+                summary = None
+                if export_format == "xlsx":
+                    summary = build_summary(len(results_df), results_df["推荐等级"].value_counts(),
+                                            results_df["综合评分"].mean() if len(results_df) else None,
+                                            validation.rows_invalid, batch_result["weights"])
+                export_path = st.session_state.batch_export.create(
+                    export_key, results_df, export_format, ADVANCED_RESULT_SCHEMA, compression, summary,
+                    validation.errors)
+            if export_path is not None:
+                with open(export_path, "rb") as f:
+                    st.download_button(
+                        label="📥 下载评估结果",
+                        data=f,
+                        file_name=export_filename(f"批量评估结果_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                                                  export_format, compression),
+                        mime=export_mime(export_format, compression)
+                    )
     
     else:
-        st.info("请上传包含达人数据的CSV或Excel文件进行批量评估")
+        st.info("请上传包含达人数据的CSV、Excel、Parquet或Arrow IPC文件进行批量评估")
         
         # 提供模板下载
         template_data = {
@@ -476,8 +526,22 @@ elif evaluation_mode == "批量达人评估":
             "粉丝数": [50000, 120000],
             "垂类专注度": [0.75, 0.80],
             "爆文率": [0.12, 0.15],
+            "视频占比": [0.6, 0.7],
+            "平均完播率": [0.35, 0.4],
             "CPE": [15.0, 18.0],
-            "CPM": [200.0, 180.0]
+            "CPM": [200.0, 180.0],
+            "收藏占比": [0.3, 0.28],
+            "评论占比": [0.08, 0.1],
+            "数据稳定性系数": [0.6, 0.5],
+            "粉丝画像重合度": [0.75, 0.8],
+            "真实互动率": [0.85, 0.88],
+            "粉丝活跃度": [0.92, 0.95],
+            "高端品牌合作占比": [0.4, 0.6],
+            "商业化比例": [0.25, 0.2],
+            "粉丝增长趋势": ["平稳上扬", "缓慢增长"],
+            "搜索发现占比": [0.3, 0.35],
+            "首页推荐占比": [0.4, 0.45],
+            "负面舆情": [False, False]
         }
         template_df = pd.DataFrame(template_data)
         template_csv = template_df.to_csv(index=False).encode('utf-8-sig')
@@ -494,7 +558,7 @@ elif evaluation_mode == "数据分析对比":
     st.header("📈 达人数据分析对比")
     
     if st.session_state.evaluation_results:
-        df_results = pd.DataFrame(st.session_state.evaluation_results)
+        df_results = st.session_state.evaluation_results.to_frame()
         
         # 概览统计
         col1, col2, col3, col4 = st.columns(4)
@@ -503,36 +567,65 @@ elif evaluation_mode == "数据分析对比":
         with col2:
             st.metric("平均评分", f"{df_results['综合评分'].mean():.2f}")
         with col3:
-            high_quality = len(df_results[df_results['综合评分'] >= 4.0])
+            high_quality = int((df_results['综合评分'] >= 4.0).sum())
             st.metric("优质达人数", high_quality)
         with col4:
             st.metric("推荐合作率", f"{high_quality/len(df_results)*100:.1f}%")
         
-        # 评分分布图
+        # 评分分布图（服务端分箱/降采样）
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_hist = px.histogram(df_results, x='综合评分', nbins=20, 
-                                  title="评分分布直方图")
-            st.plotly_chart(fig_hist, use_container_width=True)
+            st.plotly_chart(score_histogram(df_results['综合评分']), use_container_width=True)
         
         with col2:
-            fig_scatter = px.scatter(df_results, x='粉丝数', y='综合评分',
-                                   hover_data=['达人昵称'], title="粉丝数vs评分散点图")
+            zoom_col1, zoom_col2, zoom_col3 = st.columns(3)
+            with zoom_col1:
+                zoom_score = st.slider("散点图评分范围", 0.0, 5.0, (0.0, 5.0), 0.1, key="scatter_score")
+            with zoom_col2:
+                zoom_min = st.number_input("散点图粉丝数下限", min_value=0, value=0, step=1000, key="scatter_min_followers")
+            with zoom_col3:
+                zoom_max = st.number_input("散点图粉丝数上限（0 为不限）", min_value=0, value=0, step=1000,
+                                           key="scatter_max_followers")
+            zoom_mask = st.session_state.evaluation_results.browser().filter_mask({
+                "score": zoom_score if zoom_score != (0.0, 5.0) else None,
+                "followers": (zoom_min or None, zoom_max or None) if zoom_min or zoom_max else None,
+            })
+            fig_scatter, points = follower_score_scatter(df_results, zoom_mask)
             st.plotly_chart(fig_scatter, use_container_width=True)
+            if points > MAX_SCATTER_POINTS:
+                st.caption(f"范围内共 {points:,} 人，超过 {MAX_SCATTER_POINTS:,} 人时显示密度分布；"
+                           "缩小评分或粉丝数范围可查看每位达人")
+        
+        # 评估结果汇总：服务端分页，只发送当前页
+        st.subheader("📋 评估结果汇总")
+        browser = st.session_state.evaluation_results.browser()
+        page_col1, page_col2 = st.columns([1, 3])
+        with page_col1:
+            page_size = st.selectbox("每页条数", [20, 50, 100, 200], index=1, key="results_page_size")
+        total_pages = max(1, -(-len(browser) // page_size))
+        # 记录变少后页数可能变少，先把页码收回到有效范围内
+        if st.session_state.get("results_page", 1) > total_pages:
+            st.session_state["results_page"] = total_pages
+        with page_col2:
+            page = st.number_input(f"页码（共 {total_pages:,} 页）", min_value=1, max_value=total_pages, value=1, step=1,
+                                   key="results_page")
+        page_df, _ = browser.page(page, page_size)
+        st.dataframe(page_df, use_container_width=True)
         
-        # 多维对比雷达图
-        if len(df_results) >= 2:
+        # 多维对比雷达图（当前页的达人）
+        if len(page_df) >= 2:
             st.subheader("🔍 达人多维对比")
-            selected_kols = st.multiselect("选择要对比的达人", 
-                                         df_results['达人昵称'].tolist(),
-                                         default=df_results['达人昵称'].tolist()[:3])
+            kol_names = page_df['达人昵称'].dropna().unique().tolist()
+            selected_kols = st.multiselect("选择当前页要对比的达人", 
+                                         kol_names,
+                                         default=kol_names[:3])
             
             if selected_kols:
                 fig_compare = go.Figure()
                 
                 for kol in selected_kols:
-                    kol_data = df_results[df_results['达人昵称'] == kol].iloc[0]
+                    kol_data = page_df[page_df['达人昵称'] == kol].iloc[0]
                     values = [kol_data['内容得分'], kol_data['数据得分'], 
                              kol_data['粉丝得分'], kol_data['商业得分'], kol_data['成长得分']]
                     
@@ -551,13 +644,10 @@ elif evaluation_mode == "数据分析对比":
                 )
                 st.plotly_chart(fig_compare, use_container_width=True)
         
-        # 数据表格
-        st.subheader("📋 评估结果汇总")
-        st.dataframe(df_results, use_container_width=True)
-        
         # 清空数据选项
         if st.button("🗑️ 清空所有评估数据"):
-            st.session_state.evaluation_results = []
+            st.session_state.evaluation_results.clear()
+            st.session_state.recorded_batches.clear()
             st.experimental_rerun()
     
     else:
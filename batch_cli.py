@@ -0,0 +1,192 @@
+"""
+命令行批量评估工具（无需启动 Streamlit）
+
+按块读取达人数据（CSV / Excel / Parquet / Arrow IPC），使用 modern_evaluator v3.0 评分模型
+逐块评分，并把结果流式写入输出文件，内存占用只与块大小有关。输入、输出格式按扩展名判断。
+CSV 结果可直接写成 gzip / zip 压缩文件；Excel 结果包含 汇总 / 明细 / 校验错误 工作表。
+未通过数据校验的行不参与评分，逐项错误写入单独的错误文件（Excel 输出时写入校验错误工作表）。
+
+用法示例:
+    python batch_cli.py 达人数据.csv -o 评估结果.csv
+    python batch_cli.py 达人数据.csv --chunksize 200000 --weights content=30,data=30,audience=20,business=10,growth=10
+    python batch_cli.py 达人数据.csv --workers 8 --chunksize 1000000
+    python batch_cli.py 达人池.parquet -o 评估结果.parquet
+    python batch_cli.py 达人数据.csv -o 评估结果.csv.gz
+    python batch_cli.py 达人数据.csv -o 评估结果.xlsx
+"""
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+from batch_io import (
+    COMPRESSIONS,
+    FILE_FORMATS,
+    ResultWriter,
+    build_summary,
+    count_rows,
+    detect_compression,
+    detect_format,
+    export_filename,
+    iter_scored_chunks,
+    iter_table_chunks,
+)
+from batch_progress import ProgressReporter, StderrProgress
+from batch_scoring import (
+    DEFAULT_WEIGHTS,
+    DIMENSIONS,
+    INPUT_SCHEMA,
+    LEVEL_LABELS,
+    VALIDATION_RULES,
+    evaluate_batch,
+    normalize_weights,
+)
+from parallel_scoring import default_workers, evaluate_batch_parallel
+from result_store import MODERN_RESULT_SCHEMA
+from validation import MAX_ERRORS_PER_COLUMN, ValidationReport
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def parse_weights(text):
+    """解析 "content=25,data=25,..." 形式的权重参数，未指定的维度沿用默认权重"""
+    raw_weights = {key: DEFAULT_WEIGHTS[key] * 100 for key in DIMENSIONS}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key not in raw_weights:
+            raise argparse.ArgumentTypeError(f"未知的权重维度: {key}（可选: {', '.join(DIMENSIONS)}）")
+        try:
+            raw_weights[key] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"权重必须是数字: {item}")
+    try:
+        return normalize_weights(raw_weights)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def run_batch(input_path, output_path, weights, chunksize=DEFAULT_CHUNKSIZE, reporter=None, workers=1,
+              output_format=None, sheet=None, validation=None, compression=None):
+    """流式评估：逐块读取、校验、评分并追加写入，返回 (评分行数, 耗时秒)；workers > 1 时每块在进程池中并行评分
+
+    validation 为 ValidationReport 时只对通过校验的行评分，错误记录在其中。
+    输出为 Excel 时在写完明细后填写汇总工作表，并把校验错误写入单独的工作表。
+    """
+    total_rows = 0
+    score_sum = 0.0
+    level_counts = dict.fromkeys(LEVEL_LABELS[::-1], 0)
+    start = time.perf_counter()
+    input_size = os.path.getsize(input_path)
+    input_format = detect_format(input_path)
+    evaluate = partial(evaluate_batch_parallel, workers=workers) if workers > 1 else evaluate_batch
+
+    with open(input_path, "rb") as source, ResultWriter(output_path, output_format, MODERN_RESULT_SCHEMA, compression,
+                                                        summary_sheet=True) as out:
+        # Parquet/Arrow/Excel 从元数据得到总行数；CSV 按已读取的字节数估算进度
+        if reporter is not None and input_format != "csv":
+            reporter.total_rows = count_rows(source, input_format, sheet)
+            source.seek(0)
+        chunks = iter_table_chunks(source, input_format, chunksize, first_chunksize=None, columns=INPUT_SCHEMA,
+                                   sheet=sheet)
+        if validation is not None:
+            chunks = validation.filter(chunks)
+        for results_df in iter_scored_chunks(chunks, weights, evaluate=evaluate):
+            out.write(results_df)
+            total_rows += len(results_df)
+            if out.fmt == "xlsx":
+                score_sum += float(results_df["综合评分"].sum())
+                for level, count in results_df["评级"].value_counts().items():
+                    level_counts[level] = level_counts.get(level, 0) + int(count)
+            if reporter is not None:
+                fraction = source.tell() / max(input_size, 1) if input_format == "csv" else None
+                reporter.update(validation.rows_checked if validation is not None else total_rows, fraction=fraction)
+
+        if out.fmt == "xlsx":
+            rows_invalid = validation.rows_invalid if validation is not None else 0
+            out.write_sheet("汇总", build_summary(total_rows, level_counts,
+                                                score_sum / total_rows if total_rows else None, rows_invalid, weights))
+            if validation is not None and validation.rows_invalid:
+                out.write_sheet("校验错误", validation.errors)
+
+    if reporter is not None:
+        reporter.finish(validation.rows_checked if validation is not None else total_rows)
+    return total_rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="小红书达人批量评估（命令行版）")
+    parser.add_argument("input", help="达人数据文件（.csv / .xlsx / .parquet / .arrow / .feather）")
+    parser.add_argument("--sheet", help="Excel 输入的工作表名（默认第一个工作表）")
+    parser.add_argument("--errors", help="校验错误输出文件（CSV，默认: <结果文件名>_校验错误.csv，没有错误时不生成；"
+                                         "Excel 输出时写入校验错误工作表）")
+    parser.add_argument("-o", "--output", help="结果输出文件，格式按扩展名判断（默认: <输入文件名>_评估结果.csv）")
+    parser.add_argument("--format", choices=list(FILE_FORMATS), help="结果输出格式（默认按输出文件扩展名判断，无法判断时为 csv）")
+    parser.add_argument("--compress", choices=list(COMPRESSIONS),
+                        help="CSV 结果的压缩方式（默认按输出文件扩展名 .gz / .zip 判断）")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"每块读取的行数（默认: {DEFAULT_CHUNKSIZE}）")
+    parser.add_argument("--weights", type=parse_weights, default=dict(DEFAULT_WEIGHTS),
+                        help="维度权重，如 content=25,data=25,audience=20,business=15,growth=15")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help=f"并行评分的进程数（默认: 1，本机CPU核数: {default_workers()}）；"
+                             "进程数较多时建议同时调大 --chunksize")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出处理进度")
+    args = parser.parse_args(argv)
+
+    if args.chunksize <= 0:
+        parser.error("--chunksize 必须大于0")
+    if args.workers <= 0:
+        parser.error("--workers 必须大于0")
+
+    try:
+        detect_format(args.input)
+    except ValueError as e:
+        parser.error(str(e))
+    compression = args.compress or (detect_compression(args.output) if args.output else None)
+    output_format = args.format
+    if output_format is None:
+        # 压缩输出 "结果.csv.gz" 按去掉压缩扩展名后的部分判断格式，"结果.zip" 为 CSV
+        name = args.output or ""
+        if compression is not None and detect_compression(name) == compression:
+            name = os.path.splitext(name)[0]
+        try:
+            output_format = detect_format(name) if name else "csv"
+        except ValueError:
+            output_format = "csv"
+    if compression is not None and output_format != "csv":
+        parser.error(f"只有 CSV 输出支持压缩（当前输出格式: {output_format}）")
+    output_path = args.output or export_filename(f"{os.path.splitext(args.input)[0]}_评估结果", output_format, compression)
+    reporter = None if args.quiet else ProgressReporter(StderrProgress(), min_interval=1.0)
+
+    validation = ValidationReport(VALIDATION_RULES)
+
+    total_rows, elapsed = run_batch(args.input, output_path, args.weights, args.chunksize, reporter, args.workers,
+                                    output_format, args.sheet, validation, compression)
+
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"✅ 评估完成: {total_rows:,} 行，用时 {elapsed:.2f} 秒（{rate:,.0f} 行/秒）-> {output_path}",
+          file=sys.stderr)
+    if validation.rows_invalid and output_format == "xlsx" and not args.errors:
+        print(f"⚠️ {validation.rows_invalid:,} 行未通过数据校验，未参与评分 -> {output_path}（校验错误工作表）",
+              file=sys.stderr)
+    elif validation.rows_invalid:
+        stem = os.path.splitext(output_path)[0]
+        if compression == "gzip":
+            stem = os.path.splitext(stem)[0]
+        errors_path = args.errors or f"{stem}_校验错误.csv"
+        validation.errors.to_csv(errors_path, index=False, encoding="utf-8-sig")
+        print(f"⚠️ {validation.rows_invalid:,} 行未通过数据校验，未参与评分 -> {errors_path}", file=sys.stderr)
+    if validation.errors_suppressed:
+        print(f"   每列最多记录 {MAX_ERRORS_PER_COLUMN:,} 条错误，另有 {validation.errors_suppressed:,} 条未记录",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,556 @@
+"""
+批量评估的数据读写工具
+
+提供分块读取上传文件、逐块评分的生成器，供界面流式展示和命令行工具共用。
+除 CSV 外支持 Parquet 与 Arrow IPC（Feather V2）：读取时只加载评分需要的列，
+写出时按结果表结构使用固定的列类型，分块写出的各部分类型一致。
+Excel（.xlsx）以 openpyxl 只读模式逐行流式解析、只写模式逐块写出，不构建完整的工作簿对象。
+结果导出按块写入文件（CSV 可选 gzip/zip 压缩），界面从临时文件提供下载。
+columns 传入评分引擎的 ColumnSchema 时，按别名识别需要的列，并把表头与占比单位统一为标准形式。
+"""
+import gzip
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from operator import itemgetter
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from openpyxl import Workbook, load_workbook
+
+from batch_scoring import DIMENSION_LABELS, evaluate_batch
+from column_schema import ColumnSchema
+from result_store import typed_column, widen_frame
+
+DEFAULT_CHUNKSIZE = 50_000
+# 首块较小，保证大文件也能尽快看到第一批结果
+FIRST_CHUNKSIZE = 5_000
+
+
+# --- 文件格式 ---
+FILE_FORMATS = {
+    "csv": {"label": "CSV", "extensions": [".csv"], "mime": "text/csv"},
+    "parquet": {"label": "Parquet", "extensions": [".parquet", ".pq"], "mime": "application/vnd.apache.parquet"},
+    "arrow": {"label": "Arrow IPC", "extensions": [".arrow", ".feather", ".ipc"],
+              "mime": "application/vnd.apache.arrow.file"},
+    "xlsx": {"label": "Excel", "extensions": [".xlsx", ".xlsm"],
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+
+# 上传控件可接受的扩展名
+UPLOAD_TYPES = [ext.lstrip(".") for info in FILE_FORMATS.values() for ext in info["extensions"]]
+
+# CSV 导出可选的压缩方式
+COMPRESSIONS = {
+    "gzip": {"label": "gzip", "extension": ".gz", "mime": "application/gzip"},
+    "zip": {"label": "zip", "extension": ".zip", "mime": "application/zip"},
+}
+
+# 导出时每次写入的行数
+EXPORT_CHUNKSIZE = 100_000
+
+# Excel 单个工作表的最大行数（含表头），超出时续写到下一个工作表
+EXCEL_MAX_ROWS = 1_048_576
+
+# Arrow IPC 写出时的压缩方式（Parquet 同样使用 zstd）
+_IPC_OPTIONS = pa.ipc.IpcWriteOptions(compression="zstd")
+
+# 结果表列类型 -> Arrow 类型
+_ARROW_TYPES = {
+    "object": pa.string(),
+    "string[pyarrow]": pa.string(),
+    "category": pa.string(),
+    "float64": pa.float64(),
+    "float32": pa.float32(),
+    "Int64": pa.int64(),
+    "Int32": pa.int64(),
+    "bool": pa.bool_(),
+}
+
+
+def detect_format(filename):
+    """按扩展名判断文件格式"""
+    ext = os.path.splitext(str(filename))[1].lower()
+    for fmt, info in FILE_FORMATS.items():
+        if ext in info["extensions"]:
+            return fmt
+    raise ValueError(f"不支持的文件格式: {ext or filename}（支持: {', '.join(UPLOAD_TYPES)}）")
+
+
+def format_extension(fmt):
+    return FILE_FORMATS[fmt]["extensions"][0]
+
+
+def detect_compression(filename):
+    """按扩展名判断导出压缩方式（.gz / .zip），未压缩时返回 None"""
+    ext = os.path.splitext(str(filename))[1].lower()
+    for compression, info in COMPRESSIONS.items():
+        if ext == info["extension"]:
+            return compression
+    return None
+
+
+def _wanted(columns):
+    """需要的列：ColumnSchema 按别名判断，列名列表按名称判断"""
+    return columns if isinstance(columns, ColumnSchema) else set(columns)
+
+
+def _projection(available, columns):
+    """列裁剪：按文件中的列顺序保留需要的列；columns 为 None 时读取全部列"""
+    if columns is None:
+        return None
+    wanted = _wanted(columns)
+    return [name for name in available if name in wanted]
+
+
+def _open_arrow(source, columns):
+    """打开 Arrow IPC 文件，返回 (reader, 列裁剪)
+
+    有需要的列时按列序号重新打开文件，每个记录批次只读取、解压这些列，返回的列裁剪为 None；
+    没有任何需要的列时返回空列表，由调用方去掉全部列。
+    """
+    reader = pa.ipc.open_file(source)
+    projection = _projection(reader.schema.names, columns)
+    if projection:
+        names = reader.schema.names
+        options = pa.ipc.IpcReadOptions(included_fields=[names.index(name) for name in projection])
+        reader, projection = pa.ipc.open_file(source, options=options), None
+    return reader, projection
+
+
+def _csv_usecols(columns):
+    if columns is None:
+        return None
+    wanted = _wanted(columns)
+    return lambda name: name in wanted
+
+
+def read_table(source, fmt="csv", columns=None, sheet=None):
+    """整表读取为 DataFrame，columns 指定时只读取其中存在的列；sheet 为 Excel 工作表名（默认第一个）"""
+    df = _read_raw_table(source, fmt, columns, sheet)
+    if isinstance(columns, ColumnSchema):
+        df = columns.normalize(df)
+    return df
+
+
+def _read_raw_table(source, fmt, columns, sheet):
+    if fmt == "xlsx":
+        chunks = list(iter_excel_chunks(source, sheet, columns=columns))
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    if fmt == "csv":
+        return pd.read_csv(source, encoding="utf-8-sig", usecols=_csv_usecols(columns))
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(source)
+        return parquet_file.read(columns=_projection(parquet_file.schema_arrow.names, columns)).to_pandas()
+    if fmt == "arrow":
+        reader, projection = _open_arrow(source, columns)
+        table = reader.read_all()
+        return (table.select(projection) if projection is not None else table).to_pandas()
+    raise ValueError(f"不支持的文件格式: {fmt}")
+
+
+def count_rows(source, fmt, sheet=None):
+    """Parquet/Arrow 从元数据、Excel 从工作表尺寸读取总行数（读取位置会改变）；CSV 或无法确定时返回 None"""
+    if fmt == "xlsx":
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            max_row = _excel_sheet(workbook, sheet).max_row
+        finally:
+            workbook.close()
+        return max_row - 1 if max_row else None
+    if fmt == "parquet":
+        return pq.ParquetFile(source).metadata.num_rows
+    if fmt == "arrow":
+        # 只读取各记录批次的元数据中的行数，不解压数据
+        return ds.IpcFileFormat().make_fragment(source).count_rows()
+    return None
+
+
+def _rebatch(batches, chunksize, first_chunksize):
+    """把 Arrow RecordBatch 流重新组合为指定行数的 DataFrame 块，行索引连续编号"""
+    size = min(first_chunksize, chunksize) if first_chunksize else chunksize
+    pending, pending_rows, offset = [], 0, 0
+    for batch in batches:
+        while batch.num_rows:
+            take = min(size - pending_rows, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            pending_rows += take
+            batch = batch.slice(take)
+            if pending_rows == size:
+                chunk = pa.Table.from_batches(pending).to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + pending_rows)
+                yield chunk
+                offset += pending_rows
+                pending, pending_rows, size = [], 0, chunksize
+    if pending_rows:
+        chunk = pa.Table.from_batches(pending).to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + pending_rows)
+        yield chunk
+
+
+def iter_table_chunks(source, fmt="csv", chunksize=DEFAULT_CHUNKSIZE, first_chunksize=FIRST_CHUNKSIZE, columns=None,
+                      sheet=None):
+    """按格式分块读取，首块使用较小的块大小，columns 指定时只读取其中存在的列"""
+    chunks = _iter_raw_chunks(source, fmt, chunksize, first_chunksize, columns, sheet)
+    if isinstance(columns, ColumnSchema):
+        chunks = columns.normalize_chunks(chunks)
+    yield from chunks
+
+
+def _iter_raw_chunks(source, fmt, chunksize, first_chunksize, columns, sheet):
+    if fmt == "xlsx":
+        yield from iter_excel_chunks(source, sheet, chunksize, first_chunksize, columns)
+    elif fmt == "csv":
+        yield from iter_csv_chunks(source, chunksize, first_chunksize, columns)
+    elif fmt == "parquet":
+        parquet_file = pq.ParquetFile(source)
+        projection = _projection(parquet_file.schema_arrow.names, columns)
+        batch_size = min(first_chunksize, chunksize) if first_chunksize else chunksize
+        yield from _rebatch(parquet_file.iter_batches(batch_size=batch_size, columns=projection),
+                            chunksize, first_chunksize)
+    elif fmt == "arrow":
+        reader, projection = _open_arrow(source, columns)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        if projection is not None:
+            batches = (batch.select(projection) for batch in batches)
+        yield from _rebatch(batches, chunksize, first_chunksize)
+    else:
+        raise ValueError(f"不支持的文件格式: {fmt}")
+
+
+def iter_csv_chunks(source, chunksize=DEFAULT_CHUNKSIZE, first_chunksize=FIRST_CHUNKSIZE, columns=None):
+    """分块读取CSV，首块使用较小的块大小，之后按固定块大小读取"""
+    with pd.read_csv(source, iterator=True, encoding="utf-8-sig", usecols=_csv_usecols(columns)) as reader:
+        size = min(first_chunksize, chunksize) if first_chunksize else chunksize
+        while True:
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                return
+            if chunk.empty:
+                return
+            yield chunk
+            size = chunksize
+
+
+# --- Excel 只读流式解析 ---
+def _excel_sheet(workbook, sheet=None):
+    if sheet is None:
+        return workbook.worksheets[0]
+    if sheet not in workbook.sheetnames:
+        raise ValueError(f"工作表不存在: {sheet}（可选: {', '.join(workbook.sheetnames)}）")
+    return workbook[sheet]
+
+
+def list_excel_sheets(source):
+    """Excel 文件中的工作表名称（只读取工作簿目录，不解析单元格）"""
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(source, sheet=None, chunksize=DEFAULT_CHUNKSIZE, first_chunksize=FIRST_CHUNKSIZE, columns=None):
+    """以只读模式逐行读取 Excel 工作表并按块生成 DataFrame；第一行为表头，公式取缓存的计算结果"""
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = _excel_sheet(workbook, sheet).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame(columns=columns or [])
+            return
+        header = [str(name).strip() if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        # 只保留需要的列：按表头位置取值，其余单元格不进入 DataFrame
+        if columns is None:
+            names, positions = header, list(range(len(header)))
+        else:
+            wanted = _wanted(columns)
+            names = [name for name in header if name in wanted]
+            positions = [i for i, name in enumerate(header) if name in wanted]
+        width = len(header)
+        pick = itemgetter(*positions) if len(positions) > 1 else (
+            (lambda row: (row[positions[0]],)) if positions else (lambda row: ()))
+
+        size = min(first_chunksize, chunksize) if first_chunksize else chunksize
+        pending, offset, emitted = [], 0, False
+        for row in rows:
+            # 只读模式下行长度可能短于表头（行尾空单元格不输出），补齐后再取列
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            if all(value is None for value in row):
+                continue
+            pending.append(pick(row))
+            if len(pending) == size:
+                yield pd.DataFrame(pending, columns=names, index=pd.RangeIndex(offset, offset + size))
+                offset += size
+                pending, size, emitted = [], chunksize, True
+        if pending or not emitted:
+            yield pd.DataFrame(pending, columns=names, index=pd.RangeIndex(offset, offset + len(pending)))
+    finally:
+        workbook.close()
+
+
+def iter_frame_chunks(df, chunksize=DEFAULT_CHUNKSIZE):
+    """把已读入内存的表按行切片，便于分段评分并刷新进度"""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def iter_scored_chunks(chunks, weights, evaluate=evaluate_batch):
+    """逐块评分，同一批次的结果使用相同的评估时间"""
+    evaluated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+    for chunk in chunks:
+        yield evaluate(chunk, weights, evaluated_at)
+
+
+# --- 结果写出 ---
+def _column_dtype(series, dtypes):
+    """结果列类型：优先使用结果表结构定义，否则按数据推断"""
+    if dtypes and series.name in dtypes:
+        return dtypes[series.name]
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "Int64"
+    if pd.api.types.is_float_dtype(series):
+        return "float32" if series.dtype == "float32" else "float64"
+    return "object"
+
+
+def arrow_schema(frame, dtypes=None):
+    """按结果表结构（列名 -> 类型，与 result_store 中的定义相同）生成 Arrow schema"""
+    return pa.schema([
+        pa.field(name, _ARROW_TYPES[_column_dtype(frame[name], dtypes)]) for name in frame.columns
+    ])
+
+
+def to_arrow_table(frame, dtypes=None, schema=None):
+    """结果表 -> Arrow Table，各列按 schema 转换类型（字符串列中的非字符串值转为文本）"""
+    if schema is None:
+        schema = arrow_schema(frame, dtypes)
+    arrays = []
+    for field in schema:
+        series = frame[field.name]
+        if pa.types.is_string(field.type):
+            values = series.astype("string")
+        elif pa.types.is_boolean(field.type):
+            values = series.astype("boolean")
+        elif pa.types.is_integer(field.type):
+            values = typed_column(series, "Int64", len(series))
+        else:
+            values = typed_column(series, "float32" if pa.types.is_float32(field.type) else "float64", len(series))
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_filename(stem, fmt="csv", compression=None):
+    """导出文件名：按格式加扩展名，压缩时再加压缩扩展名（zip 包内仍为 .csv 文件）"""
+    name = f"{stem}{format_extension(fmt)}"
+    if compression == "gzip":
+        return name + COMPRESSIONS["gzip"]["extension"]
+    if compression == "zip":
+        return f"{stem}{COMPRESSIONS['zip']['extension']}"
+    return name
+
+
+def export_mime(fmt="csv", compression=None):
+    return COMPRESSIONS[compression]["mime"] if compression else FILE_FORMATS[fmt]["mime"]
+
+
+def _excel_rows(frame):
+    """DataFrame -> Excel 行（缺失值写为空单元格，float32 评分按两位小数写出）"""
+    frame = widen_frame(frame)
+    values = frame.astype(object)
+    return values.where(frame.notna(), None).itertuples(index=False, name=None)
+
+
+class ResultWriter:
+    """按块追加写出结果文件
+
+    - CSV：逐块追加，compression 为 "gzip"/"zip" 时直接写入压缩流
+    - Parquet/Arrow：使用第一块确定的列类型，后续各块按同一 schema 转换
+    - Excel：只写模式逐行写出，明细超过单表行数上限时续写到下一个工作表；
+      summary_sheet 为 True 时预留第一个"汇总"工作表，可在写完明细后再填写
+    """
+
+    def __init__(self, path, fmt=None, dtypes=None, compression=None, summary_sheet=False):
+        self.path = path
+        self.fmt = fmt or detect_format(path)
+        self.dtypes = dtypes
+        self.compression = compression
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+        self._zip = None
+        self._workbook = None
+        self._sheets = {}
+        self._detail_sheet = None
+        self._detail_sheets = 0
+        self._detail_rows = 0
+        if self.fmt not in FILE_FORMATS:
+            raise ValueError(f"不支持的文件格式: {self.fmt}")
+        if compression is not None and (compression not in COMPRESSIONS or self.fmt != "csv"):
+            raise ValueError(f"只有 CSV 支持压缩（可选: {', '.join(COMPRESSIONS)}）")
+
+        if self.fmt == "csv":
+            if compression == "gzip":
+                self._file = gzip.open(path, "wt", encoding="utf-8-sig", newline="", compresslevel=6)
+            elif compression == "zip":
+                self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+                member_name = os.path.splitext(os.path.basename(path))[0] + format_extension("csv")
+                member = self._zip.open(member_name, "w", force_zip64=True)
+                self._file = io.TextIOWrapper(member, encoding="utf-8-sig", newline="")
+            else:
+                self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        elif self.fmt == "xlsx":
+            self._workbook = Workbook(write_only=True)
+            if summary_sheet:
+                self._sheets["汇总"] = self._workbook.create_sheet("汇总")
+
+    def write(self, frame):
+        if self.fmt == "csv":
+            frame.to_csv(self._file, header=(self.rows == 0), index=False)
+        elif self.fmt == "xlsx":
+            self._write_excel_details(frame)
+        else:
+            if self._schema is None:
+                self._schema = arrow_schema(frame, self.dtypes)
+                if self.fmt == "parquet":
+                    self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+                else:
+                    self._file = pa.OSFile(self.path, "wb")
+                    self._writer = pa.ipc.new_file(self._file, self._schema, options=_IPC_OPTIONS)
+            self._writer.write_table(to_arrow_table(frame, schema=self._schema))
+        self.rows += len(frame)
+
+    def _write_excel_details(self, frame):
+        start = 0
+        while start < len(frame) or self._detail_sheet is None:
+            if self._detail_sheet is None or self._detail_rows >= EXCEL_MAX_ROWS:
+                self._detail_sheets += 1
+                title = "明细" if self._detail_sheets == 1 else f"明细{self._detail_sheets}"
+                self._detail_sheet = self._workbook.create_sheet(title)
+                self._sheets[title] = self._detail_sheet
+                self._detail_sheet.append(list(frame.columns))
+                self._detail_rows = 1
+            stop = start + min(len(frame) - start, EXCEL_MAX_ROWS - self._detail_rows)
+            for row in _excel_rows(frame.iloc[start:stop]):
+                self._detail_sheet.append(row)
+            self._detail_rows += stop - start
+            start = stop
+
+    def write_sheet(self, title, frame):
+        """Excel：把一张小表（汇总、校验错误等）写入单独的工作表"""
+        if self.fmt != "xlsx":
+            raise ValueError("只有 Excel 格式支持写入多个工作表")
+        sheet = self._sheets.get(title)
+        if sheet is None:
+            sheet = self._workbook.create_sheet(title)
+            self._sheets[title] = sheet
+        sheet.append(list(frame.columns))
+        for row in _excel_rows(frame):
+            sheet.append(row)
+
+    def close(self):
+        if self._workbook is not None:
+            if self._detail_sheet is None:
+                self._sheets["明细"] = self._workbook.create_sheet("明细")
+            self._workbook.save(self.path)
+            self._workbook = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --- 导出 ---
+def build_summary(rows_scored, level_counts=None, mean_score=None, rows_invalid=0, weights=None):
+    """导出文件的汇总表（项目, 值）：评分行数、校验未通过行数、平均分、各评级人数与维度权重"""
+    items = [("评分行数", int(rows_scored)), ("未通过校验行数", int(rows_invalid))]
+    if mean_score is not None:
+        items.append(("平均综合评分", round(float(mean_score), 2)))
+    if level_counts is not None:
+        items += [(f"{level} 人数", int(count)) for level, count in level_counts.items()]
+    if weights:
+        items += [(f"{DIMENSION_LABELS.get(key, key)}权重", f"{value * 100:.1f}%") for key, value in weights.items()]
+    items.append(("导出时间", datetime.now().strftime("%Y-%m-%d %H:%M")))
+    return pd.DataFrame(items, columns=["项目", "值"])
+
+
+def export_frame(path, frame, fmt="csv", dtypes=None, compression=None, summary=None, errors=None,
+                 chunksize=EXPORT_CHUNKSIZE):
+    """把结果表按块写入文件；Excel 另写入汇总与校验错误工作表（其他格式忽略这两项）"""
+    excel = fmt == "xlsx"
+    with ResultWriter(path, fmt, dtypes, compression, summary_sheet=excel and summary is not None) as writer:
+        for chunk in iter_frame_chunks(frame, chunksize):
+            writer.write(chunk)
+        if writer.rows == 0:
+            writer.write(frame)
+        if excel and summary is not None:
+            writer.write_sheet("汇总", summary)
+        if excel and errors is not None and len(errors):
+            writer.write_sheet("校验错误", errors)
+    return path
+
+
+def export_to_tempfile(frame, fmt="csv", dtypes=None, compression=None, summary=None, errors=None):
+    """导出到临时文件并返回路径，供下载按钮读取；文件由调用方负责删除"""
+    suffix = export_filename("", fmt, compression)
+    fd, path = tempfile.mkstemp(prefix="redbook_export_", suffix=suffix)
+    os.close(fd)
+    try:
+        return export_frame(path, frame, fmt, dtypes, compression, summary, errors)
+    except Exception:
+        os.remove(path)
+        raise
+
+
+class SessionExport:
+    """会话内保存的一个导出文件，按内容版本（如 (记录版本, 格式)）判断是否过期
+
+    与 ScoredBatch 的导出文件一样只保存临时文件路径，不把导出内容留在会话内存中；
+    版本变化时删除旧文件，对象释放（会话结束）时删除文件。
+    """
+
+    def __init__(self):
+        self.key = None
+        self.path = None
+
+    def existing(self, key):
+        """key 对应的已生成文件路径；尚未生成或版本已变化时返回 None（旧文件随之删除）"""
+        if self.path is not None and (self.key != key or not os.path.exists(self.path)):
+            self.clear()
+        return self.path
+
+    def create(self, key, frame, fmt="csv", dtypes=None, compression=None, summary=None, errors=None):
+        """导出到新的临时文件并替换旧文件，返回路径"""
+        self.clear()
+        self.path = export_to_tempfile(frame, fmt, dtypes, compression, summary, errors)
+        self.key = key
+        return self.path
+
+    def clear(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.key = None
+        self.path = None
+
+    def __del__(self):
+        self.clear()
@@ -0,0 +1,107 @@
+"""
+批量评估进度显示
+
+按时间间隔和行数间隔对进度刷新节流，并计算吞吐量（行/秒）与预计剩余时间，
+使界面刷新次数与数据行数无关。进度条只需提供 progress(value, text=...) 方法，
+因此 st.progress 与命令行输出都可以使用。
+"""
+import sys
+import time
+
+
+def format_eta(seconds):
+    """把秒数格式化为简短的剩余时间描述"""
+    if seconds is None:
+        return "--"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} 秒"
+    if seconds < 3600:
+        return f"{seconds // 60} 分 {seconds % 60} 秒"
+    return f"{seconds // 3600} 小时 {seconds % 3600 // 60} 分"
+
+
+class ProgressReporter:
+    """节流的进度/状态显示：两次刷新之间至少间隔 min_interval 秒且至少新增 min_rows 行"""
+
+    def __init__(self, progress_bar, total_rows=None, min_interval=0.5, min_rows=0, clock=time.perf_counter):
+        self.progress_bar = progress_bar
+        self.total_rows = total_rows
+        self.min_interval = min_interval
+        self.min_rows = min_rows
+        self.clock = clock
+        self.start_time = clock()
+        self.rows_done = 0
+        self.updates = 0
+        self._last_time = None
+        self._last_rows = 0
+
+    @property
+    def elapsed(self):
+        return self.clock() - self.start_time
+
+    @property
+    def rate(self):
+        """当前平均吞吐量（行/秒）"""
+        elapsed = self.elapsed
+        return self.rows_done / elapsed if elapsed > 0 else 0.0
+
+    def fraction(self, fraction=None):
+        if fraction is None and self.total_rows:
+            fraction = self.rows_done / self.total_rows
+        if fraction is None:
+            return None
+        return min(max(fraction, 0.0), 1.0)
+
+    def eta(self, fraction=None):
+        """预计剩余秒数；总量未知时返回 None"""
+        fraction = self.fraction(fraction)
+        if not fraction:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+    def status_text(self, fraction=None):
+        if self.total_rows:
+            done = f"已评估 {self.rows_done:,} / {self.total_rows:,} 行"
+        else:
+            done = f"已评估 {self.rows_done:,} 行"
+        return f"{done} · {self.rate:,.0f} 行/秒 · 预计剩余 {format_eta(self.eta(fraction))}"
+
+    def update(self, rows_done, fraction=None, force=False):
+        """记录进度，满足节流条件时刷新显示，返回本次是否刷新"""
+        self.rows_done = rows_done
+        if not force:
+            if rows_done - self._last_rows < self.min_rows:
+                return False
+            now = self.clock()
+            if self._last_time is not None and now - self._last_time < self.min_interval:
+                return False
+
+        self._last_time = self.clock()
+        self._last_rows = rows_done
+        self.updates += 1
+        value = self.fraction(fraction)
+        self.progress_bar.progress(value if value is not None else 0.0, text=self.status_text(fraction))
+        return True
+
+    def finish(self, rows_done=None):
+        """完成时强制刷新一次，进度置为100%"""
+        if rows_done is None:
+            rows_done = self.rows_done
+        self.rows_done = rows_done
+        self._last_time = self.clock()
+        self._last_rows = rows_done
+        self.updates += 1
+        text = f"✅ 完成 {rows_done:,} 行 · 用时 {self.elapsed:.2f} 秒 · {self.rate:,.0f} 行/秒"
+        self.progress_bar.progress(1.0, text=text)
+
+
+class StderrProgress:
+    """命令行进度条：把进度文本输出到标准错误"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def progress(self, value, text=""):
+        percent = f"{value * 100:5.1f}% " if value else ""
+        print(f"\r{percent}{text}", end="", file=self.stream, flush=True)
@@ -0,0 +1,327 @@
+"""
+批量评分引擎 - modern_evaluator v3.0 评分模型的列式实现
+
+与 modern_evaluator.py 中的 score_* 标量函数逐项对应，对整张 DataFrame
+一次性在 NumPy 数组上计算子项得分、维度得分、综合评分与评级。
+本模块不依赖 Streamlit，可被命令行工具等直接导入。
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from column_schema import ColumnSchema
+from result_store import compact_integers, compact_scores, constant_category
+from scoring_rules import MODERN_RULES, MODERN_TIERS, TierSpec, compile_rules
+from validation import build_validation_rules
+
+# 评分模型版本：阈值、权重或评级规则变化时递增，已缓存的评分结果随之失效
+MODEL_VERSION = "v3.0-2"
+
+# --- 批量输入字段 (内部键, CSV列名, 缺列时的默认值) ---
+BATCH_INPUTS = [
+    ("vertical_ratio", "垂类专注度", 0.75),
+    ("viral_ratio", "爆文率", 0.12),
+    ("video_ratio", "视频占比", 0.6),
+    ("completion_rate", "完播率", 0.35),
+    ("cpe", "CPE", 15.0),
+    ("cpm", "CPM", 200.0),
+    ("collect_ratio", "收藏占比", 0.3),
+    ("comment_ratio", "评论占比", 0.08),
+    ("stability", "数据稳定性", 0.6),
+    ("audience_match", "粉丝画像重合度", 0.75),
+    ("real_interaction", "真实互动率", 0.85),
+    ("fan_activity", "粉丝活跃度", 0.92),
+    ("high_end_ratio", "高端品牌占比", 0.4),
+    ("commercial_ratio", "商业化比例", 0.25),
+    ("search_ratio", "搜索占比", 0.3),
+    ("recommend_ratio", "推荐占比", 0.4),
+]
+
+# 批量评估读取的列：读取时只加载这些列（含别名），表头映射为标准列名，占比列统一换算为小数
+INPUT_SCHEMA = ColumnSchema(
+    [("name", "达人昵称"), ("followers", "粉丝数")]
+    + [(key, column) for key, column, _ in BATCH_INPUTS]
+    + [("growth_trend", "增长趋势"), ("has_negative", "负面舆情")]
+)
+
+DIMENSIONS = ["content", "data", "audience", "business", "growth"]
+
+# 默认维度权重（与 modern_evaluator 初始权重一致）
+DEFAULT_WEIGHTS = {
+    "content": 0.25,
+    "data": 0.25,
+    "audience": 0.20,
+    "business": 0.15,
+    "growth": 0.15
+}
+
+DIMENSION_LABELS = {
+    "content": "内容维度",
+    "data": "数据维度",
+    "audience": "粉丝维度",
+    "business": "商业维度",
+    "growth": "成长性维度",
+}
+
+# 上传数据的校验规则：数值类型与范围、增长趋势的可选取值等
+VALIDATION_RULES = build_validation_rules(INPUT_SCHEMA, MODERN_RULES["growth_trend"]["scores"])
+
+# 由规则表编译的评分函数：标量版供单个评估使用，列式版供批量评估使用
+SCALAR_SCORERS, ARRAY_SCORERS = compile_rules(MODERN_RULES)
+
+# 数据异常行的兜底结果（与逐行评估的 except 分支一致）
+FALLBACK_SCORE = 3.0
+FALLBACK_LEVEL = "B级"
+FALLBACK_RECOMMENDATION = "⚠️ 数据不完整，建议补充信息后重新评估"
+
+# 评级分档（定义见 scoring_rules.MODERN_TIERS），单个评估与批量评估共用
+TIERS = TierSpec(MODERN_TIERS, extra_recommendations=[FALLBACK_RECOMMENDATION])
+LEVEL_BREAKS = TIERS.breaks
+LEVEL_LABELS = TIERS.levels
+RECOMMENDATION_LABELS = TIERS.recommendations[:TIERS.risk_code]
+RISK_RECOMMENDATION = MODERN_TIERS["risk_recommendation"]
+
+# 建议编号查找表：0-5 对应各评级，之后依次为高风险、数据不完整
+RECOMMENDATION_LOOKUP = TIERS.recommendations
+_RISK_CODE = TIERS.risk_code
+_FALLBACK_CODE = _RISK_CODE + 1
+_FALLBACK_LEVEL_CODE = list(LEVEL_LABELS).index(FALLBACK_LEVEL)
+
+# 结果表中评级/建议的分类类型：每行只保存编号
+LEVEL_DTYPE = pd.CategoricalDtype(LEVEL_LABELS)
+RECOMMENDATION_DTYPE = pd.CategoricalDtype(RECOMMENDATION_LOOKUP)
+
+
+# --- 输入提取 ---
+def _is_real_number(value):
+    return isinstance(value, (int, float, np.number))
+
+
+def _numeric_input(df, column, default):
+    """读取数值列，返回 (float64数组, 非数值行掩码)"""
+    n = len(df)
+    if column not in df.columns:
+        return np.full(n, default, dtype=np.float64), np.zeros(n, dtype=bool)
+
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan), np.zeros(n, dtype=bool)
+
+    # 对象列中的字符串等非数值无法参与比较，对应逐行评估中抛异常的行
+    invalid = ~series.map(_is_real_number).to_numpy(dtype=bool)
+    values = pd.to_numeric(series.where(~invalid), errors="coerce")
+    return values.to_numpy(dtype=np.float64, na_value=np.nan), invalid
+
+
+def extract_numeric_inputs(df, spec):
+    """按 (内部键, 列名, 默认值) 规格读取数值列，返回 (列数组字典, 非数值行掩码)"""
+    inputs = {}
+    invalid = np.zeros(len(df), dtype=bool)
+    for key, column, default in spec:
+        inputs[key], bad = _numeric_input(df, column, default)
+        invalid |= bad
+    return inputs, invalid
+
+
+def extract_flag(df, column):
+    """读取布尔标记列（按真值判断，缺列时全部为 False）"""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[column].to_numpy().astype(bool)
+
+
+def extract_inputs(df):
+    """把上传数据整理为评分所需的列数组"""
+    inputs, invalid = extract_numeric_inputs(df, BATCH_INPUTS)
+
+    if "增长趋势" in df.columns:
+        inputs["growth_trend"] = df["增长趋势"].to_numpy()
+    else:
+        inputs["growth_trend"] = np.full(len(df), "平稳上扬", dtype=object)
+
+    inputs["has_negative"] = extract_flag(df, "负面舆情")
+    inputs["invalid"] = invalid
+    return inputs
+
+
+# --- 子项 / 维度 / 综合评分 ---
+def compute_sub_scores(inputs):
+    """计算所有子项得分，键名与标量评分函数同名"""
+    a = ARRAY_SCORERS
+    interaction_points = a["collect_share"](inputs["collect_ratio"]) + a["comment_share"](inputs["comment_ratio"])
+    return {
+        "score_content_focus": a["content_focus"](inputs["vertical_ratio"]),
+        "score_viral_rate": a["viral_rate"](inputs["viral_ratio"]),
+        "score_completion_rate": a["completion_rate"](inputs["video_ratio"], inputs["completion_rate"]),
+        "score_cpe": a["cpe"](inputs["cpe"]),
+        "score_cpm": a["cpm"](inputs["cpm"]),
+        "score_interaction_health": a["interaction_health"](interaction_points),
+        "score_data_stability": a["data_stability"](inputs["stability"]),
+        "score_audience_match": a["audience_match"](inputs["audience_match"]),
+        "score_real_interaction": a["real_interaction"](inputs["real_interaction"]),
+        "score_fan_activity": a["fan_activity"](inputs["fan_activity"]),
+        "score_brand_level": a["brand_level"](inputs["high_end_ratio"]),
+        "score_commercial_balance": a["commercial_balance"](inputs["commercial_ratio"]),
+        "score_growth_trend": a["growth_trend"](inputs["growth_trend"]),
+        "score_fan_source": a["fan_source"](inputs["search_ratio"] + inputs["recommend_ratio"]),
+    }
+
+
+def compute_dimension_scores(sub_scores):
+    """按批量评估的子项权重合成五个维度得分"""
+    s = sub_scores
+    return {
+        "content": (
+            s["score_content_focus"] * 0.4 +
+            s["score_viral_rate"] * 0.3 +
+            s["score_completion_rate"] * 0.3
+        ),
+        "data": (
+            s["score_cpe"] * 0.25 +
+            s["score_cpm"] * 0.25 +
+            s["score_interaction_health"] * 0.25 +
+            s["score_data_stability"] * 0.25
+        ),
+        "audience": (
+            s["score_audience_match"] * 0.4 +
+            s["score_real_interaction"] * 0.3 +
+            s["score_fan_activity"] * 0.3
+        ),
+        "business": (
+            s["score_brand_level"] * 0.6 +
+            s["score_commercial_balance"] * 0.4
+        ),
+        "growth": (
+            s["score_growth_trend"] * 0.6 +
+            s["score_fan_source"] * 0.4
+        ),
+    }
+
+
+def comprehensive_evaluation(scores_dict, weights_dict):
+    """计算综合评分（单个评估）：各维度得分按权重加权求和"""
+    return sum(scores_dict[key] * weights_dict[key] for key in scores_dict.keys())
+
+
+def comprehensive_evaluation_array(dimension_scores, weights_dict):
+    """列式综合评分，累加顺序与 comprehensive_evaluation 相同"""
+    final_scores = 0
+    for key in dimension_scores.keys():
+        final_scores = final_scores + dimension_scores[key] * weights_dict[key]
+    return final_scores
+
+
+def normalize_weights(raw_weights):
+    """权重归一化，使各维度权重之和为1"""
+    total_weight = sum(raw_weights[key] for key in DIMENSIONS)
+    if total_weight <= 0:
+        raise ValueError("权重总和必须大于0")
+    return {key: raw_weights[key] / total_weight for key in DIMENSIONS}
+
+
+def get_level_codes(final_scores):
+    """综合评分 -> 评级档位编号（0=D级 … 5=S级）"""
+    return TIERS.level_codes(final_scores)
+
+
+def get_level_array(final_scores):
+    """综合评分 -> 评级"""
+    return LEVEL_LABELS[get_level_codes(final_scores)]
+
+
+def get_recommendation_array(final_scores, has_risk):
+    """综合评分 -> 合作建议，存在负面舆情的行标记为高风险"""
+    return RECOMMENDATION_LOOKUP[TIERS.assign(final_scores, has_risk)[1]]
+
+
+def reweight_scores(matrix, weights_dict):
+    """N×5 维度得分矩阵与权重向量相乘，按维度顺序逐列累加，与 comprehensive_evaluation_array 逐位一致"""
+    final_scores = np.zeros(matrix.shape[0])
+    for i, key in enumerate(DIMENSIONS):
+        final_scores += matrix[:, i] * weights_dict[key]
+    return final_scores
+
+
+def dimension_matrix(dimension_scores):
+    """把五个维度得分排成 N×5 矩阵（列优先存储，便于逐列运算）"""
+    first = dimension_scores[DIMENSIONS[0]]
+    matrix = np.empty((len(first), len(DIMENSIONS)), order="F")
+    for i, key in enumerate(DIMENSIONS):
+        matrix[:, i] = dimension_scores[key]
+    return matrix
+
+
+def assign_label_codes(final_scores, has_risk, invalid):
+    """根据综合评分生成评级/建议编号（对应 LEVEL_LABELS / RECOMMENDATION_LOOKUP），数据异常行使用兜底结果"""
+    level_codes, recommendation_codes = TIERS.assign(final_scores, has_risk)
+    if invalid.any():
+        final_scores = np.where(invalid, FALLBACK_SCORE, final_scores)
+        level_codes[invalid] = _FALLBACK_LEVEL_CODE
+        recommendation_codes[invalid] = _FALLBACK_CODE
+    return final_scores, level_codes, recommendation_codes
+
+
+def assign_labels(final_scores, has_risk, invalid):
+    """根据综合评分生成评级与建议，数据异常行使用兜底结果"""
+    final_scores, level_codes, recommendation_codes = assign_label_codes(final_scores, has_risk, invalid)
+    return final_scores, LEVEL_LABELS[level_codes], RECOMMENDATION_LOOKUP[recommendation_codes]
+
+
+def score_batch(df, weights_dict):
+    """对整张表评分，返回包含子项、维度、综合评分与评级的数组字典"""
+    inputs = extract_inputs(df)
+    sub_scores = compute_sub_scores(inputs)
+    dimension_scores = compute_dimension_scores(sub_scores)
+    return finalize_scores(dimension_scores, inputs["has_negative"], inputs["invalid"], weights_dict, sub_scores)
+
+
+def finalize_scores(dimension_scores, has_negative, invalid, weights_dict, sub_scores=None):
+    """由维度得分计算综合评分与评级，组装 score_batch 的返回结果"""
+    if invalid.any():
+        for key in DIMENSIONS:
+            dimension_scores[key] = np.where(invalid, 0.0, dimension_scores[key])
+
+    final_scores = comprehensive_evaluation_array(dimension_scores, weights_dict)
+    final_scores, level_codes, recommendation_codes = assign_label_codes(final_scores, has_negative, invalid)
+    levels = pd.Categorical.from_codes(level_codes, dtype=LEVEL_DTYPE)
+    recommendations = pd.Categorical.from_codes(recommendation_codes, dtype=RECOMMENDATION_DTYPE)
+
+    return {
+        "sub_scores": sub_scores,
+        "dimension_scores": dimension_scores,
+        "final_score": final_scores,
+        "level": levels,
+        "recommendation": recommendations,
+        "has_negative": has_negative,
+        "invalid": invalid,
+    }
+
+
+def build_result_frame(df, scored, evaluated_at=None):
+    """生成与逐行批量评估相同列结构的结果表（紧凑列类型，见 result_store.MODERN_RESULT_SCHEMA）"""
+    if evaluated_at is None:
+        evaluated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    if "达人昵称" in df.columns:
+        names = df["达人昵称"]
+    else:
+        names = "达人" + pd.Series(df.index + 1, index=df.index).astype(str)
+    followers = df["粉丝数"].to_numpy() if "粉丝数" in df.columns else np.zeros(len(df), dtype=np.int32)
+
+    result = {
+        "达人昵称": names.astype("string[pyarrow]").array,
+        "粉丝数": compact_integers(followers).array,
+        "综合评分": compact_scores(scored["final_score"]),
+        "评级": scored["level"],
+        "建议": scored["recommendation"],
+    }
+    for key in DIMENSIONS:
+        result[DIMENSION_LABELS[key]] = compact_scores(scored["dimension_scores"][key])
+    result["评估时间"] = constant_category(evaluated_at, len(df))
+    return pd.DataFrame(result, index=df.index)
+
+
+def evaluate_batch(df, weights_dict, evaluated_at=None):
+    """批量评估入口：DataFrame -> 结果表"""
+    return build_result_frame(df, score_batch(df, weights_dict), evaluated_at)
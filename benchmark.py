@@ -0,0 +1,363 @@
+"""
+性能基准测试：单项评分、批量评分、文件读取、结果导出与重新加权
+
+每个用例重复运行若干次，记录每次耗时的 p50 / p95、吞吐量（行/秒，按 p50 计算）与进程峰值内存，
+结果以 JSON 输出，并与保存的基准（benchmark_baseline.json）比较：吞吐量下降或峰值内存增长
+超过容差时以非零状态退出，可直接用于发布前检查。部分用例另有与机器无关的耗时上限
+（如 100 万行重新加权 < 100ms），首次运行或 p95 超过上限同样判为失败。
+
+- 测试数据由 synthetic_data 按固定种子生成，各次运行的数据完全一致
+- 同一组用例在独立的子进程中运行，峰值内存互不影响（含测试数据本身占用的内存）
+- 基准与机器相关：换机器后先用 --save-baseline 重新生成
+
+用法示例:
+    python benchmark.py                          # 运行全部用例并与基准比较
+    python benchmark.py --quick                  # 跳过千万行等耗时用例
+    python benchmark.py -k batch_score -k reweight
+    python benchmark.py --tolerance 0.3 -o 本次结果.json
+    python benchmark.py --save-baseline          # 把本次结果写入基准文件
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_MEMORY_TOLERANCE = 0.2
+SEED = 20240901
+
+# 单项评分每次调用的输入个数
+SCALAR_CALLS = 1000
+
+# 调整权重后重算全部结果的耗时上限：拖动滑块时界面不能有明显停顿
+REWEIGHT_BUDGET_MS = 100
+
+
+# --- 测试数据 ---
+def _tempdir():
+    """测试文件目录，进程退出时删除"""
+    path = tempfile.mkdtemp(prefix="redbook_bench_")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def _pool(rows):
+    from synthetic_data import generate_pool
+    return generate_pool(rows, seed=SEED)
+
+
+def _scalar_inputs(rule, rng):
+    """按规则类型生成 SCALAR_CALLS 组标量输入（覆盖各档位）"""
+    if rule["kind"] == "categories":
+        values = list(rule["scores"]) + ["未知"]
+        return [(values[i],) for i in rng.integers(0, len(values), SCALAR_CALLS)]
+    if rule["kind"] == "steps":
+        high = rule["breaks"][-1] * 1.5
+        return [(float(v),) for v in rng.uniform(0, high, SCALAR_CALLS)]
+    return [tuple(float(v) for v in row) for row in rng.uniform(0, 1, (SCALAR_CALLS, len(rule["inputs"])))]
+
+
+# --- 用例：setup(参数) 返回 (每次运行的函数, 处理的行数) ---
+def _setup_scalar(name):
+    from batch_scoring import SCALAR_SCORERS
+    from scoring_rules import MODERN_RULES
+    scorer = SCALAR_SCORERS[name]
+    inputs = _scalar_inputs(MODERN_RULES[name], np.random.default_rng(SEED))
+
+    def run():
+        for args in inputs:
+            scorer(*args)
+    return run, SCALAR_CALLS
+
+
+def _setup_comprehensive_evaluation(_):
+    from batch_scoring import DIMENSIONS, comprehensive_evaluation, normalize_weights
+    rng = np.random.default_rng(SEED)
+    scores = [dict(zip(DIMENSIONS, row)) for row in rng.uniform(1, 5, (SCALAR_CALLS, len(DIMENSIONS)))]
+    weights = [normalize_weights(dict(zip(DIMENSIONS, row))) for row in rng.uniform(5, 40, (SCALAR_CALLS, len(DIMENSIONS)))]
+
+    def run():
+        for scores_dict, weights_dict in zip(scores, weights):
+            comprehensive_evaluation(scores_dict, weights_dict)
+    return run, SCALAR_CALLS
+
+
+def _setup_batch_score(rows):
+    from batch_scoring import DEFAULT_WEIGHTS, evaluate_batch
+    df = _pool(rows)
+    return (lambda: evaluate_batch(df, DEFAULT_WEIGHTS)), rows
+
+
+def _setup_reweight(rows):
+    from batch_scoring import DEFAULT_WEIGHTS
+    from reweighting import evaluate_scored_batch
+    batch = evaluate_scored_batch(_pool(rows), DEFAULT_WEIGHTS)
+    alternate = dict(DEFAULT_WEIGHTS, content=0.35, growth=0.05)
+    state = {"weights": alternate}
+
+    def run():
+        # 交替使用两组权重，避免命中同一权重的缓存
+        state["weights"] = DEFAULT_WEIGHTS if state["weights"] is alternate else alternate
+        batch.apply_weights(state["weights"])
+    return run, rows
+
+
+def _setup_ingest(params):
+    from batch_io import iter_table_chunks
+    from batch_scoring import INPUT_SCHEMA
+    from synthetic_data import write_pool
+    fmt, rows = params
+    path = os.path.join(_tempdir(), f"pool.{fmt}")
+    write_pool(path, rows, seed=SEED)
+
+    def run():
+        for _ in iter_table_chunks(path, fmt, columns=INPUT_SCHEMA):
+            pass
+    return run, rows
+
+
+def _setup_export(rows):
+    from batch_io import export_frame
+    from batch_scoring import DEFAULT_WEIGHTS, evaluate_batch
+    from result_store import MODERN_RESULT_SCHEMA
+    results = evaluate_batch(_pool(rows), DEFAULT_WEIGHTS)
+    path = os.path.join(_tempdir(), "results.csv")
+    return (lambda: export_frame(path, results, "csv", MODERN_RESULT_SCHEMA)), rows
+
+
+def _scalar_cases():
+    from scoring_rules import MODERN_RULES
+    cases = [{"name": f"scalar.{name}", "group": "scalar", "setup": _setup_scalar, "params": name, "repeat": 30}
+             for name in MODERN_RULES]
+    cases.append({"name": "scalar.comprehensive_evaluation", "group": "scalar",
+                  "setup": _setup_comprehensive_evaluation, "params": None, "repeat": 30})
+    return cases
+
+
+def _size_label(rows):
+    return f"{rows // 1_000_000}m" if rows >= 1_000_000 else f"{rows // 1000}k"
+
+
+def build_cases():
+    """全部用例；full 为 True 的用例在 --quick 时跳过"""
+    cases = _scalar_cases()
+    for rows, repeat in [(1_000, 50), (100_000, 10), (1_000_000, 5), (10_000_000, 1)]:
+        name = f"batch_score.{_size_label(rows)}"
+        cases.append({"name": name, "group": name, "setup": _setup_batch_score, "params": rows, "repeat": repeat,
+                      "full": rows >= 10_000_000})
+    for rows, repeat in [(100_000, 20), (1_000_000, 10)]:
+        name = f"reweight.{_size_label(rows)}"
+        cases.append({"name": name, "group": name, "setup": _setup_reweight, "params": rows, "repeat": repeat,
+                      "budget_ms": REWEIGHT_BUDGET_MS})
+    for fmt, rows, repeat in [("csv", 100_000, 5), ("csv", 1_000_000, 3), ("xlsx", 20_000, 3)]:
+        name = f"ingest.{fmt}.{_size_label(rows)}"
+        cases.append({"name": name, "group": name, "setup": _setup_ingest, "params": (fmt, rows), "repeat": repeat,
+                      "full": fmt == "csv" and rows >= 1_000_000})
+    for rows, repeat in [(100_000, 5), (1_000_000, 3)]:
+        name = f"export.csv.{_size_label(rows)}"
+        cases.append({"name": name, "group": name, "setup": _setup_export, "params": rows, "repeat": repeat,
+                      "full": rows >= 1_000_000})
+    return cases
+
+
+# --- 测量 ---
+def _peak_rss_mb():
+    # Linux 上 ru_maxrss 的单位为 KB，macOS 为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(case):
+    """运行一个用例：先预热一次（重复次数为 1 的用例除外），再计时 repeat 次
+
+    预热一次的耗时记为 first_ms：有耗时上限的用例首次运行也不能超过上限。
+    """
+    run, rows = case["setup"](case["params"])
+    repeat = case["repeat"]
+    first_ms = None
+    if repeat > 1:
+        started = time.perf_counter()
+        run()
+        first_ms = round((time.perf_counter() - started) * 1000, 3)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    p50, p95 = np.percentile(timings, [50, 95])
+    return {
+        "rows": rows,
+        "repeat": repeat,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "rows_per_s": round(rows / p50, 1) if p50 > 0 else None,
+        "first_ms": first_ms,
+    }
+
+
+def run_group(names):
+    """在当前进程中运行一组用例，返回 {用例名: 结果}；峰值内存为整组运行后的进程峰值"""
+    cases = {case["name"]: case for case in build_cases()}
+    results = {name: measure(cases[name]) for name in names}
+    peak = round(_peak_rss_mb(), 1)
+    for result in results.values():
+        result["peak_rss_mb"] = peak
+    return results
+
+
+def run_isolated(names):
+    """在子进程中运行一组用例"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-group", ",".join(names)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"用例 {', '.join(names)} 运行失败:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# --- 与基准比较 ---
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """返回回退列表 [(用例, 原因)]；基准中没有的用例不比较"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("rows_per_s") and result["rows_per_s"] < base["rows_per_s"] * (1 - tolerance):
+            change = result["rows_per_s"] / base["rows_per_s"] - 1
+            regressions.append((name, f"吞吐量 {result['rows_per_s']:,.0f} 行/秒，比基准下降 {-change:.0%}"))
+        if base.get("peak_rss_mb") and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_tolerance):
+            change = result["peak_rss_mb"] / base["peak_rss_mb"] - 1
+            regressions.append((name, f"峰值内存 {result['peak_rss_mb']:,.0f} MB，比基准增加 {change:.0%}"))
+    return regressions
+
+
+def check_budgets(results, cases):
+    """返回超过耗时上限的用例列表 [(用例, 原因)]，首次运行与 p95 都不能超过上限"""
+    failures = []
+    for name, result in results.items():
+        budget = cases[name].get("budget_ms")
+        if budget is None:
+            continue
+        slowest = max(result["p95_ms"], result.get("first_ms") or 0)
+        if slowest > budget:
+            failures.append((name, f"耗时 {slowest:,.1f} ms，超过上限 {budget} ms"))
+    return failures
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def format_table(results, baseline):
+    lines = [f"{'用例':<36}{'行数':>12}{'p50(ms)':>12}{'p95(ms)':>12}{'行/秒':>16}{'峰值内存(MB)':>14}{'相对基准':>10}"]
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("rows_per_s")
+        relative = f"{result['rows_per_s'] / base - 1:+.0%}" if base else "-"
+        lines.append(f"{name:<36}{result['rows']:>12,}{result['p50_ms']:>12,.2f}{result['p95_ms']:>12,.2f}"
+                     f"{result['rows_per_s']:>16,.0f}{result['peak_rss_mb']:>14,.0f}{relative:>10}")
+    return "\n".join(lines)
+
+
+def environment():
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="评分、读取、导出与重新加权的性能基准测试")
+    parser.add_argument("-k", "--select", action="append", default=[],
+                        help="只运行名称包含该字符串的用例（可重复指定）")
+    parser.add_argument("--quick", action="store_true", help="跳过千万行批量评分等耗时用例")
+    parser.add_argument("--list", action="store_true", help="列出全部用例后退出")
+    parser.add_argument("-o", "--output", help="把本次结果写入 JSON 文件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基准文件（默认: benchmark_baseline.json）")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基准文件（保留未运行用例的基准）")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"吞吐量允许下降的比例，超过即判为回退（默认: {DEFAULT_TOLERANCE}）")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help=f"峰值内存允许增长的比例（默认: {DEFAULT_MEMORY_TOLERANCE}）")
+    parser.add_argument("--run-group", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.tolerance < 0 or args.memory_tolerance < 0:
+        print("容差不能为负数", file=sys.stderr)
+        return 2
+    if args.run_group:
+        print(json.dumps(run_group(args.run_group.split(","))))
+        return 0
+
+    cases = [case for case in build_cases()
+             if (not args.select or any(pattern in case["name"] for pattern in args.select))
+             and not (args.quick and case.get("full"))]
+    if args.list:
+        for case in cases:
+            print(case["name"])
+        return 0
+    if not cases:
+        print("没有匹配的用例", file=sys.stderr)
+        return 2
+
+    groups = {}
+    for case in cases:
+        groups.setdefault(case["group"], []).append(case["name"])
+    baseline = load_baseline(args.baseline)
+    results = {}
+    for group, names in groups.items():
+        print(f"运行 {group} ...", file=sys.stderr)
+        results.update(run_isolated(names))
+
+    print(format_table(results, baseline))
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        merged = dict(load_baseline(args.baseline), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": merged}, f, ensure_ascii=False, indent=2)
+        print(f"已保存基准 -> {args.baseline}", file=sys.stderr)
+        return 0
+
+    regressions = check_budgets(results, {case["name"]: case for case in cases})
+    if not baseline:
+        print("没有基准文件，跳过比较（可用 --save-baseline 生成）", file=sys.stderr)
+    else:
+        regressions += compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for name, reason in regressions:
+        print(f"❌ {name}: {reason}", file=sys.stderr)
+    if regressions:
+        return 1
+    if not baseline:
+        return 0
+    print(f"✅ 与基准相比没有超过容差的回退（吞吐量 {args.tolerance:.0%}，内存 {args.memory_tolerance:.0%}）",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
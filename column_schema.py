@@ -0,0 +1,190 @@
+"""
+上传数据的列映射与单位换算
+
+不同来源的数据文件表头并不统一（如 完播率 / 平均完播率、数据稳定性 / 数据稳定性系数），
+占比类指标有的填 0-1 的小数，有的填 0-100 的百分数（如 data_template.csv）。
+ColumnSchema 按别名表把表头映射为评分引擎使用的标准列名，并对每个文件判断一次
+占比列的单位，之后各数据块都按同一映射换算，评分时直接读取 float64 列数组。
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- 列别名 (内部键 -> 可识别的表头) ---
+COLUMN_ALIASES = {
+    "name": ["达人昵称", "昵称", "达人名称", "博主昵称", "账号昵称", "账号名称"],
+    "followers": ["粉丝数", "粉丝量", "粉丝数量", "粉丝总数"],
+    "vertical_ratio": ["垂类专注度", "垂类占比", "垂直度"],
+    "viral_ratio": ["爆文率", "爆文占比"],
+    "video_ratio": ["视频占比", "视频笔记占比"],
+    "completion_rate": ["完播率", "平均完播率"],
+    "cpe": ["CPE", "单次互动成本"],
+    "cpm": ["CPM", "千次曝光成本"],
+    "collect_ratio": ["收藏占比", "收藏率"],
+    "comment_ratio": ["评论占比", "评论率"],
+    "stability": ["数据稳定性", "数据稳定性系数", "稳定性系数"],
+    "audience_match": ["粉丝画像重合度", "画像重合度"],
+    "real_interaction": ["真实互动率", "真实互动占比"],
+    "fan_activity": ["粉丝活跃度", "活跃粉丝占比"],
+    "high_end_ratio": ["高端品牌占比", "高端品牌合作占比"],
+    "commercial_ratio": ["商业化比例", "商业化占比", "商单占比"],
+    "search_ratio": ["搜索占比", "搜索发现占比"],
+    "recommend_ratio": ["推荐占比", "首页推荐占比"],
+    "growth_trend": ["增长趋势", "粉丝增长趋势"],
+    "has_negative": ["负面舆情", "是否负面舆情"],
+}
+
+# 占比类指标：可能以 0-1 小数或 0-100 百分数填写
+RATIO_KEYS = {
+    "vertical_ratio", "viral_ratio", "video_ratio", "completion_rate", "collect_ratio", "comment_ratio",
+    "audience_match", "real_interaction", "fan_activity", "high_end_ratio", "commercial_ratio",
+    "search_ratio", "recommend_ratio",
+}
+
+# 表头末尾的百分号标注，如 "完播率(%)"、"完播率（%）"、"完播率%"
+_PERCENT_SUFFIX = re.compile(r"\s*[（(]?\s*[%％]\s*[)）]?\s*$")
+
+
+def normalize_header(header):
+    """表头规范化：去掉首尾空白、百分号标注，英文统一为大写"""
+    return _PERCENT_SUFFIX.sub("", str(header).strip()).upper()
+
+
+def header_is_percent(header):
+    return bool(_PERCENT_SUFFIX.search(str(header)))
+
+
+def _column_max(series):
+    """列中数值的最大值（忽略非数值与缺失值），没有数值时返回 None"""
+    if pd.api.types.is_bool_dtype(series):
+        return None
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    return float(values.max()) if len(values) else None
+
+
+def _to_ratio(series):
+    """百分数列 -> 小数列；对象列只换算其中的数值，其余值保持原样（评分时按非数值处理）"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan) / 100
+    return series.map(lambda v: v / 100 if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else v)
+
+
+class ColumnMapping:
+    """一个文件的列映射：表头 -> 标准列名、需要从百分数换算为小数的标准列，以及重复指标的多余列"""
+
+    def __init__(self, renames, percent_columns, dropped=()):
+        self.renames = dict(renames)
+        self.percent_columns = list(percent_columns)
+        self.dropped = list(dropped)
+
+    def apply(self, df):
+        """按映射重命名并换算单位，返回新的 DataFrame（不修改原表）"""
+        df = df.drop(columns=self.dropped) if self.dropped else df.copy(deep=False)
+        if self.renames:
+            df.columns = [self.renames.get(column, column) for column in df.columns]
+        for column in self.percent_columns:
+            if column in df.columns:
+                df[column] = _to_ratio(df[column])
+        return df
+
+    def describe(self):
+        """界面展示用的映射说明"""
+        parts = []
+        if self.renames:
+            parts.append("列名映射: " + "，".join(f"{src} → {dst}" for src, dst in self.renames.items()))
+        if self.percent_columns:
+            parts.append("按百分数换算: " + "、".join(self.percent_columns))
+        if self.dropped:
+            parts.append("重复指标已忽略: " + "、".join(str(column) for column in self.dropped))
+        return "；".join(parts)
+
+
+class ColumnSchema:
+    """评分引擎的输入列规格：[(内部键, 标准列名), ...]，可像列名集合一样用于列裁剪（name in schema）"""
+
+    def __init__(self, spec, aliases=COLUMN_ALIASES, ratio_keys=RATIO_KEYS):
+        self.spec = list(spec)
+        self.columns = [column for _, column in self.spec]
+        self.ratio_keys = set(ratio_keys)
+        self._lookup = {}
+        for key, column in self.spec:
+            for alias in [column] + list(aliases.get(key, [])):
+                self._lookup.setdefault(normalize_header(alias), (key, column))
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __contains__(self, header):
+        return normalize_header(header) in self._lookup
+
+    def match(self, header):
+        """表头 -> (内部键, 标准列名)，无法识别时返回 None"""
+        return self._lookup.get(normalize_header(header))
+
+    def resolve(self, df, units="auto"):
+        """根据表头与样本数据确定列映射
+
+        units="auto" 时逐列判断占比列的单位：表头带百分号，或列中存在大于1的数值，
+        即按百分数处理；全部不超过1的列在多数占比列为百分数时也按百分数处理。
+        units 为 "ratio" / "percent" 时所有占比列统一按指定单位处理。
+        """
+        renames = {}
+        dropped = []
+        taken = set()
+        ratio_columns = []
+        explicit_percent = set()
+        for header in df.columns:
+            matched = self.match(header)
+            if matched is None:
+                continue
+            key, column = matched
+            # 同一指标出现多个别名列时只使用第一个，其余列忽略
+            if column in taken:
+                dropped.append(header)
+                continue
+            taken.add(column)
+            if header != column:
+                renames[header] = column
+            if key in self.ratio_keys:
+                ratio_columns.append((header, column))
+                if header_is_percent(header):
+                    explicit_percent.add(column)
+
+        if units == "ratio":
+            percent_columns = []
+        elif units == "percent":
+            percent_columns = [column for _, column in ratio_columns]
+        else:
+            maxima = {column: _column_max(df[header]) for header, column in ratio_columns}
+            over_one = {column for column, value in maxima.items() if value is not None and value > 1}
+            measured = [column for column, value in maxima.items() if value is not None]
+            file_percent = len(measured) > 0 and len(over_one) * 2 > len(measured)
+            percent_columns = [
+                column for _, column in ratio_columns
+                if column in explicit_percent or column in over_one or (file_percent and maxima[column] is not None)
+            ]
+        return ColumnMapping(renames, percent_columns, dropped)
+
+    def normalize(self, df, units="auto"):
+        """单个 DataFrame：确定映射并换算，映射记录在 attrs["column_mapping"] 中"""
+        mapping = self.resolve(df, units)
+        result = mapping.apply(df)
+        result.attrs["column_mapping"] = mapping
+        return result
+
+    def normalize_chunks(self, chunks, units="auto"):
+        """分块数据：按第一块确定映射（每个文件只判断一次），之后各块使用同一映射"""
+        mapping = None
+        for chunk in chunks:
+            if mapping is None:
+                mapping = self.resolve(chunk, units)
+            result = mapping.apply(chunk)
+            result.attrs["column_mapping"] = mapping
+            yield result
@@ -0,0 +1,33 @@
+"""
+测试共用数据：固定种子的合成达人池，以及按固定评估时间评分的工厂
+"""
+import pytest
+
+from batch_scoring import DEFAULT_WEIGHTS
+from synthetic_data import generate_pool
+
+# 固定评估时间，使不同评分路径的结果表可以逐列比较
+EVALUATED_AT = "2024-09-01 00:00"
+
+
+@pytest.fixture(scope="session")
+def creator_pool():
+    """合成达人池工厂：相同参数只生成一次，返回的表由各测试共用，请勿原地修改"""
+    pools = {}
+
+    def make(rows, seed, **kwargs):
+        key = (rows, seed, tuple(sorted(kwargs.items())))
+        if key not in pools:
+            pools[key] = generate_pool(rows, seed=seed, **kwargs)
+        return pools[key]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def score_frame():
+    """评分工厂：用给定的评分函数（evaluate_batch / evaluate_scored_batch 等）按固定评估时间评分"""
+    def score(evaluate, frame, weights=DEFAULT_WEIGHTS):
+        return evaluate(frame, weights, evaluated_at=EVALUATED_AT)
+
+    return score
@@ -0,0 +1,193 @@
+"""
+运行耗时埋点与诊断日志
+
+批量评估变慢时，需要知道时间花在解析、校验、评分、写入会话结果、刷新进度、构建结果表还是导出上。
+Tracer 在各阶段外层记录 span（名称、开始时间、耗时、嵌套层级、附加字段），同名 span 汇总为
+次数 / 总耗时 / 自身耗时（扣除内层 span）/ 最长一次；每次页面运行结束时显示在诊断面板中，
+并按 JSON Lines 追加写入日志文件，每个 span 一行。
+
+- 未启用时 span() 返回同一个空上下文、traced() 原样返回迭代器，开销只有一次属性判断
+- 分块流水线（读取 -> 校验 -> 评分）用 traced() 逐层包装迭代器，每层的自身耗时即该阶段的耗时
+- 启用方式：环境变量 REDBOOK_DIAGNOSTICS=1（所有会话默认启用），或在「系统设置」中为当前会话打开
+- 日志文件：环境变量 REDBOOK_DIAGNOSTICS_LOG（默认 diagnostics.jsonl）
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_LOG_PATH = "diagnostics.jsonl"
+
+SUMMARY_COLUMNS = ["阶段", "次数", "总耗时(ms)", "自身耗时(ms)", "最长(ms)", "占比"]
+UNTRACED = "其他（未埋点）"
+
+# 未启用时所有 span 共用的空上下文
+_NULL_SPAN = nullcontext()
+
+# 多个会话共用同一个日志文件，逐次运行整体写入
+_LOG_LOCK = threading.Lock()
+
+
+def enabled_by_default():
+    return os.environ.get("REDBOOK_DIAGNOSTICS", "").lower() in ("1", "true", "yes", "on")
+
+
+def default_log_path():
+    return os.environ.get("REDBOOK_DIAGNOSTICS_LOG", DEFAULT_LOG_PATH)
+
+
+class _Span:
+    """一次 span 记录；退出时把耗时计入外层 span 的子耗时"""
+
+    __slots__ = ("tracer", "name", "attrs", "depth", "start", "duration", "child_time")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.depth = 0
+        self.start = 0.0
+        self.duration = 0.0
+        self.child_time = 0.0
+
+    def __enter__(self):
+        stack = self.tracer._stack
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        stack = self.tracer._stack
+        stack.pop()
+        if stack:
+            stack[-1].child_time += self.duration
+        self.tracer.spans.append(self)
+        return False
+
+
+class Tracer:
+    """一个会话的耗时埋点：begin_run() / end_run() 之间记录的 span 构成一次页面运行"""
+
+    def __init__(self, enabled=False, log_path=None, session_id=None):
+        self.enabled = enabled
+        self.log_path = log_path if log_path is not None else default_log_path()
+        self.session_id = session_id or uuid.uuid4().hex[:8]
+        self.run_id = 0
+        self.mode = None
+        self.spans = []
+        self.last_run = None
+        self._stack = []
+        self._run_start = None
+        self._run_time = None
+
+    # --- 埋点 ---
+    def span(self, name, **attrs):
+        """记录一个阶段的耗时：with tracer.span("评分", rows=n): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def traced(self, name, iterable, **attrs):
+        """逐项计时的迭代器：每次取下一项（如读取一块数据）记为一次 span"""
+        if not self.enabled:
+            return iterable
+        return self._traced(name, iterable, attrs)
+
+    def _traced(self, name, iterable, attrs):
+        iterator = iter(iterable)
+        while True:
+            with _Span(self, name, attrs):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    # --- 页面运行 ---
+    def begin_run(self, mode=None):
+        """开始一次页面运行：清空上一次运行的 span"""
+        self.spans = []
+        self._stack = []
+        self.mode = mode
+        self._run_start = None
+        if not self.enabled:
+            self.last_run = None
+            return
+        self.run_id += 1
+        self._run_start = time.perf_counter()
+        self._run_time = datetime.now()
+
+    def end_run(self, mode=None):
+        """结束一次页面运行：汇总本次运行的 span 并写入日志，返回汇总表（未启用时返回 None）"""
+        if mode is not None:
+            self.mode = mode
+        if not self.enabled or self._run_start is None:
+            return None
+        total = time.perf_counter() - self._run_start
+        summary = summarize(self.spans, total)
+        self.last_run = {"run": self.run_id, "mode": self.mode, "total_ms": total * 1000, "summary": summary}
+        if self.log_path:
+            self.write_log(total)
+        self._run_start = None
+        return summary
+
+    def records(self, total=None):
+        """本次运行的 span 记录（JSON 可序列化的字典），最后一条为整次运行"""
+        records = []
+        for span in self.spans:
+            record = {
+                "span": span.name,
+                "depth": span.depth,
+                "start_ms": round((span.start - self._run_start) * 1000, 3),
+                "duration_ms": round(span.duration * 1000, 3),
+                "self_ms": round((span.duration - span.child_time) * 1000, 3),
+            }
+            record.update(span.attrs)
+            records.append(record)
+        if total is not None:
+            records.append({"span": "页面运行", "depth": -1, "start_ms": 0.0,
+                            "duration_ms": round(total * 1000, 3), "self_ms": None})
+        return records
+
+    def write_log(self, total):
+        header = {
+            "time": self._run_time.isoformat(timespec="milliseconds"),
+            "session": self.session_id,
+            "run": self.run_id,
+            "mode": self.mode,
+        }
+        lines = "".join(json.dumps(dict(header, **record), ensure_ascii=False, default=str) + "\n"
+                        for record in self.records(total))
+        with _LOG_LOCK, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def summarize(spans, total=None):
+    """按阶段名汇总 span：次数、总耗时、自身耗时、最长一次与自身耗时占整次运行的比例
+
+    给出整次运行耗时 total 时，另加一行「其他（未埋点）」：页面运行中不在任何 span 内的时间，
+    主要是各模式下组件的渲染。
+    """
+    names = [span.name for span in spans]
+    durations = [span.duration * 1000 for span in spans]
+    self_times = [(span.duration - span.child_time) * 1000 for span in spans]
+    if total:
+        other = total * 1000 - sum(d for span, d in zip(spans, durations) if span.depth == 0)
+        names.append(UNTRACED)
+        durations.append(other)
+        self_times.append(other)
+    if not names:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    frame = pd.DataFrame({"阶段": names, "耗时": durations, "自身": self_times})
+    summary = frame.groupby("阶段", sort=False).agg(
+        次数=("耗时", "size"), 总耗时=("耗时", "sum"), 自身耗时=("自身", "sum"), 最长=("耗时", "max"))
+    summary = summary.rename(columns={"总耗时": "总耗时(ms)", "自身耗时": "自身耗时(ms)", "最长": "最长(ms)"})
+    summary["占比"] = summary["自身耗时(ms)"] / (total * 1000) if total else float("nan")
+    return summary.sort_values("自身耗时(ms)", ascending=False).reset_index()[SUMMARY_COLUMNS]
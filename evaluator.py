@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+from batch_io import SessionExport
+from result_store import SHORTLIST_SCHEMA, ResultStore
+from history_db import HistoryStore
 
 # --- 页面基础设置 ---
 st.set_page_config(
@@ -9,10 +12,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# --- 评估历史记录库（进程内共享一个实例）---
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+history_store = get_history_store()
+
 # --- 初始化Session State ---
 # 用于跨页面刷新存储已评估的达人列表
 if 'shortlist' not in st.session_state:
-    st.session_state.shortlist = []
+    st.session_state.shortlist = ResultStore(SHORTLIST_SCHEMA)
+# 待选列表导出的 CSV 临时文件（按列表版本判断是否过期）
+if 'shortlist_export' not in st.session_state:
+    st.session_state.shortlist_export = SessionExport()
 
 # --- 核心计算函数 ---
 
@@ -328,28 +341,47 @@ if kol_name:
             "主页链接": kol_url
         }
         st.session_state.shortlist.append(new_entry)
+        history_store.insert_records("basic", [new_entry])
         st.success(f"✅ {kol_name} 已成功添加！")
 
 # --- 显示待选列表 ---
 if st.session_state.shortlist:
     st.markdown("## 📋 待选达人列表")
     
-    df_shortlist = pd.DataFrame(st.session_state.shortlist)
-    st.dataframe(df_shortlist, use_container_width=True)
+    # 列表较长时只显示当前页（服务端分页）
+    browser = st.session_state.shortlist.browser()
+    page_size = 50
+    total_pages = max(1, -(-len(browser) // page_size))
+    if st.session_state.get("shortlist_page", 1) > total_pages:
+        st.session_state["shortlist_page"] = total_pages
+    if total_pages > 1:
+        page = st.number_input(f"页码（共 {total_pages:,} 页，每页 {page_size} 条）", min_value=1,
+                               max_value=total_pages, value=1, step=1, key="shortlist_page")
+    else:
+        page = 1
+    page_df, _ = browser.page(page, page_size)
+    st.dataframe(page_df, use_container_width=True)
     
     # --- 导出功能 ---
-    csv = df_shortlist.to_csv(index=False).encode('utf-8-sig') # 使用utf-8-sig确保中文在Excel中不乱码
-    
+    # 导出整个列表与列表长度成正比，只在点击时生成；CSV 临时文件按列表版本保留，列表不变时直接从文件提供下载
     c1, c2 = st.columns(2)
     with c1:
-        st.download_button(
-            label="📥 下载待选列表 (CSV)",
-            data=csv,
-            file_name="xiaohongshu_shortlist.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        shortlist_version = st.session_state.shortlist.version
+        shortlist_path = st.session_state.shortlist_export.existing(shortlist_version)
+        if shortlist_path is None and st.button("📦 生成下载文件", use_container_width=True):
+            # CSV 以 utf-8-sig 写出，确保中文在Excel中不乱码
+            shortlist_path = st.session_state.shortlist_export.create(
+                shortlist_version, st.session_state.shortlist.to_frame(), "csv", SHORTLIST_SCHEMA)
+        if shortlist_path is not None:
+            with open(shortlist_path, "rb") as f:
+                st.download_button(
+                    label="📥 下载待选列表 (CSV)",
+                    data=f,
+                    file_name="xiaohongshu_shortlist.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
     with c2:
         if st.button("清空列表", use_container_width=True, type="secondary"):
-            st.session_state.shortlist = []
+            st.session_state.shortlist.clear()
             st.experimental_rerun() # 重新运行刷新页面
\ No newline at end of file
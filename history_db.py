@@ -0,0 +1,283 @@
+"""
+评估历史记录库（SQLite）
+
+三个评估系统的所有保存操作都写入同一个本地数据库，刷新页面后记录不丢失，
+同一台服务器上的多位分析师可以共享。昵称、评估时间、综合评分、评级均建有
+索引，批量结果通过 executemany 在单个事务中写入。
+
+数据库路径默认为当前目录下的 evaluation_history.db，可通过环境变量
+REDBOOK_HISTORY_DB 指定。
+"""
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from result_store import widen_frame
+
+DEFAULT_DB_PATH = os.environ.get("REDBOOK_HISTORY_DB", "evaluation_history.db")
+
+# 各评估系统结果列 -> 数据库字段
+COLUMN_MAPS = {
+    "modern": {
+        "达人昵称": "nickname",
+        "粉丝数": "followers",
+        "综合评分": "score",
+        "评级": "tier",
+        "建议": "recommendation",
+        "内容维度": "content_score",
+        "数据维度": "data_score",
+        "粉丝维度": "audience_score",
+        "商业维度": "business_score",
+        "成长性维度": "growth_score",
+    },
+    "advanced": {
+        "达人昵称": "nickname",
+        "粉丝数": "followers",
+        "综合评分": "score",
+        "推荐等级": "recommendation",
+        "内容得分": "content_score",
+        "数据得分": "data_score",
+        "粉丝得分": "audience_score",
+        "商业得分": "business_score",
+        "成长得分": "growth_score",
+    },
+    "basic": {
+        "达人昵称": "nickname",
+        "粉丝数": "followers",
+        "综合指数": "score",
+        "合作建议": "recommendation",
+    },
+}
+
+APP_LABELS = {
+    "modern": "v3.0 现代化版",
+    "advanced": "v2.0 专业版",
+    "basic": "v1.0 基础版",
+}
+
+# 评估时间来源列（按优先级）
+TIME_COLUMNS = ["评估时间", "评估日期"]
+
+RESULT_COLUMNS = [
+    "id", "app", "nickname", "followers", "score", "tier", "recommendation",
+    "content_score", "data_score", "audience_score", "business_score", "growth_score",
+    "evaluated_at", "extra",
+]
+
+# 查询结果展示用的中文列名
+DISPLAY_LABELS = {
+    "id": "记录ID",
+    "app": "评估系统",
+    "nickname": "达人昵称",
+    "followers": "粉丝数",
+    "score": "综合评分",
+    "tier": "评级",
+    "recommendation": "建议",
+    "content_score": "内容维度",
+    "data_score": "数据维度",
+    "audience_score": "粉丝维度",
+    "business_score": "商业维度",
+    "growth_score": "成长性维度",
+    "evaluated_at": "评估时间",
+}
+
+SORT_COLUMNS = {"evaluated_at", "score", "nickname", "followers", "id"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app TEXT NOT NULL,
+    nickname TEXT,
+    followers INTEGER,
+    score REAL,
+    tier TEXT,
+    recommendation TEXT,
+    content_score REAL,
+    data_score REAL,
+    audience_score REAL,
+    business_score REAL,
+    growth_score REAL,
+    evaluated_at TEXT NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_nickname ON evaluations(nickname);
+CREATE INDEX IF NOT EXISTS idx_evaluations_evaluated_at ON evaluations(evaluated_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_score ON evaluations(score);
+CREATE INDEX IF NOT EXISTS idx_evaluations_tier ON evaluations(tier);
+"""
+
+_TIER_PATTERN = re.compile(r"(S|A\+|A|B|C|D)级")
+
+
+def tier_from_recommendation(recommendation):
+    """从合作建议文本中解析评级，如 "🏆 A+级 - 优质人选" -> "A+级" """
+    if not isinstance(recommendation, str):
+        return None
+    if "高风险" in recommendation:
+        return "高风险"
+    match = _TIER_PATTERN.search(recommendation)
+    return match.group(0) if match else None
+
+
+def _to_db_value(value):
+    """把 numpy/pandas 标量转换为 sqlite3 可接受的 Python 类型"""
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _column_values(series):
+    """整列转换为 Python 值列表，缺失值转为 None"""
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+def _normalize_time(values, length):
+    """评估时间统一为文本，缺失时使用当前时间"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if values is None:
+        return [now] * length
+    values = pd.Series(values, dtype=object)
+    return values.where(values.notna(), now).astype(str).tolist()
+
+
+class HistoryStore:
+    """评估历史记录库，每次操作使用独立连接，可在 Streamlit 多个会话线程间共享"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """打开连接并在单个事务中执行，结束后提交并关闭"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- 写入 ---
+    def insert_records(self, app, records):
+        """写入一条或多条记录（字典列表）"""
+        return self.insert_frame(app, pd.DataFrame.from_records(list(records)))
+
+    def insert_frame(self, app, frame):
+        """批量写入结果表，单事务 executemany，返回写入行数"""
+        if frame is None or len(frame) == 0:
+            return 0
+        column_map = COLUMN_MAPS[app]
+        length = len(frame)
+        # float32 评分按两位小数还原后写入
+        frame = widen_frame(frame)
+
+        columns = {"app": [app] * length}
+        for source, target in column_map.items():
+            if source in frame.columns:
+                columns[target] = _column_values(frame[source])
+
+        if "tier" not in columns and "recommendation" in columns:
+            columns["tier"] = [tier_from_recommendation(v) for v in columns["recommendation"]]
+
+        # 单个评估只有评估日期，批量评估只有评估时间，按优先级合并
+        evaluated_at = None
+        for column in TIME_COLUMNS:
+            if column in frame.columns:
+                values = frame[column].astype(object)
+                evaluated_at = values if evaluated_at is None else evaluated_at.where(evaluated_at.notna(), values)
+        columns["evaluated_at"] = _normalize_time(
+            evaluated_at.tolist() if evaluated_at is not None else None, length)
+
+        extra_columns = [c for c in frame.columns if c not in column_map and c not in TIME_COLUMNS]
+        if extra_columns:
+            extra_records = frame[extra_columns].to_dict("records")
+            columns["extra"] = [
+                json.dumps({k: _to_db_value(v) for k, v in record.items()}, ensure_ascii=False)
+                for record in extra_records
+            ]
+
+        names = list(columns)
+        sql = f"INSERT INTO evaluations ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        with self._connect() as conn:
+            conn.executemany(sql, zip(*(columns[name] for name in names)))
+        return length
+
+    def clear(self, app=None):
+        with self._connect() as conn:
+            if app is None:
+                conn.execute("DELETE FROM evaluations")
+            else:
+                conn.execute("DELETE FROM evaluations WHERE app = ?", (app,))
+
+    # --- 查询 ---
+    @staticmethod
+    def _where(app=None, nickname=None, min_score=None, max_score=None, tiers=None,
+               date_from=None, date_to=None):
+        clauses, params = [], []
+        if app:
+            clauses.append("app = ?")
+            params.append(app)
+        if nickname:
+            clauses.append("nickname LIKE ?")
+            params.append(f"%{nickname}%")
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("score <= ?")
+            params.append(max_score)
+        if tiers:
+            clauses.append(f"tier IN ({', '.join('?' * len(tiers))})")
+            params.extend(tiers)
+        if date_from:
+            clauses.append("evaluated_at >= ?")
+            params.append(str(date_from))
+        if date_to:
+            # 结束日期包含当天全部记录
+            clauses.append("evaluated_at < ?")
+            params.append(f"{date_to}~")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM evaluations{where}", params).fetchone()[0]
+
+    def summary(self, high_score=4.0, **filters):
+        """返回 (记录数, 平均评分, 优质达人数)"""
+        where, params = self._where(**filters)
+        sql = f"SELECT COUNT(*), AVG(score), SUM(score >= ?) FROM evaluations{where}"
+        with self._connect() as conn:
+            total, avg_score, high_quality = conn.execute(sql, [high_score] + params).fetchone()
+        return total, avg_score, high_quality or 0
+
+    def query(self, order_by="evaluated_at", descending=True, limit=50, offset=0, **filters):
+        """按条件分页查询，返回 DataFrame（数据库字段名）"""
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {order_by}")
+        where, params = self._where(**filters)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(RESULT_COLUMNS)} FROM evaluations{where} "
+               f"ORDER BY {order_by} {direction}, id {direction} LIMIT ? OFFSET ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [int(limit), int(offset)]).fetchall()
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+    def tiers(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT tier FROM evaluations WHERE tier IS NOT NULL ORDER BY tier").fetchall()
+        return [row[0] for row in rows]
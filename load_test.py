@@ -0,0 +1,496 @@
+"""
+多会话并发压测：在本地启动 v3.0 页面服务，模拟多位分析师同时使用
+
+一台 Streamlit 服务同时服务多位分析师时，少数人的批量上传会拖慢所有人的页面响应。本工具在本地启动
+modern_evaluator 服务，按浏览器使用的 WebSocket 协议模拟 N 个并发会话：每个会话按比例随机执行
+单个评估、批量上传评估和数据对比浏览，操作之间有随机的思考时间。对每个会话数统计：
+- 吞吐量：每秒完成的页面运行次数
+- 延迟：每次操作从发出请求到页面运行结束的耗时分位数（p50 / p95 / p99，并按操作分列）
+- 服务内存：空闲基线、峰值与平均每个会话增加的内存
+
+- 每个会话数使用一个新启动的服务进程，内存统计互不影响
+- 服务只监听 127.0.0.1，并关闭 XSRF 校验（模拟客户端不处理 XSRF cookie）
+- 模拟客户端与服务运行在同一台机器上，也会占用一部分 CPU；测试硬件容量时尽量在与生产相同的机器上运行
+- 服务内存从 /proc 读取，仅支持 Linux
+
+用法示例:
+    python load_test.py                              # 1 / 5 / 10 / 20 / 40 个会话，每档 30 秒
+    python load_test.py --sessions 10,40 --duration 60 --mix single=5,compare=4,batch=1
+    python load_test.py --upload-rows 100000 -o 本次结果.json
+    python load_test.py --p95-budget-ms 2000          # 任一档 p95 延迟超出时以非零状态退出
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+SEED = 20240901
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = "modern_evaluator.py"
+
+DEFAULT_SESSIONS = "1,5,10,20,40"
+DEFAULT_DURATION = 30
+DEFAULT_THINK_TIME = 1.0
+DEFAULT_MIX = "single=6,compare=3,batch=1"
+DEFAULT_UPLOAD_ROWS = 20_000
+# 各会话在开始后的这段时间内陆续连接，避免同时发起首次加载
+RAMP_UP = 2.0
+# 单次页面运行的等待上限（秒）
+RERUN_TIMEOUT = 600
+
+
+# --- 服务进程 ---
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid):
+    """进程当前的常驻内存（MB）；非 Linux 系统返回 None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class AppServer:
+    """本地启动的 Streamlit 服务；评估历史记录库写入临时目录"""
+
+    def __init__(self, script=APP_SCRIPT):
+        self.script = script
+        self.port = _free_port()
+        self.process = None
+        self._tempdir = tempfile.mkdtemp(prefix="redbook_load_")
+        atexit.register(shutil.rmtree, self._tempdir, ignore_errors=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout=60):
+        env = dict(os.environ, REDBOOK_HISTORY_DB=os.path.join(self._tempdir, "history.db"))
+        env.pop("REDBOOK_DIAGNOSTICS", None)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", self.script,
+             "--server.headless", "true",
+             "--server.address", "127.0.0.1",
+             "--server.port", str(self.port),
+             "--server.enableXsrfProtection", "false",
+             "--server.fileWatcherType", "none",
+             "--browser.gatherUsageStats", "false"],
+            cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        atexit.register(self.stop)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"服务启动失败:\n{self.process.stderr.read().decode(errors='replace')}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"服务在 {timeout} 秒内没有启动")
+
+    def rss_mb(self):
+        return rss_mb(self.process.pid)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+# --- 模拟会话 ---
+class MissingWidget(LookupError):
+    """本次页面运行中没有要操作的控件（标签改名或未显示）"""
+
+
+class SessionClient:
+    """一个模拟的浏览器会话：通过 WebSocket 发送重新运行请求，等到页面运行结束为止计时"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.ws = None
+        self.session_id = None
+        # 最近一次运行中出现的控件 {标签: (控件类型, 控件 ID)}
+        self.widgets = {}
+        # 已设置过的控件值，每次重新运行都随请求发送（与浏览器一致）
+        self.widget_states = {}
+        self.errors = []
+
+    async def connect(self):
+        from tornado.httpclient import HTTPRequest
+        from tornado.websocket import websocket_connect
+        url = self.base_url.replace("http://", "ws://") + "/_stcore/stream"
+        self.ws = await websocket_connect(HTTPRequest(url), subprotocols=["streamlit"], max_message_size=1 << 30)
+        return self
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _send(self, back_msg):
+        await self.ws.write_message(back_msg.SerializeToString(), binary=True)
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        raw = await asyncio.wait_for(self.ws.read_message(), RERUN_TIMEOUT)
+        if raw is None:
+            raise ConnectionError("服务关闭了连接")
+        msg = ForwardMsg()
+        msg.ParseFromString(raw)
+        return msg, len(raw)
+
+    async def rerun(self, triggers=()):
+        """发送一次重新运行请求，返回 (耗时秒数, 收到的字节数)"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        back_msg = BackMsg()
+        client_state = back_msg.rerun_script
+        client_state.SetInParent()
+        client_state.widget_states.widgets.extend(list(self.widget_states.values()) + list(triggers))
+
+        started = time.perf_counter()
+        await self._send(back_msg)
+        received = 0
+        widgets = {}
+        while True:
+            msg, size = await self._receive()
+            received += size
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                proto = getattr(element, element_type)
+                if element_type == "exception":
+                    self.errors.append(proto.message)
+                elif getattr(proto, "id", None) and hasattr(proto, "label"):
+                    widgets.setdefault(proto.label, (element_type, proto.id))
+            elif kind == "script_finished":
+                self.widgets = widgets
+                return time.perf_counter() - started, received
+
+    def _widget_id(self, label):
+        if label not in self.widgets:
+            raise MissingWidget(f"页面上没有控件「{label}」")
+        return self.widgets[label][1]
+
+    async def click(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return await self.rerun([WidgetState(id=self._widget_id(label), trigger_value=True)])
+
+    async def set_slider(self, label, *values):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        state = WidgetState(id=self._widget_id(label))
+        state.double_array_value.data.extend(float(value) for value in values)
+        self.widget_states[state.id] = state
+        return await self.rerun()
+
+    async def upload(self, label, name, data):
+        """上传文件：先向服务申请上传地址，HTTP PUT 文件内容，再随重新运行请求提交上传控件的状态"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        from tornado.httpclient import AsyncHTTPClient
+
+        widget_id = self._widget_id(label)
+        started = time.perf_counter()
+        request = BackMsg()
+        request.file_urls_request.request_id = uuid.uuid4().hex
+        request.file_urls_request.file_names.append(name)
+        request.file_urls_request.session_id = self.session_id
+        await self._send(request)
+        while True:
+            msg, _ = await self._receive()
+            if msg.WhichOneof("type") == "file_urls_response":
+                file_urls = msg.file_urls_response.file_urls[0]
+                break
+
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                f"Content-Type: text/csv\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        await AsyncHTTPClient().fetch(self.base_url + file_urls.upload_url, method="PUT", body=body,
+                                      headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                                      request_timeout=RERUN_TIMEOUT)
+
+        state = WidgetState(id=widget_id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id = file_urls.file_id
+        info.name = name
+        info.size = len(data)
+        info.file_urls.CopyFrom(file_urls)
+        self.widget_states[widget_id] = state
+        elapsed, received = await self.rerun()
+        return time.perf_counter() - started, received
+
+
+# --- 操作场景：每一步返回 (操作名, 耗时秒数, 收到的字节数) ---
+class UploadData:
+    """批量上传的测试 CSV；每次上传追加一行不同的达人，文件内容哈希不同，不会命中解析/评分缓存"""
+
+    def __init__(self, rows):
+        from synthetic_data import generate_pool
+        self.rows = rows
+        self.data = generate_pool(rows, seed=SEED).to_csv(index=False).encode("utf-8-sig")
+        first_row = self.data.split(b"\n", 2)[1]
+        self._row_tail = first_row[first_row.index(b","):]
+        self._count = 0
+
+    def next_file(self, session_no):
+        self._count += 1
+        name = f"压测会话{session_no}_{self._count}"
+        return f"{name}.csv", self.data + name.encode() + self._row_tail + b"\n"
+
+
+async def single_evaluation(client, rng, uploads, session_no):
+    yield ("切换模式", *await client.click("🎯 单个评估"))
+    yield ("单个评估", *await client.click("🎯 开始评估"))
+
+
+async def comparison_view(client, rng, uploads, session_no):
+    yield ("切换模式", *await client.click("📈 数据对比"))
+    if "散点图评分范围" in client.widgets:
+        low = round(float(rng.uniform(0, 3)), 1)
+        yield ("散点图缩放", *await client.set_slider("散点图评分范围", low, 5.0))
+    yield ("权重调整", *await client.set_slider("内容", int(rng.integers(1, 11)) * 5))
+
+
+async def batch_upload(client, rng, uploads, session_no):
+    yield ("切换模式", *await client.click("📊 批量评估"))
+    name, data = uploads.next_file(session_no)
+    yield ("上传文件", *await client.upload("选择数据文件", name, data))
+    yield ("批量评估", *await client.click("🚀 开始批量评估"))
+
+
+SCENARIOS = {
+    "single": single_evaluation,
+    "compare": comparison_view,
+    "batch": batch_upload,
+}
+
+
+def parse_mix(text):
+    """"single=6,compare=3,batch=1" -> {场景: 比例}"""
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"未知场景: {name}（可选: {', '.join(SCENARIOS)}）")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("场景比例之和必须为正数")
+    return mix
+
+
+async def run_session(session_no, base_url, deadline, mix, think_time, uploads, records):
+    """一个会话：首次加载后按比例随机选择场景，直到压测结束"""
+    rng = np.random.default_rng([SEED, session_no])
+    names = list(mix)
+    weights = np.array([mix[name] for name in names]) / sum(mix.values())
+    await asyncio.sleep(float(rng.uniform(0, RAMP_UP)))
+    client = await SessionClient(base_url).connect()
+    try:
+        records.append(("首次加载", *await client.rerun()))
+        while time.monotonic() < deadline:
+            name = names[rng.choice(len(names), p=weights)]
+            try:
+                async for step, elapsed, received in SCENARIOS[name](client, rng, uploads, session_no):
+                    records.append((step, elapsed, received))
+                    await asyncio.sleep(float(rng.exponential(think_time)))
+                    if time.monotonic() >= deadline:
+                        break
+            except MissingWidget as e:
+                # 找不到控件只是本场景这一步出错：记为错误，会话继续执行下一个场景
+                client.errors.append(f"{name}: {e}")
+                await asyncio.sleep(float(rng.exponential(think_time)))
+    finally:
+        client.close()
+    return client.errors
+
+
+async def _sample_memory(server, samples, stop):
+    while not stop.is_set():
+        rss = server.rss_mb()
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run_level(server, sessions, duration, mix, think_time, uploads):
+    # 预热：首次加载时导入评分模块、建立进程内缓存，之后的内存作为空闲基线
+    warmup = await SessionClient(server.url).connect()
+    await warmup.rerun()
+    warmup.close()
+    await asyncio.sleep(0.5)
+    idle = server.rss_mb()
+
+    records, samples = [], []
+    stop = asyncio.Event()
+    sampler = asyncio.ensure_future(_sample_memory(server, samples, stop))
+    started = time.monotonic()
+    deadline = started + duration
+    outcomes = await asyncio.gather(*[run_session(no, server.url, deadline, mix, think_time, uploads, records)
+                                      for no in range(sessions)], return_exceptions=True)
+    elapsed = time.monotonic() - started
+    stop.set()
+    await sampler
+
+    errors = []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors.append(f"{type(outcome).__name__}: {outcome}")
+        else:
+            errors.extend(outcome)
+    return records, elapsed, idle, samples, errors
+
+
+def _latency_summary(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {"count": len(values), "p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1),
+            "max_ms": round(max(values) * 1000, 1)}
+
+
+def run_level(sessions, duration, mix, think_time, uploads):
+    """用一个新启动的服务压测一档会话数，返回统计结果"""
+    server = AppServer().start()
+    try:
+        records, elapsed, idle, samples, errors = asyncio.run(
+            _run_level(server, sessions, duration, mix, think_time, uploads))
+    finally:
+        server.stop()
+
+    by_step = {}
+    for step, latency, _ in records:
+        by_step.setdefault(step, []).append(latency)
+    peak = max(samples) if samples else None
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 1),
+        "reruns": len(records),
+        "throughput_per_s": round(len(records) / elapsed, 2),
+        "latency": _latency_summary([latency for _, latency, _ in records]) if records else None,
+        "latency_by_step": {step: _latency_summary(values) for step, values in by_step.items()},
+        "received_mb": round(sum(received for _, _, received in records) / 1024 / 1024, 1),
+        "server_rss_mb": {
+            "idle": None if idle is None else round(idle, 1),
+            "peak": None if peak is None else round(peak, 1),
+            "per_session": None if peak is None or idle is None else round((peak - idle) / sessions, 1),
+        },
+        "errors": errors,
+    }
+
+
+# --- 报告 ---
+def _cell(value, fmt):
+    return "-" if value is None else format(value, fmt)
+
+
+def format_table(levels):
+    lines = [f"{'会话数':>6}{'页面运行':>10}{'吞吐量(次/秒)':>14}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"
+             f"{'错误':>6}{'空闲内存(MB)':>14}{'峰值内存(MB)':>14}{'每会话(MB)':>12}"]
+    for level in levels:
+        latency = level["latency"] or {}
+        memory = level["server_rss_mb"]
+        lines.append(f"{level['sessions']:>6}{level['reruns']:>10,}{level['throughput_per_s']:>14,.2f}"
+                     f"{_cell(latency.get('p50_ms'), ',.0f'):>10}{_cell(latency.get('p95_ms'), ',.0f'):>10}"
+                     f"{_cell(latency.get('p99_ms'), ',.0f'):>10}{len(level['errors']):>6}"
+                     f"{_cell(memory['idle'], ',.0f'):>14}{_cell(memory['peak'], ',.0f'):>14}"
+                     f"{_cell(memory['per_session'], ',.1f'):>12}")
+    return "\n".join(lines)
+
+
+def format_step_table(levels):
+    """各操作的 p95 延迟（ms）随会话数的变化"""
+    steps = []
+    for level in levels:
+        steps.extend(step for step in level["latency_by_step"] if step not in steps)
+    lines = [f"{'操作 p95(ms)':<14}" + "".join(f"{str(level['sessions']) + ' 会话':>12}" for level in levels)]
+    for step in steps:
+        cells = [_cell(level["latency_by_step"].get(step, {}).get("p95_ms"), ",.0f") for level in levels]
+        lines.append(f"{step:<14}" + "".join(f"{cell:>12}" for cell in cells))
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="v3.0 页面的多会话并发压测")
+    parser.add_argument("--sessions", default=DEFAULT_SESSIONS, help=f"并发会话数，逗号分隔（默认: {DEFAULT_SESSIONS}）")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help=f"每档会话数的压测时长（秒，默认: {DEFAULT_DURATION}）")
+    parser.add_argument("--think-time", type=float, default=DEFAULT_THINK_TIME,
+                        help=f"两次操作之间的平均思考时间（秒，指数分布，默认: {DEFAULT_THINK_TIME}）")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"单个评估 / 数据对比 / 批量上传的比例（默认: {DEFAULT_MIX}）")
+    parser.add_argument("--upload-rows", type=int, default=DEFAULT_UPLOAD_ROWS,
+                        help=f"批量上传文件的行数（默认: {DEFAULT_UPLOAD_ROWS}）")
+    parser.add_argument("--p95-budget-ms", type=float, help="任一档会话数的 p95 延迟超过该值时以非零状态退出")
+    parser.add_argument("-o", "--output", help="把本次结果写入 JSON 文件")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        sessions = [int(value) for value in args.sessions.split(",")]
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 2
+    if min(sessions) < 1 or args.duration <= 0 or args.think_time < 0 or args.upload_rows < 1:
+        print("会话数、压测时长与上传行数必须为正数，思考时间不能为负数", file=sys.stderr)
+        return 2
+
+    uploads = UploadData(args.upload_rows)
+    levels = []
+    for count in sessions:
+        print(f"压测 {count} 个会话（{args.duration:g} 秒）...", file=sys.stderr)
+        levels.append(run_level(count, args.duration, mix, args.think_time, uploads))
+
+    print(format_table(levels))
+    print()
+    print(format_step_table(levels))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "cpu_count": os.cpu_count(),
+                       "duration_s": args.duration, "think_time_s": args.think_time, "mix": mix,
+                       "upload_rows": args.upload_rows, "levels": levels}, f, ensure_ascii=False, indent=2)
+
+    failed = False
+    for level in levels:
+        for error in sorted(set(level["errors"]))[:3]:
+            print(f"❌ {level['sessions']} 个会话: {error}", file=sys.stderr)
+            failed = True
+        p95 = (level["latency"] or {}).get("p95_ms")
+        if args.p95_budget_ms is not None and p95 is not None and p95 > args.p95_budget_ms:
+            print(f"❌ {level['sessions']} 个会话: p95 延迟 {p95:,.0f} ms，超出预算 {args.p95_budget_ms:,.0f} ms",
+                  file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
+from functools import partial
+from batch_scoring import (INPUT_SCHEMA, LEVEL_LABELS, MODEL_VERSION, SCALAR_SCORERS as SCORERS, TIERS, VALIDATION_RULES,
+                           comprehensive_evaluation)
+from batch_io import (COMPRESSIONS, DEFAULT_CHUNKSIZE, FILE_FORMATS, UPLOAD_TYPES, SessionExport, count_rows,
+                      detect_format, export_filename, export_mime, iter_frame_chunks, iter_scored_chunks,
+                      iter_table_chunks, list_excel_sheets, read_table)
+from batch_progress import ProgressReporter
+from diagnostics import Tracer, enabled_by_default
+from result_charts import MAX_SCATTER_POINTS, follower_score_scatter, score_histogram
+from result_store import MODERN_RESULT_SCHEMA, ResultStore, memory_report
+from results_browser import ResultBrowser
+from history_db import APP_LABELS, DISPLAY_LABELS, HistoryStore
+from parallel_scoring import default_workers
+from reweighting import ScoredBatch, evaluate_scored_batch
+from upload_cache import UploadCache, content_hash, weights_key
+from validation import MAX_ERRORS_PER_COLUMN, ValidationReport
 
 # --- 页面基础设置 ---
 st.set_page_config(
@@ -14,8 +29,15 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# --- 性能诊断埋点（每个会话一个 Tracer，未启用时埋点开销可忽略）---
+if 'tracer' not in st.session_state:
+    st.session_state.tracer = Tracer(enabled=enabled_by_default())
+tracer = st.session_state.tracer
+tracer.begin_run(st.session_state.get("current_mode", "单个评估"))
+
 # 自定义CSS样式
-st.markdown("""
+with tracer.span("页面样式"):
+    st.markdown("""
 <style>
     /* 全局样式 */
     .main-header {
@@ -104,9 +126,29 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- 评估历史记录库（进程内共享一个实例）---
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+history_store = get_history_store()
+
+# --- 上传文件解析/评分结果缓存（按文件内容哈希，进程内共享）---
+@st.cache_resource
+def get_upload_cache():
+    return UploadCache()
+
+upload_cache = get_upload_cache()
+
 # --- 初始化Session State ---
 if 'evaluation_results' not in st.session_state:
-    st.session_state.evaluation_results = []
+    st.session_state.evaluation_results = ResultStore(MODERN_RESULT_SCHEMA)
+# 已写入结果的批量评估（上传缓存键），避免重复写入
+if 'recorded_batches' not in st.session_state:
+    st.session_state.recorded_batches = set()
+# 系统设置中"导出所有记录"生成的文件（按记录版本与格式判断是否过期）
+if 'records_export' not in st.session_state:
+    st.session_state.records_export = SessionExport()
 if 'current_mode' not in st.session_state:
     st.session_state.current_mode = "单个评估"
 if 'weights' not in st.session_state:
@@ -118,102 +160,52 @@ if 'weights' not in st.session_state:
         "growth": 0.15
     }
 
-# --- 核心评分函数（保持原有逻辑）---
+# --- 核心评分函数（阈值定义见 scoring_rules.MODERN_RULES）---
 
 # 1. 内容维度评分
 def score_content_focus(vertical_ratio):
     """内容垂类专注度评分 (>70%为优秀)"""
-    if vertical_ratio >= 0.8: return 5
-    if vertical_ratio >= 0.7: return 4
-    if vertical_ratio >= 0.5: return 3
-    if vertical_ratio >= 0.3: return 2
-    return 1
+    return SCORERS["content_focus"](vertical_ratio)
 
 def score_viral_rate(viral_ratio):
     """爆文率评分 (>10%为优秀)"""
-    if viral_ratio >= 0.15: return 5
-    if viral_ratio >= 0.1: return 4
-    if viral_ratio >= 0.05: return 3
-    if viral_ratio >= 0.02: return 2
-    return 1
+    return SCORERS["viral_rate"](viral_ratio)
 
 def score_completion_rate(video_ratio, completion_rate):
     """视频完播率评分"""
-    if video_ratio >= 0.5 and completion_rate >= 0.4: return 5
-    if video_ratio >= 0.5 and completion_rate >= 0.3: return 4
-    if video_ratio >= 0.3 and completion_rate >= 0.25: return 3
-    if completion_rate >= 0.2: return 2
-    return 1
+    return SCORERS["completion_rate"](video_ratio, completion_rate)
 
 # 2. 数据维度评分
 def score_cpe(cpe):
     """CPE评分 (低成本高价值)"""
-    if cpe <= 8: return 5
-    if cpe <= 15: return 4
-    if cpe <= 25: return 3
-    if cpe <= 40: return 2
-    return 1
+    return SCORERS["cpe"](cpe)
 
 def score_cpm(cpm):
     """CPM评分"""
-    if cpm <= 100: return 5
-    if cpm <= 200: return 4
-    if cpm <= 350: return 3
-    if cpm <= 500: return 2
-    return 1
+    return SCORERS["cpm"](cpm)
 
 def score_interaction_health(like_ratio, collect_ratio, comment_ratio):
     """互动健康度评分"""
-    score = 0
-    # 收藏占比评分 (>25%为优秀)
-    if collect_ratio >= 0.25: score += 2
-    elif collect_ratio >= 0.15: score += 1.5
-    elif collect_ratio >= 0.1: score += 1
-    
-    # 评论占比评分 (5%-15%为健康)
-    if 0.05 <= comment_ratio <= 0.15: score += 2
-    elif 0.03 <= comment_ratio <= 0.2: score += 1.5
-    elif comment_ratio >= 0.03: score += 1
-    
-    # 整体健康度
-    if score >= 3.5: return 5
-    if score >= 2.5: return 4
-    if score >= 1.5: return 3
-    if score >= 0.5: return 2
-    return 1
+    # 收藏占比得分 + 评论占比得分，再按总分分档
+    score = SCORERS["collect_share"](collect_ratio) + SCORERS["comment_share"](comment_ratio)
+    return SCORERS["interaction_health"](score)
 
 def score_real_interaction(real_ratio):
     """真实互动率评分 (>80%为优秀)"""
-    if real_ratio >= 0.9: return 5
-    if real_ratio >= 0.8: return 4
-    if real_ratio >= 0.7: return 3
-    if real_ratio >= 0.6: return 2
-    return 1
+    return SCORERS["real_interaction"](real_ratio)
 
 def score_fan_activity(activity_ratio):
     """粉丝活跃度评分 (>90%为优秀)"""
-    if activity_ratio >= 0.95: return 5
-    if activity_ratio >= 0.9: return 4
-    if activity_ratio >= 0.85: return 3
-    if activity_ratio >= 0.8: return 2
-    return 1
+    return SCORERS["fan_activity"](activity_ratio)
 
 def score_data_stability(stability_coefficient):
     """数据稳定性评分"""
-    if stability_coefficient <= 0.3: return 5
-    if stability_coefficient <= 0.5: return 4
-    if stability_coefficient <= 0.8: return 3
-    if stability_coefficient <= 1.2: return 2
-    return 1
+    return SCORERS["data_stability"](stability_coefficient)
 
 # 3. 粉丝维度评分
 def score_audience_match(audience_match):
     """粉丝画像匹配度评分"""
-    if audience_match >= 0.8: return 5
-    if audience_match >= 0.7: return 4
-    if audience_match >= 0.6: return 3
-    if audience_match >= 0.5: return 2
-    return 1
+    return SCORERS["audience_match"](audience_match)
 
 def score_fan_quality(real_interaction, fan_activity):
     """粉丝质量综合评分"""
@@ -224,68 +216,108 @@ def score_fan_quality(real_interaction, fan_activity):
 # 4. 商业维度评分
 def score_brand_level(high_end_ratio):
     """品牌层级评分"""
-    if high_end_ratio >= 0.6: return 5
-    if high_end_ratio >= 0.4: return 4
-    if high_end_ratio >= 0.25: return 3
-    if high_end_ratio >= 0.15: return 2
-    return 1
+    return SCORERS["brand_level"](high_end_ratio)
 
 def score_commercial_balance(commercial_ratio):
     """商业化比例评分 (<30%为优秀)"""
-    if commercial_ratio <= 0.15: return 5
-    if commercial_ratio <= 0.3: return 4
-    if commercial_ratio <= 0.45: return 3
-    if commercial_ratio <= 0.6: return 2
-    return 1
+    return SCORERS["commercial_balance"](commercial_ratio)
 
 # 5. 成长性维度评分
 def score_growth_trend(growth_trend):
     """增长趋势评分"""
-    trend_scores = {
-        "平稳上扬": 5,
-        "缓慢增长": 3,
-        "波动增长": 2,
-        "停滞": 1,
-        "异常陡增": 1
-    }
-    return trend_scores.get(growth_trend, 1)
+    return SCORERS["growth_trend"](growth_trend)
 
 def score_fan_source(search_ratio, recommend_ratio):
     """粉丝来源评分 (搜索+推荐占比高为优秀)"""
-    total_quality_ratio = search_ratio + recommend_ratio
-    if total_quality_ratio >= 0.7: return 5
-    if total_quality_ratio >= 0.5: return 4
-    if total_quality_ratio >= 0.3: return 3
-    if total_quality_ratio >= 0.15: return 2
-    return 1
+    return SCORERS["fan_source"](search_ratio + recommend_ratio)
 
 def score_traffic_quality(search_ratio, recommend_ratio):
     """流量来源质量评分 (兼容性函数)"""
     return score_fan_source(search_ratio, recommend_ratio)
 
-# --- 综合评估函数 ---
-def comprehensive_evaluation(scores_dict, weights_dict):
-    """计算综合评分"""
-    final_score = sum(scores_dict[key] * weights_dict[key] for key in scores_dict.keys())
-    return final_score
-
+# --- 综合评估函数（comprehensive_evaluation 定义见 batch_scoring，与批量评估共用）---
 def get_recommendation(final_score, has_risk=False):
-    """生成合作建议"""
-    if has_risk:
-        return "❌ 高风险 - 不建议合作"
-    
-    if final_score >= 4.5:
-        return "💎 S级 - 顶级人选，立即签约"
-    elif final_score >= 4.0:
-        return "🏆 A+级 - 优质人选，优先合作"
-    elif final_score >= 3.5:
-        return "✅ A级 - 良好人选，推荐合作"
-    elif final_score >= 3.0:
-        return "👍 B级 - 备选人选，考虑合作"
-    elif final_score >= 2.5:
-        return "⚠️ C级 - 谨慎考虑"
-    else:
-        return "❌ D级 - 不建议合作"
+    """生成合作建议（分档见 scoring_rules.MODERN_TIERS，与批量评估共用）"""
+    return TIERS.recommendation(final_score, has_risk)
+
+# --- 结果浏览：在服务端筛选、排序与分页，只把当前页发送到浏览器 ---
+# 流式评分时预览最新一块结果的行数
+STREAM_PREVIEW_ROWS = 50
+
+SORT_OPTIONS = {
+    "综合评分（高→低）": ("综合评分", True),
+    "综合评分（低→高）": ("综合评分", False),
+    "粉丝数（多→少）": ("粉丝数", True),
+    "粉丝数（少→多）": ("粉丝数", False),
+    "达人昵称": ("达人昵称", False),
+}
+
+def render_result_browser(browser, key, sort_options):
+    """结果表的筛选/排序/分页控件与当前页表格，返回当前页 DataFrame"""
+    with st.container(border=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            score_range = st.slider("综合评分范围", 0.0, 5.0, (0.0, 5.0), 0.1, key=f"{key}_score")
+            tiers = st.multiselect("评级", list(LEVEL_LABELS[::-1]), key=f"{key}_tiers")
+        with col2:
+            min_followers = st.number_input("粉丝数下限", min_value=0, value=0, step=1000, key=f"{key}_min_followers")
+            max_followers = st.number_input("粉丝数上限（0 为不限）", min_value=0, value=0, step=1000,
+                                            key=f"{key}_max_followers")
+        with col3:
+            nickname = st.text_input("达人昵称包含", placeholder="输入昵称关键字", key=f"{key}_nickname")
+            sort_label = st.selectbox("排序", list(sort_options), key=f"{key}_sort")
+        with col4:
+            page_size = st.selectbox("每页条数", [20, 50, 100, 200], index=1, key=f"{key}_page_size")
+            page_slot = st.empty()
+
+    filters = {
+        "score": (score_range[0] if score_range[0] > 0 else None, score_range[1] if score_range[1] < 5 else None),
+        "tiers": tiers,
+        "followers": (min_followers or None, max_followers or None),
+        "name": nickname.strip(),
+    }
+    if filters["score"] == (None, None):
+        filters["score"] = None
+    if filters["followers"] == (None, None):
+        filters["followers"] = None
+
+    total_pages = max(1, -(-browser.count(filters) // page_size))
+    # 筛选条件变化后页数可能变少，先把页码收回到有效范围内
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = total_pages
+    with page_slot:
+        page = st.number_input(f"页码（共 {total_pages:,} 页）", min_value=1, max_value=total_pages, value=1, step=1,
+                               key=f"{key}_page")
+
+    sort_by, descending = sort_options[sort_label]
+    with tracer.span("结果分页", key=key):
+        page_df, matched = browser.page(page, page_size, filters, sort_by, descending)
+    st.caption(f"共 {len(browser):,} 条，符合条件 {matched:,} 条，当前第 {page:,} / {total_pages:,} 页")
+    st.dataframe(page_df, width="stretch", hide_index=True)
+    return page_df
+
+def render_paged_table(browser, key, page_size=50):
+    """只分页、不筛选的表格（如校验错误表），返回当前页 DataFrame"""
+    total_pages = max(1, -(-len(browser) // page_size))
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = total_pages
+    page = st.number_input(f"页码（共 {total_pages:,} 页，每页 {page_size} 条）", min_value=1, max_value=total_pages,
+                           value=1, step=1, key=f"{key}_page")
+    page_df, _ = browser.page(page, page_size)
+    st.dataframe(page_df, width="stretch", hide_index=True)
+    return page_df
+
+def render_diagnostics(tracer):
+    """性能诊断面板：本次运行各阶段的耗时汇总，逐个 span 的记录写入诊断日志"""
+    run = tracer.last_run
+    with st.expander(f"🩺 性能诊断：{run['mode']} 第 {run['run']} 次运行，共 {run['total_ms']:,.0f} ms", expanded=False):
+        st.dataframe(run["summary"], width="stretch", hide_index=True, column_config={
+            "总耗时(ms)": st.column_config.NumberColumn(format="%.1f"),
+            "自身耗时(ms)": st.column_config.NumberColumn(format="%.1f"),
+            "最长(ms)": st.column_config.NumberColumn(format="%.1f"),
+            "占比": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1),
+        })
+        st.caption(f"自身耗时不含内层阶段；逐个阶段的记录追加写入 {tracer.log_path}（会话 {tracer.session_id}）")
 
 # --- 主页面标题 ---
 st.markdown("""
@@ -517,24 +549,8 @@ if st.session_state.current_mode == "单个评估":
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
                 # 获取评分等级和颜色
-                if final_score >= 4.5:
-                    level = "S级"
-                    score_class = "score-s"
-                elif final_score >= 4.0:
-                    level = "A+级"
-                    score_class = "score-a"
-                elif final_score >= 3.5:
-                    level = "A级"
-                    score_class = "score-b"
-                elif final_score >= 3.0:
-                    level = "B级"
-                    score_class = "score-c"
-                elif final_score >= 2.5:
-                    level = "C级"
-                    score_class = "score-d"
-                else:
-                    level = "D级"
-                    score_class = "score-d"
+                level = TIERS.level(final_score)
+                score_class = TIERS.style(final_score)
                 
                 st.markdown(f"""
                 <div class="metric-card">
@@ -596,7 +612,8 @@ if st.session_state.current_mode == "单个评估":
                 height=500
             )
             
-            st.plotly_chart(fig, width="stretch")
+            with tracer.span("雷达图"):
+                st.plotly_chart(fig, width="stretch")
             
             # 保存评估结果
             result = {
@@ -613,7 +630,10 @@ if st.session_state.current_mode == "单个评估":
                 "成长性维度": growth_score
             }
             
-            st.session_state.evaluation_results.append(result)
+            with tracer.span("写入会话结果", rows=1):
+                st.session_state.evaluation_results.append(result)
+            with tracer.span("写入历史记录库", rows=1):
+                history_store.insert_records("modern", [result])
 
 elif st.session_state.current_mode == "批量评估":
     st.markdown("### 📊 批量达人评估")
@@ -624,9 +644,9 @@ elif st.session_state.current_mode == "批量评估":
         st.markdown("#### 📁 上传评估数据")
         
         uploaded_file = st.file_uploader(
-            "选择CSV文件",
-            type=['csv'],
-            help="请上传包含达人数据的CSV文件"
+            "选择数据文件",
+            type=UPLOAD_TYPES,
+            help="请上传包含达人数据的CSV、Excel、Parquet或Arrow IPC（Feather）文件；只读取评分需要的列"
         )
         
         # 数据模板下载
@@ -653,8 +673,9 @@ elif st.session_state.current_mode == "批量评估":
             "推荐占比": [0.4, 0.45],
             "负面舆情": [False, False]
         }
-        template_df = pd.DataFrame(template_data)
-        template_csv = template_df.to_csv(index=False, encoding='utf-8-sig')
+        with tracer.span("生成数据模板"):
+            template_df = pd.DataFrame(template_data)
+            template_csv = template_df.to_csv(index=False, encoding='utf-8-sig')
         
         st.download_button(
             label="📥 下载批量评估模板",
@@ -666,147 +687,307 @@ elif st.session_state.current_mode == "批量评估":
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
-                st.success(f"成功上传文件，包含 {len(df)} 个达人数据")
+                scored_batch = None
+                upload_format = detect_format(uploaded_file.name)
+                upload_hash = content_hash(uploaded_file)
+                sheet = None
+                if upload_format == "xlsx":
+                    sheets = list_excel_sheets(uploaded_file)
+                    sheet = st.selectbox("选择工作表", sheets) if len(sheets) > 1 else sheets[0]
+                # 同一文件（工作表）、相同权重与评分模型的评估结果直接从缓存读取
+                score_key = ("modern", upload_hash, sheet, weights_key(st.session_state.weights), MODEL_VERSION)
                 
-                # 显示数据预览
-                st.markdown("#### 📋 数据预览")
-                st.dataframe(df.head(), width="stretch")
+                # 大文件默认使用流式评估：分块解析、逐块评分并实时刷新结果
+                stream_mode = st.toggle(
+                    "⚡ 流式评估（分块解析，边读边出结果）",
+                    value=uploaded_file.size >= 20 * 1024 * 1024,
+                    help="不必等待整个文件解析完成，每评估完一块数据就刷新结果表和评级分布"
+                )
+                workers = st.number_input(
+                    "🧮 并行评分进程数",
+                    min_value=1,
+                    max_value=default_workers(),
+                    value=1,
+                    help=f"本机共 {default_workers()} 个CPU核心；数据量大（数十万行以上）时增加进程数可缩短评分时间"
+                )
+                # 多进程时每块数据按进程数放大，保证每个进程分到足够的行数
+                chunksize = DEFAULT_CHUNKSIZE * workers
+                evaluate = partial(evaluate_scored_batch, workers=workers)
                 
-                if st.button("🚀 开始批量评估", type="primary"):
-                    # 批量评估逻辑
-                    progress_bar = st.progress(0)
-                    results = []
+                if stream_mode:
+                    st.success(f"成功上传文件，大小 {uploaded_file.size / 1024 / 1024:.1f} MB")
                     
-                    for i, row in df.iterrows():
-                        # 实际评估逻辑
-                        try:
-                            # 从CSV读取数据（需要根据实际列名调整）
-                            vertical_ratio = row.get('垂类专注度', 0.75)
-                            viral_ratio = row.get('爆文率', 0.12)
-                            video_ratio = row.get('视频占比', 0.6)
-                            completion_rate = row.get('完播率', 0.35)
-                            cpe = row.get('CPE', 15.0)
-                            cpm = row.get('CPM', 200.0)
-                            collect_ratio = row.get('收藏占比', 0.3)
-                            comment_ratio = row.get('评论占比', 0.08)
-                            stability = row.get('数据稳定性', 0.6)
-                            audience_match = row.get('粉丝画像重合度', 0.75)
-                            real_interaction = row.get('真实互动率', 0.85)
-                            fan_activity = row.get('粉丝活跃度', 0.92)
-                            high_end_ratio = row.get('高端品牌占比', 0.4)
-                            commercial_ratio = row.get('商业化比例', 0.25)
-                            growth_trend = row.get('增长趋势', '平稳上扬')
-                            search_ratio = row.get('搜索占比', 0.3)
-                            recommend_ratio = row.get('推荐占比', 0.4)
-                            has_negative = row.get('负面舆情', False)
-                            
-                            # 计算各维度分数
-                            content_score = (
-                                score_content_focus(vertical_ratio) * 0.4 +
-                                score_viral_rate(viral_ratio) * 0.3 +
-                                score_completion_rate(video_ratio, completion_rate) * 0.3
-                            )
-                            
-                            data_score = (
-                                score_cpe(cpe) * 0.25 +
-                                score_cpm(cpm) * 0.25 +
-                                score_interaction_health(0, collect_ratio, comment_ratio) * 0.25 +
-                                score_data_stability(stability) * 0.25
-                            )
-                            
-                            audience_score = (
-                                score_audience_match(audience_match) * 0.4 +
-                                score_real_interaction(real_interaction) * 0.3 +
-                                score_fan_activity(fan_activity) * 0.3
-                            )
-                            
-                            business_score = (
-                                score_brand_level(high_end_ratio) * 0.6 +
-                                score_commercial_balance(commercial_ratio) * 0.4
-                            )
-                            
-                            growth_score = (
-                                score_growth_trend(growth_trend) * 0.6 +
-                                score_fan_source(search_ratio, recommend_ratio) * 0.4
-                            )
-                            
-                            scores = {
-                                "content": content_score,
-                                "data": data_score,
-                                "audience": audience_score,
-                                "business": business_score,
-                                "growth": growth_score
-                            }
-                            
-                            final_score = comprehensive_evaluation(scores, st.session_state.weights)
-                            recommendation = get_recommendation(final_score, has_negative)
-                            
-                            # 获取评级
-                            if final_score >= 4.5:
-                                level = "S级"
-                            elif final_score >= 4.0:
-                                level = "A+级"
-                            elif final_score >= 3.5:
-                                level = "A级"
-                            elif final_score >= 3.0:
-                                level = "B级"
-                            elif final_score >= 2.5:
-                                level = "C级"
-                            else:
-                                level = "D级"
-                                
-                        except Exception as e:
-                            # 如果数据不完整，使用默认评估
-                            final_score = 3.0
-                            level = "B级"
-                            recommendation = "⚠️ 数据不完整，建议补充信息后重新评估"
+                    run_batch = st.button("🚀 开始批量评估", type="primary")
+                    cached = upload_cache.get(score_key) if run_batch else None
+                    scored_batch = ScoredBatch.from_cache_entry(cached) if cached is not None else None
+                    
+                    if run_batch and scored_batch is None:
+                        reporter = ProgressReporter(st.progress(0), min_interval=0.5)
+                        level_box = st.empty()
+                        table_box = st.empty()
                         
-                        progress_bar.progress((i + 1) / len(df))
+                        # Parquet/Arrow/Excel 从文件元数据读取总行数，按行数显示进度
+                        uploaded_file.seek(0)
+                        with tracer.span("统计行数", format=upload_format):
+                            reporter.total_rows = count_rows(uploaded_file, upload_format, sheet)
+                        uploaded_file.seek(0)
+                        scored_parts = []
+                        level_counts = pd.Series(0, index=LEVEL_LABELS[::-1])
                         
-                        result = {
-                            "达人昵称": row.get("达人昵称", f"达人{i+1}"),
-                            "粉丝数": row.get("粉丝数", 0),
-                            "综合评分": round(final_score, 2),
-                            "评级": level,
-                            "建议": recommendation,
-                            "内容维度": round(content_score, 2) if 'content_score' in locals() else 0,
-                            "数据维度": round(data_score, 2) if 'data_score' in locals() else 0,
-                            "粉丝维度": round(audience_score, 2) if 'audience_score' in locals() else 0,
-                            "商业维度": round(business_score, 2) if 'business_score' in locals() else 0,
-                            "成长性维度": round(growth_score, 2) if 'growth_score' in locals() else 0,
-                            "评估时间": datetime.now().strftime("%Y-%m-%d %H:%M")
-                        }
-                        results.append(result)
+                        # 逐块校验，只有通过校验的行参与评分；读取、校验、评分各层逐块计时
+                        validation = ValidationReport(VALIDATION_RULES)
+                        chunks = tracer.traced("解析文件", iter_table_chunks(uploaded_file, upload_format, chunksize,
+                                                                          columns=INPUT_SCHEMA, sheet=sheet),
+                                               format=upload_format)
+                        chunks = tracer.traced("数据校验", validation.filter(chunks))
+                        for part in tracer.traced("评分", iter_scored_chunks(chunks, st.session_state.weights,
+                                                                           evaluate=evaluate), workers=workers):
+                            scored_parts.append(part)
+                            rows_done = validation.rows_checked
+                            level_counts = level_counts.add(part.results["评级"].value_counts(), fill_value=0)
+                            
+                            # CSV 按已读取的字节数估算进度；界面按节流间隔刷新，只展示最新一块结果的前几行
+                            fraction = uploaded_file.tell() / max(uploaded_file.size, 1) if upload_format == "csv" else None
+                            with tracer.span("进度刷新"):
+                                if reporter.update(rows_done, fraction=fraction, force=len(scored_parts) == 1):
+                                    level_box.dataframe(level_counts.astype(int).to_frame("人数").T, width="stretch")
+                                    table_box.dataframe(part.results.head(STREAM_PREVIEW_ROWS), width="stretch")
                         
-                        # 同时保存到session_state
-                        st.session_state.evaluation_results.append(result)
+                        reporter.finish(validation.rows_checked)
+                        # 完整结果在下方统一展示
+                        level_box.empty()
+                        table_box.empty()
+                        if scored_parts:
+                            with tracer.span("合并结果", chunks=len(scored_parts)):
+                                scored_batch = ScoredBatch.concat(scored_parts, validation)
+                        else:
+                            scored_batch = evaluate_scored_batch(pd.DataFrame(), st.session_state.weights)
+                            scored_batch.validation = validation
+                        upload_cache.put(score_key, scored_batch.cache_entry())
+                    elif run_batch:
+                        st.info("⚡ 该文件已按相同权重评估过，直接使用缓存的评估结果")
+                
+                else:
+                    # 每次重新运行都会执行到这里，同一文件只解析一次
+                    uploaded_file.seek(0)
+                    with tracer.span("解析文件", format=upload_format):
+                        df = upload_cache.get_or_compute(("parsed", "modern", upload_format, sheet, upload_hash),
+                                                         lambda: read_table(uploaded_file, upload_format, INPUT_SCHEMA,
+                                                                            sheet))
+                    st.success(f"成功上传文件，包含 {len(df)} 个达人数据")
                     
-                    # 显示批量结果
-                    st.markdown("#### 🎯 批量评估结果")
-                    results_df = pd.DataFrame(results)
-                    st.dataframe(results_df, width="stretch")
+                    # 显示数据预览
+                    st.markdown("#### 📋 数据预览")
+                    st.dataframe(df.head(), width="stretch")
+                    # 表头别名与百分数列已统一为评分使用的列名和小数
+                    column_mapping = df.attrs.get("column_mapping")
+                    if column_mapping is not None and column_mapping.describe():
+                        st.caption(f"🔁 {column_mapping.describe()}")
                     
-                    # 导出功能
-                    csv = results_df.to_csv(index=False, encoding='utf-8-sig')
+                    run_batch = st.button("🚀 开始批量评估", type="primary")
+                    cached = upload_cache.get(score_key) if run_batch else None
+                    scored_batch = ScoredBatch.from_cache_entry(cached) if cached is not None else None
+                    
+                    if run_batch and scored_batch is None:
+                        # 批量评估逻辑：按块列式评分，进度按节流间隔刷新
+                        reporter = ProgressReporter(st.progress(0), total_rows=len(df), min_interval=0.5)
+                        scored_parts = []
+                        validation = ValidationReport(VALIDATION_RULES)
+                        chunks = tracer.traced("数据校验", validation.filter(iter_frame_chunks(df, chunksize)))
+                        for part in tracer.traced("评分", iter_scored_chunks(chunks, st.session_state.weights,
+                                                                           evaluate=evaluate), workers=workers):
+                            scored_parts.append(part)
+                            with tracer.span("进度刷新"):
+                                reporter.update(validation.rows_checked)
+                        reporter.finish(validation.rows_checked)
+                        if scored_parts:
+                            with tracer.span("合并结果", chunks=len(scored_parts)):
+                                scored_batch = ScoredBatch.concat(scored_parts, validation)
+                        else:
+                            scored_batch = evaluate_scored_batch(pd.DataFrame(), st.session_state.weights)
+                            scored_batch.validation = validation
+                        upload_cache.put(score_key, scored_batch.cache_entry())
+                    elif run_batch:
+                        st.info("⚡ 该文件已按相同权重评估过，直接使用缓存的评估结果")
+                
+                if scored_batch is not None:
+                    # 评估完成后一次性批量写入session_state，并保留维度得分矩阵供调整权重时即时重算
+                    st.session_state.batch_result = scored_batch
+                    # 同一文件只记录一次，重复点击评估或换权重重新评估不会重复写入会话结果与历史记录库
+                    history_key = ("modern", upload_hash, sheet, MODEL_VERSION)
+                    if history_key not in st.session_state.recorded_batches:
+                        st.session_state.recorded_batches.add(history_key)
+                        rows = len(scored_batch.results)
+                        with tracer.span("写入会话结果", rows=rows):
+                            st.session_state.evaluation_results.extend(scored_batch.results)
+                        with tracer.span("写入历史记录库", rows=rows):
+                            history_store.insert_frame("modern", scored_batch.results)
+            
+            except Exception as e:
+                st.error(f"文件处理出错: {str(e)}")
+        
+        # 最近一次批量结果：调整上方权重后直接按维度得分矩阵重算，无需重新上传
+        if st.session_state.get("batch_result") is not None:
+            with tracer.span("按权重重算"):
+                results_df = st.session_state.batch_result.apply_weights(st.session_state.weights)
+            
+            st.markdown("#### 🎯 批量评估结果")
+            st.caption("调整「⚖️ 快速权重调整」后，综合评分、评级与排名按新权重即时重算")
+            level_counts = results_df["评级"].value_counts().reindex(LEVEL_LABELS[::-1], fill_value=0)
+            st.dataframe(level_counts.astype(int).to_frame("人数").T, width="stretch")
+            render_result_browser(st.session_state.batch_result.browser(st.session_state.weights), "batch_browser",
+                                  {"排名": ("排名", False), **SORT_OPTIONS})
+            
+            # 结果表使用紧凑列类型（分类列、float32 评分、Int32 粉丝数），按列列出内存占用
+            with tracer.span("内存统计"):
+                memory = memory_report(results_df)
+            with st.expander(f"🧮 结果表内存占用: {memory['内存(MB)'].iloc[-1]:,.2f} MB"
+                             f"（每行约 {memory.attrs['bytes_per_row']:.0f} 字节）", expanded=False):
+                st.dataframe(memory, width="stretch", hide_index=True)
+            
+            # 未通过数据校验的行不参与评分，列出逐项错误供修改后重新上传
+            validation = st.session_state.batch_result.validation
+            if validation is not None and validation.rows_invalid:
+                st.warning(f"⚠️ {validation.rows_invalid:,} 行数据未通过校验，未参与评分")
+                with st.expander("🔍 查看校验错误", expanded=False):
+                    render_paged_table(ResultBrowser(validation.errors), "batch_errors")
+                    if validation.errors_suppressed:
+                        st.caption(f"每列最多列出 {MAX_ERRORS_PER_COLUMN:,} 条错误，另有 "
+                                   f"{validation.errors_suppressed:,} 条未列出")
+                    with tracer.span("导出校验错误", rows=len(validation.errors)):
+                        errors_csv = validation.errors.to_csv(index=False).encode("utf-8-sig")
                     st.download_button(
-                        label="📥 下载评估结果",
-                        data=csv,
-                        file_name=f"批量评估结果_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        label="📥 下载校验错误",
+                        data=errors_csv,
+                        file_name=f"校验错误_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                         mime="text/csv"
                     )
             
-            except Exception as e:
-                st.error(f"文件处理出错: {str(e)}")
+            # 导出功能：结果分块写入临时文件（Excel 另含汇总与校验错误工作表）；
+            # 导出与行数成正比，只在点击时生成，避免拖动权重时每次都重新导出；同一权重的文件保留到权重变化
+            col1, col2 = st.columns(2)
+            with col1:
+                export_format = st.selectbox("导出格式", list(FILE_FORMATS), format_func=lambda f: FILE_FORMATS[f]["label"],
+                                             key="batch_export_format")
+            with col2:
+                compression = st.selectbox("压缩", [None] + list(COMPRESSIONS), key="batch_export_compression",
+                                           format_func=lambda c: "不压缩" if c is None else COMPRESSIONS[c]["label"],
+                                           disabled=export_format != "csv", help="仅 CSV 导出支持压缩")
+            if export_format != "csv":
+                compression = None
+            batch_path = st.session_state.batch_result.existing_export(st.session_state.weights, export_format,
+                                                                       compression)
+            if batch_path is None and st.button("📦 生成下载文件"):
+                with tracer.span("导出文件", format=export_format, rows=len(results_df)):
+                    batch_path = st.session_state.batch_result.export_file(st.session_state.weights, export_format,
+                                                                           compression, MODERN_RESULT_SCHEMA)
+            if batch_path is not None:
+                with open(batch_path, "rb") as f:
+                    st.download_button(
+                        label="📥 下载评估结果",
+                        data=f,
+                        file_name=export_filename(f"批量评估结果_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                                                  export_format, compression),
+                        mime=export_mime(export_format, compression)
+                    )
         
         st.markdown('</div>', unsafe_allow_html=True)
 
 elif st.session_state.current_mode == "数据对比":
     st.markdown("### 📈 达人数据对比分析")
     
-    if st.session_state.evaluation_results:
+    data_source = st.radio("📂 数据来源", ["本次会话", "历史记录库"], horizontal=True,
+                           help="历史记录库保存了所有分析师的评估记录，按条件分页查询")
+    
+    if data_source == "历史记录库":
+        # 筛选条件
+        with st.container(border=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                app_filter = st.selectbox("评估系统", ["全部"] + list(APP_LABELS),
+                                          format_func=lambda app: APP_LABELS.get(app, app))
+                nickname_filter = st.text_input("达人昵称包含", placeholder="输入昵称关键字")
+            with col2:
+                score_range = st.slider("综合评分范围", 0.0, 5.0, (0.0, 5.0), 0.1)
+                tier_filter = st.multiselect("评级", history_store.tiers())
+            with col3:
+                date_range = st.date_input("评估日期范围", value=())
+                sort_col, order_col = st.columns(2)
+                with sort_col:
+                    order_by = st.selectbox("排序字段", ["evaluated_at", "score", "followers", "nickname"],
+                                            format_func=DISPLAY_LABELS.get)
+                with order_col:
+                    descending = st.selectbox("排序方式", ["降序", "升序"]) == "降序"
+        
+        filters = {
+            "app": None if app_filter == "全部" else app_filter,
+            "nickname": nickname_filter.strip() or None,
+            "min_score": score_range[0] if score_range[0] > 0 else None,
+            "max_score": score_range[1] if score_range[1] < 5 else None,
+            "tiers": tier_filter or None,
+            "date_from": date_range[0] if len(date_range) == 2 else None,
+            "date_to": date_range[1] if len(date_range) == 2 else None,
+        }
+        
+        # 概览指标（数据库聚合，不加载明细）
+        with tracer.span("历史记录汇总"):
+            total, avg_score, high_quality = history_store.summary(**filters)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("匹配记录数", f"{total:,}")
+        with col2:
+            st.metric("平均评分", f"{avg_score:.2f}" if avg_score is not None else "-")
+        with col3:
+            st.metric("优质达人数", f"{high_quality:,}")
+        with col4:
+            st.metric("推荐合作率", f"{high_quality/total*100:.1f}%" if total else "0%")
+        
+        if total:
+            page_col1, page_col2 = st.columns([1, 3])
+            with page_col1:
+                page_size = st.selectbox("每页条数", [20, 50, 100, 200], index=1)
+            total_pages = (total + page_size - 1) // page_size
+            with page_col2:
+                page = st.number_input(f"页码（共 {total_pages:,} 页）", min_value=1, max_value=total_pages, value=1, step=1)
+            
+            with tracer.span("历史记录查询"):
+                page_df = history_store.query(order_by=order_by, descending=descending,
+                                              limit=page_size, offset=(page - 1) * page_size, **filters)
+            page_df["app"] = page_df["app"].map(APP_LABELS)
+            page_df = page_df.drop(columns=["extra"]).rename(columns=DISPLAY_LABELS)
+            st.dataframe(page_df, width="stretch", hide_index=True)
+            
+            # 当前页达人多维度对比
+            comparable = page_df.dropna(subset=["内容维度"])
+            names_by_id = dict(zip(comparable["记录ID"], comparable["达人昵称"]))
+            selected_ids = st.multiselect(
+                "选择当前页的达人进行多维度对比",
+                options=list(names_by_id),
+                format_func=lambda record_id: f"{names_by_id[record_id]} (#{record_id})"
+            )
+            if len(selected_ids) > 1:
+                fig = go.Figure()
+                for _, data in comparable[comparable["记录ID"].isin(selected_ids)].iterrows():
+                    fig.add_trace(go.Scatterpolar(
+                        r=[data["内容维度"], data["数据维度"], data["粉丝维度"], data["商业维度"], data["成长性维度"]],
+                        theta=['内容维度', '数据维度', '粉丝维度', '商业维度', '成长性维度'],
+                        fill='toself',
+                        name=data["达人昵称"]
+                    ))
+                fig.update_layout(
+                    polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+                    showlegend=True,
+                    title="达人多维度对比",
+                    height=600
+                )
+                st.plotly_chart(fig, width="stretch")
+        else:
+            st.info("没有符合条件的历史记录")
+    
+    elif st.session_state.evaluation_results:
         # 添加概览统计
-        df_results = pd.DataFrame(st.session_state.evaluation_results)
+        with tracer.span("构建结果表", rows=len(st.session_state.evaluation_results)):
+            df_results = st.session_state.evaluation_results.to_frame()
         
         # 概览指标
         col1, col2, col3, col4 = st.columns(4)
@@ -815,7 +996,7 @@ elif st.session_state.current_mode == "数据对比":
         with col2:
             st.metric("平均评分", f"{df_results['综合评分'].mean():.2f}")
         with col3:
-            high_quality = len(df_results[df_results['综合评分'] >= 4.0])
+            high_quality = int((df_results['综合评分'] >= 4.0).sum())
             st.metric("优质达人数", high_quality)
         with col4:
             if len(df_results) > 0:
@@ -823,39 +1004,56 @@ elif st.session_state.current_mode == "数据对比":
             else:
                 st.metric("推荐合作率", "0%")
         
-        # 评分分布图
+        # 评分分布图：服务端分箱/降采样，图表数据量与记录数无关
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_hist = px.histogram(df_results, x='综合评分', nbins=20, 
-                                  title="评分分布直方图",
-                                  color_discrete_sequence=['#ff6b6b'])
-            fig_hist.update_layout(height=400)
-            st.plotly_chart(fig_hist, width="stretch")
+            with tracer.span("评分直方图"):
+                fig_hist = score_histogram(df_results['综合评分'], color='#ff6b6b')
+                fig_hist.update_layout(height=400)
+                st.plotly_chart(fig_hist, width="stretch")
         
         with col2:
-            fig_scatter = px.scatter(df_results, x='粉丝数', y='综合评分',
-                                   hover_data=['达人昵称'], title="粉丝数vs评分散点图",
-                                   color_discrete_sequence=['#4ecdc4'])
-            fig_scatter.update_layout(height=400)
-            st.plotly_chart(fig_scatter, width="stretch")
+            zoom_col1, zoom_col2, zoom_col3 = st.columns(3)
+            with zoom_col1:
+                zoom_score = st.slider("散点图评分范围", 0.0, 5.0, (0.0, 5.0), 0.1, key="scatter_score")
+            with zoom_col2:
+                zoom_min = st.number_input("散点图粉丝数下限", min_value=0, value=0, step=1000, key="scatter_min_followers")
+            with zoom_col3:
+                zoom_max = st.number_input("散点图粉丝数上限（0 为不限）", min_value=0, value=0, step=1000,
+                                           key="scatter_max_followers")
+            with tracer.span("粉丝数评分散点图"):
+                zoom_mask = st.session_state.evaluation_results.browser().filter_mask({
+                    "score": zoom_score if zoom_score != (0.0, 5.0) else None,
+                    "followers": (zoom_min or None, zoom_max or None) if zoom_min or zoom_max else None,
+                })
+                fig_scatter, points = follower_score_scatter(df_results, zoom_mask, color='#4ecdc4')
+                fig_scatter.update_layout(height=400)
+                st.plotly_chart(fig_scatter, width="stretch")
+            if points > MAX_SCATTER_POINTS:
+                st.caption(f"范围内共 {points:,} 人，超过 {MAX_SCATTER_POINTS:,} 人时显示密度分布；"
+                           "缩小评分或粉丝数范围可查看每位达人")
+        
+        # 评估记录明细：服务端筛选/排序/分页，只发送当前页
+        st.markdown("#### 📋 评估记录")
+        page_df = render_result_browser(st.session_state.evaluation_results.browser(), "session_browser",
+                                        {"保存顺序": (None, False), **SORT_OPTIONS})
         
         with st.container():
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             
-            # 选择要对比的达人
+            # 选择要对比的达人（当前页）
+            influencer_names = page_df["达人昵称"].dropna().unique().tolist()
             selected_influencers = st.multiselect(
-                "选择要对比的达人",
-                options=[result["达人昵称"] for result in st.session_state.evaluation_results],
-                default=[result["达人昵称"] for result in st.session_state.evaluation_results[:3]]
+                "选择当前页的达人进行对比",
+                options=influencer_names,
+                default=influencer_names[:3]
             )
             
             if selected_influencers:
                 # 筛选选中的达人数据
-                selected_data = [
-                    result for result in st.session_state.evaluation_results 
-                    if result["达人昵称"] in selected_influencers
-                ]
+                compare_df = page_df[page_df["达人昵称"].isin(selected_influencers)]
+                selected_data = compare_df.to_dict("records")
                 
                 # 对比图表
                 if len(selected_data) > 1:
@@ -891,7 +1089,6 @@ elif st.session_state.current_mode == "数据对比":
                 
                 # 对比表格
                 st.markdown("#### 📊 详细数据对比")
-                compare_df = pd.DataFrame(selected_data)
                 st.dataframe(compare_df, width="stretch")
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -952,6 +1149,18 @@ elif st.session_state.current_mode == "系统设置":
         
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # 性能诊断卡片
+    with st.container():
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.markdown("#### 🩺 性能诊断")
+        tracer.enabled = st.toggle(
+            "记录各阶段耗时",
+            value=tracer.enabled,
+            help="在页面底部显示本次运行中解析、评分、写入、导出等阶段的耗时，并追加写入诊断日志；从下一次操作开始生效"
+        )
+        st.caption(f"诊断日志: {tracer.log_path}（JSON Lines，每个阶段一行）")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
     # 数据管理卡片
     with st.container():
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
@@ -961,19 +1170,33 @@ elif st.session_state.current_mode == "系统设置":
         
         with col1:
             if st.button("🗑️ 清空评估记录", width="stretch"):
-                st.session_state.evaluation_results = []
+                st.session_state.evaluation_results.clear()
+                st.session_state.recorded_batches.clear()
                 st.success("评估记录已清空")
         
         with col2:
             if st.session_state.evaluation_results:
-                csv_data = pd.DataFrame(st.session_state.evaluation_results).to_csv(index=False, encoding='utf-8-sig')
-                st.download_button(
-                    label="📥 导出所有记录",
-                    data=csv_data,
-                    file_name=f"评估记录_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
-                    width="stretch"
-                )
+                records_format = st.selectbox("导出格式", list(FILE_FORMATS),
+                                              format_func=lambda f: FILE_FORMATS[f]["label"], key="records_export_format")
+                # 导出全部记录与记录数成正比，只在点击时生成；生成的临时文件按记录版本保留，
+                # 记录不变时之后的重新运行直接从文件提供下载，记录变化后旧文件随之删除
+                records = st.session_state.evaluation_results
+                export_key = (records.version, records_format)
+                records_path = st.session_state.records_export.existing(export_key)
+                if records_path is None and st.button("📦 生成下载文件", width="stretch"):
+                    with tracer.span("导出文件", format=records_format, rows=len(records)):
+                        records_path = st.session_state.records_export.create(
+                            export_key, records.to_frame(), records_format, MODERN_RESULT_SCHEMA)
+                if records_path is not None:
+                    with open(records_path, "rb") as f:
+                        st.download_button(
+                            label="📥 导出所有记录",
+                            data=f,
+                            file_name=export_filename(f"评估记录_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                                                      records_format),
+                            mime=export_mime(records_format),
+                            width="stretch"
+                        )
         
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -989,3 +1212,8 @@ with col2:
 
 with col3:
     st.info("🔄 版本: v3.0")
+
+# --- 性能诊断面板（汇总本次运行的各阶段耗时）---
+tracer.end_run(st.session_state.current_mode)
+if tracer.enabled and tracer.last_run is not None:
+    render_diagnostics(tracer)
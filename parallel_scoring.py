@@ -0,0 +1,157 @@
+"""
+多进程并行批量评分
+
+把上传数据的评分输入写入一块共享内存，按行切成若干分片交给进程池计算
+子项与维度得分；各进程把结果直接写回共享内存中的输出矩阵，不经过 pickle 回传。
+主进程按原始行顺序读取维度得分，再统一计算综合评分、评级与建议，结果与
+batch_scoring.score_batch 逐位一致。
+
+进程池使用 spawn 方式启动并在进程内复用，避免在 Streamlit 的多线程服务进程中 fork。
+Streamlit 运行页面脚本时会把脚本注册为 __main__，spawn 子进程启动时会重新执行
+__main__，因此提交任务期间临时换成空的 __main__ 模块；多个会话同时评分时，替换 __main__
+与创建、移除进程池都在同一把模块级锁内进行。
+"""
+import os
+import sys
+import threading
+import types
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import (
+    BATCH_INPUTS,
+    DIMENSIONS,
+    build_result_frame,
+    compute_dimension_scores,
+    compute_sub_scores,
+    extract_inputs,
+    finalize_scores,
+    score_batch,
+)
+
+# 每个分片至少包含的行数，数据量更小时进程间调度的开销超过收益
+MIN_SHARD_ROWS = 25_000
+
+NUMERIC_KEYS = [key for key, _, _ in BATCH_INPUTS]
+
+_pools = {}
+# 保护 _pools 与 sys.modules["__main__"] 的替换：Streamlit 在多个线程中同时运行各会话的页面脚本
+_spawn_lock = threading.Lock()
+
+
+def default_workers():
+    """默认进程数：CPU 核数"""
+    return os.cpu_count() or 1
+
+
+def get_pool(workers):
+    """按进程数复用进程池（首次使用时启动）"""
+    with _spawn_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+
+@contextmanager
+def _bare_main():
+    """临时把 __main__ 换成空模块，使新启动的子进程不重新执行页面脚本（持有模块级锁）"""
+    with _spawn_lock:
+        main_module = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main_module
+
+
+def shard_bounds(n_rows, workers):
+    """把 n_rows 行切成不超过 workers 个连续分片，返回 [(start, stop), ...]"""
+    shards = max(1, min(workers, n_rows // MIN_SHARD_ROWS))
+    edges = np.linspace(0, n_rows, shards + 1).astype(np.int64)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+def _score_shard(input_name, output_name, n_rows, growth_uniques, start, stop):
+    """子进程：计算 [start, stop) 行的维度得分并写入共享输出矩阵"""
+    # spawn 启动的子进程与主进程共用资源跟踪器，共享内存由主进程统一释放
+    input_shm = SharedMemory(name=input_name)
+    output_shm = SharedMemory(name=output_name)
+    try:
+        columns = np.ndarray((len(NUMERIC_KEYS) + 1, n_rows), dtype=np.float64, buffer=input_shm.buf)
+        output = np.ndarray((len(DIMENSIONS), n_rows), dtype=np.float64, buffer=output_shm.buf)
+
+        inputs = {key: columns[i, start:stop] for i, key in enumerate(NUMERIC_KEYS)}
+        # 增长趋势以类别编号传入，-1（缺失值）对应末尾追加的 NaN
+        growth_codes = columns[-1, start:stop].astype(np.int64)
+        inputs["growth_trend"] = np.append(growth_uniques, np.nan)[growth_codes]
+
+        dimension_scores = compute_dimension_scores(compute_sub_scores(inputs))
+        for i, key in enumerate(DIMENSIONS):
+            output[i, start:stop] = dimension_scores[key]
+        del columns, output
+    finally:
+        input_shm.close()
+        output_shm.close()
+    return stop - start
+
+
+def score_batch_parallel(df, weights_dict, workers=None):
+    """多进程评分，返回与 score_batch 相同结构的字典（不含子项得分）；进程数为1或数据量较小时直接在当前进程评分"""
+    workers = workers or default_workers()
+    bounds = shard_bounds(len(df), workers)
+    if workers <= 1 or len(bounds) <= 1:
+        return score_batch(df, weights_dict)
+
+    inputs = extract_inputs(df)
+    n_rows = len(df)
+    growth_codes, growth_uniques = pd.factorize(pd.Series(inputs["growth_trend"], dtype=object))
+
+    input_shm = SharedMemory(create=True, size=(len(NUMERIC_KEYS) + 1) * n_rows * 8)
+    output_shm = SharedMemory(create=True, size=len(DIMENSIONS) * n_rows * 8)
+    try:
+        columns = np.ndarray((len(NUMERIC_KEYS) + 1, n_rows), dtype=np.float64, buffer=input_shm.buf)
+        for i, key in enumerate(NUMERIC_KEYS):
+            columns[i] = inputs[key]
+        columns[-1] = growth_codes
+        del columns
+
+        pool = get_pool(workers)
+        try:
+            with _bare_main():
+                futures = [
+                    pool.submit(_score_shard, input_shm.name, output_shm.name, n_rows,
+                                np.asarray(growth_uniques, dtype=object), start, stop)
+                    for start, stop in bounds
+                ]
+            for future in futures:
+                future.result()
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用，下次调用重新创建
+            with _spawn_lock:
+                if _pools.get(workers) is pool:
+                    del _pools[workers]
+            raise
+
+        # 复制出共享内存后即可释放
+        output = np.array(np.ndarray((len(DIMENSIONS), n_rows), dtype=np.float64, buffer=output_shm.buf))
+    finally:
+        input_shm.close()
+        input_shm.unlink()
+        output_shm.close()
+        output_shm.unlink()
+
+    dimension_scores = {key: output[i] for i, key in enumerate(DIMENSIONS)}
+    return finalize_scores(dimension_scores, inputs["has_negative"], inputs["invalid"], weights_dict)
+
+
+def evaluate_batch_parallel(df, weights_dict, evaluated_at=None, workers=None):
+    """多进程批量评估入口：DataFrame -> 结果表（与 evaluate_batch 相同）"""
+    return build_result_frame(df, score_batch_parallel(df, weights_dict, workers), evaluated_at)
@@ -0,0 +1,410 @@
+"""
+页面重新运行延迟测试（Streamlit AppTest，无需浏览器）
+
+Streamlit 每次拖动滑块、点击按钮都会从头重新运行整个页面脚本。本测试用 AppTest 在无界面模式下
+按脚本依次操作 modern_evaluator / advanced_evaluator / evaluator 三个页面的各个模式，会话中预先放入
+0 / 1万 / 5万 / 100万条评估记录，记录每次操作引起的重新运行耗时；超过延迟预算时以非零状态退出，
+防止每次重新运行都做与记录数成正比的工作（重建整张结果表、整表发送到浏览器、整表导出等）。
+
+- 评估记录由 synthetic_data 按固定种子生成并经批量评分，各次运行一致
+- 每个场景（页面 × 记录数）在独立的子进程中运行，进程级缓存（st.cache_resource 等）互不影响
+- 每个场景完整操作 repeat 遍（每遍新开一个会话），每个操作取耗时中位数与预算比较
+- 预算与机器相关：较慢的机器用 --budget-scale 按比例放宽
+- v3.0 页面同时打开性能诊断（diagnostics），超出预算的操作列出耗时最多的阶段
+
+用法示例:
+    python rerun_latency.py                          # 全部页面 × 全部记录数
+    python rerun_latency.py --app modern --sizes 0,1m
+    python rerun_latency.py --repeat 5 -o 本次结果.json
+    python rerun_latency.py --budget-scale 2          # 慢机器上放宽一倍
+"""
+import argparse
+import atexit
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+SEED = 20240901
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HISTORY_SIZES = [0, 10_000, 50_000, 1_000_000]
+DEFAULT_REPEAT = 3
+# 每次重新运行的默认延迟预算；首次加载、批量评估等本身有工作量的操作单独指定
+DEFAULT_BUDGET_MS = 1000
+# 批量上传用的测试文件行数
+UPLOAD_ROWS = 2000
+
+
+# --- 预置评估记录 ---
+def _pool(rows, schema="modern"):
+    from synthetic_data import generate_pool
+    return generate_pool(rows, seed=SEED, schema=schema)
+
+
+def _modern_history(rows):
+    from batch_scoring import DEFAULT_WEIGHTS, evaluate_batch
+    from result_store import MODERN_RESULT_SCHEMA, ResultStore
+    store = ResultStore(MODERN_RESULT_SCHEMA)
+    if rows:
+        store.extend(evaluate_batch(_pool(rows), DEFAULT_WEIGHTS))
+    return store
+
+
+def _advanced_history(rows):
+    from advanced_batch_scoring import evaluate_batch
+    from batch_scoring import DEFAULT_WEIGHTS
+    from result_store import ADVANCED_RESULT_SCHEMA, ResultStore
+    store = ResultStore(ADVANCED_RESULT_SCHEMA)
+    if rows:
+        store.extend(evaluate_batch(_pool(rows, "advanced"), DEFAULT_WEIGHTS))
+    return store
+
+
+def _basic_history(rows):
+    """v1.0 待选列表：评分规则写在页面脚本中，这里按同样的分档生成记录"""
+    from result_store import SHORTLIST_SCHEMA, ResultStore
+    import pandas as pd
+    store = ResultStore(SHORTLIST_SCHEMA)
+    if not rows:
+        return store
+    pool = _pool(rows)
+    rng = np.random.default_rng(SEED)
+    followers = pool["粉丝数"].to_numpy(dtype=np.float64, na_value=0)
+    engagement = rng.gamma(2.0, 1.2, rows)
+    influence = 1 + np.searchsorted([10_000, 50_000, 100_000, 500_000], followers, side="right")
+    engagement_score = 1 + np.searchsorted([0.5, 1, 3, 5], engagement, side="right")
+    content = rng.integers(1, 6, (rows, 3)).mean(axis=1)
+    fit = rng.integers(1, 6, (rows, 2)).mean(axis=1)
+    risk = 5 - np.searchsorted([10, 20, 40, 60], rng.uniform(0, 80, rows), side="left")
+    final = influence * 0.2 + content * 0.25 + engagement_score * 0.3 + fit * 0.25
+    negative = rng.random(rows) < 0.03
+    recommendation = np.select(
+        [negative, final >= 4.2, final >= 3.8, final >= 3.0],
+        ["❌ 高风险-不建议合作", "💎 A+级 - 顶尖人选，优先合作", "✅ A级 - 优质人选，强烈推荐", "👍 B级 - 备选考虑，有潜力"],
+        "🤔 C级 - 暂不考虑",
+    )
+    store.extend(pd.DataFrame({
+        "达人昵称": pool["达人昵称"].astype(object),
+        "综合指数": final.round(2),
+        "合作建议": recommendation,
+        "粉丝数": pool["粉丝数"],
+        "互动率(%)": engagement.round(2),
+        "影响力分": influence.astype(float),
+        "内容分": content.round(2),
+        "互动分": engagement_score.astype(float),
+        "契合度分": fit,
+        "风险分": risk.astype(float),
+        "有无负面": np.where(negative, "是", "否"),
+        "主页链接": "",
+    }))
+    return store
+
+
+def _upload_file(schema):
+    """批量评估上传的测试 CSV（内存文件）"""
+    data = _pool(UPLOAD_ROWS, schema).to_csv(index=False).encode("utf-8-sig")
+
+    class UploadedFile(io.BytesIO):
+        name = f"达人数据_{schema}.csv"
+        size = len(data)
+    return lambda: UploadedFile(data)
+
+
+# --- 操作：action(at, session) 执行一次界面操作，找不到对应控件时返回 False（该操作记为出错）---
+def _find(widgets, label=None, key=None):
+    for widget in widgets:
+        if (key is not None and widget.key == key) or (label is not None and label in (widget.label or "")):
+            return widget
+    return None
+
+
+def _load(at, session):
+    return True
+
+
+def _click(label):
+    def action(at, session):
+        button = _find(at.button, label)
+        if button is None:
+            return False
+        button.click()
+        return True
+    return action
+
+
+def _set(kind, value, label=None, key=None):
+    def action(at, session):
+        widget = _find(getattr(at, kind), label, key)
+        if widget is None:
+            return False
+        widget.set_value(value)
+        return True
+    return action
+
+
+def _upload(present):
+    def action(at, session):
+        session["upload"] = session["upload_file"] if present else None
+        return True
+    return action
+
+
+def _step(name, action, budget_ms=None, min_rows=0):
+    """min_rows：只在预置记录数不少于该值时执行（如翻页需要多于一页的记录）"""
+    return {"name": name, "action": action, "budget_ms": budget_ms, "min_rows": min_rows}
+
+
+APPS = {
+    "modern": {
+        "script": "modern_evaluator.py",
+        "history_key": "evaluation_results",
+        "history": _modern_history,
+        "upload_schema": "modern",
+        "diagnostics": True,
+        "steps": [
+            _step("首次加载", _load, 3000),
+            _step("单个评估·开始评估", _click("开始评估")),
+            _step("快速权重调整", _set("slider", 30, key="w_content")),
+            _step("切换到批量评估", _click("📊 批量评估")),
+            _step("批量评估·上传文件", _upload(True), 2000),
+            _step("批量评估·开始评估", _click("开始批量评估"), 3000),
+            _step("批量评估·调整权重", _set("slider", 20, key="w_content")),
+            _step("批量评估·移除文件", _upload(False)),
+            _step("切换到数据对比", _click("📈 数据对比")),
+            _step("数据对比·散点图缩放", _set("slider", (2.0, 5.0), key="scatter_score")),
+            _step("数据对比·结果翻页", _set("number_input", 2, key="session_browser_page")),
+            _step("数据对比·历史记录库", _set("radio", "历史记录库", label="数据来源")),
+            _step("数据对比·本次会话", _set("radio", "本次会话", label="数据来源")),
+            _step("切换到系统设置", _click("⚙️ 系统设置")),
+            _step("系统设置·保存权重", _click("保存权重设置")),
+            _step("切换到单个评估", _click("🎯 单个评估")),
+        ],
+    },
+    "advanced": {
+        "script": "advanced_evaluator.py",
+        "history_key": "evaluation_results",
+        "history": _advanced_history,
+        "upload_schema": "advanced",
+        "steps": [
+            _step("首次加载", _load, 3000),
+            _step("单个评估·填写昵称", _set("text_input", "测试达人", label="达人昵称")),
+            _step("单个评估·调整指标", _set("slider", 80, label="垂类专注度")),
+            _step("单个评估·保存结果", _click("保存评估结果")),
+            _step("侧边栏权重调整", _set("slider", 30, label="内容维度")),
+            _step("切换到批量评估", _set("selectbox", "批量达人评估", label="选择评估模式")),
+            _step("批量评估·上传文件", _upload(True), 2000),
+            _step("批量评估·开始评估", _click("开始批量评估"), 3000),
+            _step("批量评估·移除文件", _upload(False)),
+            _step("切换到数据分析对比", _set("selectbox", "数据分析对比", label="选择评估模式")),
+            _step("数据分析对比·散点图缩放", _set("slider", (2.0, 5.0), key="scatter_score")),
+            _step("数据分析对比·结果翻页", _set("number_input", 2, key="results_page")),
+            _step("数据分析对比·侧边栏权重调整", _set("slider", 20, label="内容维度")),
+            _step("切换到单个评估", _set("selectbox", "单个达人评估", label="选择评估模式")),
+        ],
+    },
+    "basic": {
+        "script": "evaluator.py",
+        "history_key": "shortlist",
+        "history": _basic_history,
+        "steps": [
+            _step("首次加载", _load, 3000),
+            _step("填写昵称", _set("text_input", "测试达人", label="达人昵称")),
+            _step("调整主观评分", _set("slider", 5, label="内容垂直度")),
+            _step("添加到待选列表", _click("添加到待选列表")),
+            _step("待选列表翻页", _set("number_input", 2, key="shortlist_page"), min_rows=50),
+            _step("侧边栏权重调整", _set("slider", 30, key="w_content")),
+        ],
+    },
+}
+
+
+# --- 测量 ---
+def _size_label(rows):
+    if rows >= 1_000_000:
+        return f"{rows // 1_000_000}m"
+    return f"{rows // 1000}k" if rows else "0"
+
+
+def _parse_size(text):
+    text = text.strip().lower()
+    for suffix, factor in (("m", 1_000_000), ("k", 1000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def _top_stages(at, count=3):
+    """v3.0 页面本次运行中自身耗时最多的阶段 [(阶段, 毫秒)]"""
+    tracer = at.session_state["tracer"] if "tracer" in at.session_state else None
+    if tracer is None or tracer.last_run is None:
+        return []
+    summary = tracer.last_run["summary"].head(count)
+    return [(name, round(ms, 1)) for name, ms in zip(summary["阶段"], summary["自身耗时(ms)"])]
+
+
+def run_scenario(app, rows, repeat):
+    """在当前进程中运行一个场景，返回 {操作: {timings_ms, errors, stages}}"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    from diagnostics import Tracer
+
+    spec = APPS[app]
+    history = spec["history"](rows)
+    session = {"upload": None, "upload_file": _upload_file(spec["upload_schema"]) if "upload_schema" in spec else None}
+    # AppTest 不支持文件上传控件，用内存文件代替上传结果
+    st.file_uploader = lambda *args, **kwargs: session["upload"]() if session["upload"] else None
+
+    results = {step["name"]: {"timings_ms": [], "errors": [], "stages": []} for step in spec["steps"]}
+    for _ in range(repeat):
+        session["upload"] = None
+        at = AppTest.from_file(os.path.join(APP_DIR, spec["script"]), default_timeout=600)
+        at.session_state[spec["history_key"]] = history
+        if spec.get("diagnostics"):
+            at.session_state["tracer"] = Tracer(enabled=True, log_path="")
+        for step in spec["steps"]:
+            result = results[step["name"]]
+            if rows < step["min_rows"]:
+                continue
+            # 控件改名或没有显示时操作无法执行，记为出错，避免该操作的耗时悄悄退出测量
+            if not step["action"](at, session):
+                result["errors"].append("找不到对应的控件")
+                continue
+            started = time.perf_counter()
+            at.run()
+            result["timings_ms"].append(round((time.perf_counter() - started) * 1000, 1))
+            result["errors"].extend(str(exception.value) for exception in at.exception)
+            result["stages"] = _top_stages(at)
+    return results
+
+
+def run_isolated(app, rows, repeat):
+    """在子进程中运行一个场景；评估历史记录库写入临时目录"""
+    history_dir = tempfile.mkdtemp(prefix="redbook_rerun_")
+    atexit.register(shutil.rmtree, history_dir, ignore_errors=True)
+    env = dict(os.environ, REDBOOK_HISTORY_DB=os.path.join(history_dir, "history.db"))
+    env.pop("REDBOOK_DIAGNOSTICS", None)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-scenario", f"{app}:{rows}:{repeat}"],
+        capture_output=True, text=True, cwd=APP_DIR, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"场景 {app} × {rows:,} 条运行失败:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# --- 与预算比较 ---
+def summarize(app, results, budget_scale=1.0):
+    """每个操作的中位数 / 最大耗时、预算与是否超出"""
+    summary = {}
+    for step in APPS[app]["steps"]:
+        result = results[step["name"]]
+        timings = result["timings_ms"]
+        budget = (step["budget_ms"] or DEFAULT_BUDGET_MS) * budget_scale
+        median = float(np.median(timings)) if timings else None
+        summary[step["name"]] = {
+            "median_ms": None if median is None else round(median, 1),
+            "max_ms": max(timings) if timings else None,
+            "budget_ms": budget,
+            "over_budget": median is not None and median > budget,
+            "errors": sorted(set(result["errors"])),
+            "stages": result["stages"],
+        }
+    return summary
+
+
+def failures(report):
+    """超出预算或运行出错的操作 [(页面, 记录数, 操作, 原因)]"""
+    found = []
+    for app, by_size in report.items():
+        for size, steps in by_size.items():
+            for name, step in steps.items():
+                if step["errors"]:
+                    found.append((app, size, name, f"运行出错: {step['errors'][0]}"))
+                elif step["over_budget"]:
+                    stages = "，".join(f"{stage} {ms:,.0f} ms" for stage, ms in step["stages"])
+                    reason = f"{step['median_ms']:,.0f} ms，超出预算 {step['budget_ms']:,.0f} ms"
+                    found.append((app, size, name, reason + (f"（{stages}）" if stages else "")))
+    return found
+
+
+def format_table(app, by_size):
+    sizes = list(by_size)
+    lines = [f"[{app}]", f"{'操作':<30}" + "".join(f"{size + ' 条':>14}" for size in sizes) + f"{'预算(ms)':>12}"]
+    for name in next(iter(by_size.values())):
+        cells = []
+        for size in sizes:
+            step = by_size[size][name]
+            if step["median_ms"] is None:
+                # 出错（找不到控件）或记录数不足 min_rows 时没有耗时
+                cells.append(f"{'未运行 ✗':>13}" if step["errors"] else f"{'不适用':>12}")
+            else:
+                mark = " ✗" if step["over_budget"] or step["errors"] else "  "
+                cells.append(f"{step['median_ms']:>12,.0f}{mark}")
+        budget = next(iter(by_size.values()))[name]["budget_ms"]
+        lines.append(f"{name:<30}" + "".join(cells) + f"{budget:>12,.0f}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="各页面按脚本操作时的重新运行延迟测试")
+    parser.add_argument("--app", action="append", choices=list(APPS), default=[],
+                        help="只测试指定页面（可重复指定，默认全部）")
+    parser.add_argument("--sizes", default=",".join(_size_label(rows) for rows in HISTORY_SIZES),
+                        help="会话中预置的评估记录数，逗号分隔（默认: 0,10k,50k,1m）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"每个场景完整操作的遍数，取中位数（默认: {DEFAULT_REPEAT}）")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="延迟预算的放大倍数（默认: 1）")
+    parser.add_argument("-o", "--output", help="把本次结果写入 JSON 文件")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.run_scenario:
+        app, rows, repeat = args.run_scenario.split(":")
+        print(json.dumps(run_scenario(app, int(rows), int(repeat)), ensure_ascii=False))
+        return 0
+    if args.repeat < 1 or args.budget_scale <= 0:
+        print("--repeat 至少为 1，--budget-scale 必须为正数", file=sys.stderr)
+        return 2
+    try:
+        sizes = [_parse_size(size) for size in args.sizes.split(",")]
+    except ValueError:
+        print(f"无法识别的记录数: {args.sizes}", file=sys.stderr)
+        return 2
+
+    report = {}
+    for app in args.app or list(APPS):
+        report[app] = {}
+        for rows in sizes:
+            print(f"运行 {app} × {rows:,} 条 ...", file=sys.stderr)
+            results = run_isolated(app, rows, args.repeat)
+            report[app][_size_label(rows)] = summarize(app, results, args.budget_scale)
+        print(format_table(app, report[app]))
+        print()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "repeat": args.repeat,
+                       "budget_scale": args.budget_scale, "results": report}, f, ensure_ascii=False, indent=2)
+
+    found = failures(report)
+    for app, size, name, reason in found:
+        print(f"❌ {app} × {size} 条 · {name}: {reason}", file=sys.stderr)
+    if found:
+        return 1
+    print("✅ 所有操作的重新运行耗时都在预算内", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
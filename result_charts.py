@@ -0,0 +1,101 @@
+"""
+评估结果的分布图（评分直方图、粉丝数-评分散点图）
+
+px.histogram / px.scatter 会把每一行都发送到浏览器，评估记录达到百万行时页面卡死、
+浏览器内存耗尽。这里先在服务端聚合，图表数据量与记录数无关：
+- 直方图：服务端按固定分箱计数，只发送各箱的计数
+- 散点图：范围内的点数不超过 MAX_SCATTER_POINTS 时用 WebGL（Scattergl）逐点绘制并显示昵称；
+  超过时按二维分箱统计人数，以密度热力图显示。缩小粉丝数/评分范围后即可看到逐点明细
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from result_store import widen_scores
+
+SCORE_RANGE = (0.0, 5.0)
+HISTOGRAM_BINS = 20
+
+# 逐点绘制的点数上限，超过时改为密度图
+MAX_SCATTER_POINTS = 5000
+# 密度图的分箱数 (粉丝数, 评分)
+DENSITY_BINS = (60, 40)
+
+
+def _bin_indices(values, low, high, bins):
+    """等宽分箱编号，右端点并入最后一箱"""
+    width = (high - low) / bins if high > low else 1.0
+    return np.clip(((values - low) / width).astype(np.int64), 0, bins - 1)
+
+
+def _finite(values, mask=None):
+    keep = ~np.isnan(values)
+    return keep if mask is None else keep & mask
+
+
+def histogram_counts(values, bins=HISTOGRAM_BINS, value_range=SCORE_RANGE):
+    """服务端分箱计数，返回 (各箱计数, 分箱边界)；缺失值与超出范围的值不计入"""
+    low, high = value_range
+    values = widen_scores(values)
+    with np.errstate(invalid="ignore"):
+        values = values[(values >= low) & (values <= high)]
+    counts = np.bincount(_bin_indices(values, low, high, bins), minlength=bins)
+    return counts, np.linspace(low, high, bins + 1)
+
+
+def score_histogram(scores, title="评分分布直方图", color=None, bins=HISTOGRAM_BINS):
+    """评分分布直方图：只发送各箱计数"""
+    counts, edges = histogram_counts(scores, bins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=edges[1] - edges[0],
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="综合评分 %{customdata[0]:.2f} - %{customdata[1]:.2f}<br>人数 %{y:,}<extra></extra>",
+        marker_color=color,
+    ))
+    fig.update_layout(title=title, xaxis_title="综合评分", yaxis_title="人数", bargap=0.05)
+    return fig
+
+
+def follower_score_scatter(frame, mask=None, title="粉丝数vs评分散点图", color=None,
+                           max_points=MAX_SCATTER_POINTS, bins=DENSITY_BINS):
+    """粉丝数-评分散点图，返回 (图, 范围内的点数)
+
+    mask 为当前查看范围（缩放）内的行掩码，None 表示全部行。点数不超过 max_points 时
+    逐点绘制（WebGL），否则绘制二维分箱的密度热力图。
+    """
+    followers = frame["粉丝数"].to_numpy(dtype=np.float64, na_value=np.nan)
+    scores = widen_scores(frame["综合评分"].to_numpy(dtype=np.float64, na_value=np.nan))
+    positions = np.flatnonzero(_finite(followers, mask) & ~np.isnan(scores))
+    x, y = followers[positions], scores[positions]
+
+    if len(positions) <= max_points:
+        names = frame["达人昵称"].iloc[positions].astype(object).fillna("").tolist()
+        fig = go.Figure(go.Scattergl(
+            x=x, y=y, mode="markers", text=names,
+            hovertemplate="%{text}<br>粉丝数 %{x:,.0f}<br>综合评分 %{y:.2f}<extra></extra>",
+            marker=dict(color=color, size=6, opacity=0.7),
+        ))
+        fig.update_layout(title=title, xaxis_title="粉丝数", yaxis_title="综合评分")
+        return fig, len(positions)
+
+    x_bins, y_bins = bins
+    x_low, x_high = float(x.min()), float(x.max())
+    y_low, y_high = SCORE_RANGE if (y.min() >= SCORE_RANGE[0] and y.max() <= SCORE_RANGE[1]) \
+        else (float(y.min()), float(y.max()))
+    cells = _bin_indices(y, y_low, y_high, y_bins) * x_bins + _bin_indices(x, x_low, x_high, x_bins)
+    counts = np.bincount(cells, minlength=x_bins * y_bins).reshape(y_bins, x_bins).astype(float)
+    # 空白分箱不着色
+    counts[counts == 0] = np.nan
+    x_edges = np.linspace(x_low, x_high, x_bins + 1)
+    y_edges = np.linspace(y_low, y_high, y_bins + 1)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts,
+        colorscale="Teal",
+        colorbar=dict(title="人数"),
+        hovertemplate="粉丝数约 %{x:,.0f}<br>综合评分约 %{y:.2f}<br>人数 %{z:,}<extra></extra>",
+    ))
+    fig.update_layout(title=f"{title}（密度，共 {len(positions):,} 人）", xaxis_title="粉丝数", yaxis_title="综合评分")
+    return fig, len(positions)
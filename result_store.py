@@ -0,0 +1,284 @@
+"""
+列式评估结果存储
+
+替代 session_state 中的字典列表：单条保存先进入追加缓冲区，批量结果按列
+整块写入；读取时把缓冲区和各数据段合并为一张带类型的 DataFrame 并缓存，
+在下一次写入前的所有重新运行中直接复用，不再重复构建。
+
+v3.0 结果表使用紧凑列类型：评级/建议/评估时间等重复取值的文本列为分类列，
+昵称为 Arrow 字符串列，评分为 float32（两位小数，展示值不变），粉丝数为 Int32。
+转换为 Python 数值（写入数据库、Excel）时评分按两位小数还原，避免 3.08 变成 3.0799999。
+"""
+import numpy as np
+import pandas as pd
+
+from results_browser import ResultBrowser
+
+# --- 各评估系统的结果表结构 (列名 -> 类型) ---
+MODERN_RESULT_SCHEMA = {
+    "达人昵称": "string[pyarrow]",
+    "粉丝数": "Int32",
+    "评估日期": "category",
+    "综合评分": "float32",
+    "评级": "category",
+    "建议": "category",
+    "内容维度": "float32",
+    "数据维度": "float32",
+    "粉丝维度": "float32",
+    "商业维度": "float32",
+    "成长性维度": "float32",
+    "评估时间": "category",
+}
+
+ADVANCED_RESULT_SCHEMA = {
+    "达人昵称": "object",
+    "综合评分": "float64",
+    "推荐等级": "object",
+    "粉丝数": "Int64",
+    "内容得分": "float64",
+    "数据得分": "float64",
+    "粉丝得分": "float64",
+    "商业得分": "float64",
+    "成长得分": "float64",
+    "评估时间": "object",
+}
+
+SHORTLIST_SCHEMA = {
+    "达人昵称": "object",
+    "综合指数": "float64",
+    "合作建议": "object",
+    "粉丝数": "Int64",
+    "互动率(%)": "float64",
+    "影响力分": "float64",
+    "内容分": "float64",
+    "互动分": "float64",
+    "契合度分": "float64",
+    "风险分": "float64",
+    "有无负面": "object",
+    "主页链接": "object",
+}
+
+
+# 评分保留的小数位数：float32 评分按此精度还原为 float64
+SCORE_DECIMALS = 2
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+# Veltkamp 拆分常数：2**27 + 1，把 float64 拆成两个各 26 位有效数字的部分
+_SPLITTER = 2.0 ** 27 + 1
+
+
+# --- 评分舍入 ---
+def _split(values):
+    scaled = values * _SPLITTER
+    high = scaled - (scaled - values)
+    return high, values - high
+
+
+def _exact_product(values, factor):
+    """Dekker 乘法：values * factor 的精确值为 product + error"""
+    product = values * factor
+    value_high, value_low = _split(values)
+    factor_high, factor_low = _split(np.float64(factor))
+    error = (((value_high * factor_high - product) + value_high * factor_low + value_low * factor_high)
+             + value_low * factor_low)
+    return product, error
+
+
+def round_scores(values, decimals=SCORE_DECIMALS):
+    """列式舍入，结果与逐个调用 round(x, decimals) 完全一致
+
+    np.round 先乘以 10**decimals 再取整，乘法的误差会使 3.445 这类十进制"五"（实际二进制值
+    略小于或略大于一半）舍入方向与 round() 不同。乘积接近 .5 的候选值改为精确比较 x 与两个
+    候选值的中点 (2k+1) / (2·10**d)：两边同乘 2**(d+1)，即比较 x·5**d（Dekker 乘法求精确值）
+    与可精确表示的 (2k+1) / 2**(d+1)；恰好相等时与 round() 一样取偶数。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    # 与 np.round 相同：乘以 10**d、取整、再除以 10**d
+    scaled = values * 10.0 ** decimals
+    rounded = np.rint(scaled)
+    with np.errstate(invalid="ignore"):
+        ties = np.flatnonzero(np.abs(scaled - rounded) > 0.5 - 1e-6)
+    if len(ties):
+        lower = np.floor(scaled[ties])
+        product, error = _exact_product(values[ties], 5.0 ** decimals)
+        # product 与中点足够接近，相减没有舍入误差，符号即精确比较的结果
+        side = np.sign((product - (2 * lower + 1) / 2.0 ** (decimals + 1)) + error)
+        # 舍入到 0 时与 round() 一样保留原值的符号（-0.5 -> -0.0）
+        rounded[ties] = np.copysign(lower + ((side > 0) | ((side == 0) & (lower % 2 == 1))), values[ties])
+    rounded /= 10.0 ** decimals
+    return rounded
+
+
+# --- 紧凑列类型 ---
+def compact_scores(values):
+    """评分数组 -> 两位小数的 float32"""
+    return round_scores(values).astype(np.float32)
+
+
+def widen_scores(values):
+    """float32 评分 -> float64，按两位小数还原"""
+    return round_scores(np.asarray(values, dtype=np.float64))
+
+
+def widen_frame(frame):
+    """把 float32 评分列还原为 float64，供转换为 Python 数值时使用（不修改原表）"""
+    float32_columns = [name for name, dtype in frame.dtypes.items() if dtype == "float32"]
+    if not float32_columns:
+        return frame
+    frame = frame.copy(deep=False)
+    for name in float32_columns:
+        frame[name] = widen_scores(frame[name].to_numpy(dtype=np.float32, na_value=np.nan))
+    return frame
+
+
+def compact_integers(values):
+    """整数列（如粉丝数）-> Int32，超出 int32 范围时使用 Int64；非数值与无穷大视为缺失"""
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce")
+    if pd.api.types.is_float_dtype(numeric):
+        numeric = numeric.where(np.isfinite(numeric)).round()
+    elif pd.api.types.is_bool_dtype(numeric):
+        numeric = numeric.astype(np.int8)
+    largest = numeric.abs().max()
+    return numeric.astype("Int64" if pd.notna(largest) and largest > _INT32_MAX else "Int32")
+
+
+def constant_category(value, length):
+    """整列取同一个值（如评估时间）的分类列"""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
+
+def concat_frames(frames):
+    """合并结果表：分类列先统一取值集合，避免 pd.concat 退化为对象列"""
+    frames = list(frames)
+    if len(frames) > 1:
+        for name in frames[0].columns:
+            if not all(name in frame.columns and isinstance(frame[name].dtype, pd.CategoricalDtype)
+                       for frame in frames):
+                continue
+            categories = pd.api.types.union_categoricals(
+                [frame[name].array[:0] for frame in frames], ignore_order=True).categories
+            frames = [
+                frame if frame[name].cat.categories.equals(categories)
+                else frame.assign(**{name: frame[name].cat.set_categories(categories)})
+                for frame in frames
+            ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def typed_column(values, dtype, length):
+    """按结构定义转换一列，缺失的列填充空值；已是目标类型的列直接使用"""
+    if values is None:
+        if dtype in ("object", "category", "string[pyarrow]"):
+            return pd.Series(np.full(length, None, dtype=object)).astype(dtype)
+        return pd.Series(np.full(length, np.nan)).astype(dtype)
+    if isinstance(values, pd.Series):
+        if values.dtype == dtype:
+            return values.reset_index(drop=True)
+        values = values.to_numpy()
+    if dtype == "object":
+        return pd.Series(np.asarray(values, dtype=object))
+    if dtype in ("category", "string[pyarrow]"):
+        # 转为 Arrow 字符串时非文本值（如纯数字昵称）转为文本
+        return pd.Series(np.asarray(values, dtype=object)).astype(dtype)
+    if dtype == "Int32":
+        return compact_integers(values)
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce")
+    if dtype == "Int64":
+        numeric = numeric.round()
+    if dtype == "float32":
+        return pd.Series(compact_scores(numeric.to_numpy(dtype=np.float64, na_value=np.nan)))
+    return numeric.astype(dtype)
+
+
+def memory_report(frame):
+    """结果表各列的类型与内存占用（含字符串内容），最后一行为合计"""
+    usage = frame.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "列": list(usage.index) + ["合计"],
+        "类型": [str(dtype) for dtype in frame.dtypes] + [""],
+        "内存(MB)": np.round(np.append(usage.to_numpy(), usage.sum()) / 2**20, 2),
+    })
+    report.attrs["bytes_per_row"] = usage.sum() / len(frame) if len(frame) else 0.0
+    return report
+
+
+class ResultStore:
+    """带类型的列式结果存储：追加缓冲区 + 列式数据段 + 缓存的 DataFrame 视图"""
+
+    def __init__(self, schema):
+        self.schema = dict(schema)
+        self._segments = []
+        self._buffer = []
+        self._rows = 0
+        self._frame = None
+        self._browser = None
+        # 每次写入或清空时递增，供按结果内容缓存的派生数据（如导出文件）判断是否过期
+        self.version = 0
+
+    def __len__(self):
+        return self._rows + len(self._buffer)
+
+    def append(self, record):
+        """追加一条记录（写入缓冲区，读取时再批量转为列）"""
+        self._buffer.append(record)
+        self._frame = None
+        self.version += 1
+
+    def extend(self, data):
+        """批量追加结果表或记录列表，按列整块写入"""
+        self._flush()
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame.from_records(list(data))
+        if len(data):
+            self._add_segment(data)
+            self.version += 1
+
+    def clear(self):
+        self._segments = []
+        self._buffer = []
+        self._rows = 0
+        self._frame = None
+        self.version += 1
+
+    def to_frame(self):
+        """返回全部结果的 DataFrame；在下一次写入前重复调用返回同一对象，请勿原地修改"""
+        if self._frame is None:
+            self._flush()
+            if not self._segments:
+                self._frame = self._typed_frame(pd.DataFrame())
+            elif len(self._segments) == 1:
+                self._frame = self._segments[0]
+            else:
+                self._frame = concat_frames(self._segments)
+                self._segments = [self._frame]
+        return self._frame
+
+    def column(self, name):
+        return self.to_frame()[name]
+
+    def browser(self):
+        """全部结果的浏览器（服务端筛选、排序与分页），在下一次写入前重复调用返回同一对象"""
+        frame = self.to_frame()
+        if self._browser is None or self._browser.frame is not frame:
+            self._browser = ResultBrowser(frame)
+        return self._browser
+
+    def _typed_frame(self, data):
+        length = len(data)
+        columns = {
+            name: typed_column(data[name] if name in data.columns else None, dtype, length)
+            for name, dtype in self.schema.items()
+        }
+        return pd.DataFrame(columns)
+
+    def _add_segment(self, data):
+        self._segments.append(self._typed_frame(data))
+        self._rows += len(data)
+        self._frame = None
+
+    def _flush(self):
+        if self._buffer:
+            buffered = pd.DataFrame.from_records(self._buffer)
+            self._buffer = []
+            self._add_segment(buffered)
@@ -0,0 +1,144 @@
+"""
+结果表的服务端筛选、排序与分页
+
+st.dataframe 会把整张表发送到浏览器，几十万行以上时页面卡死。ResultBrowser 在服务端
+完成筛选（评分区间、评级、粉丝数区间、昵称关键字）与排序，只取出当前页的行交给界面显示。
+
+- 排序索引：每个排序列（含升/降序）只做一次稳定排序，结果缓存；也可由调用方直接提供
+  （如重新加权时按排名已算好的顺序）
+- 筛选掩码：同一组筛选条件只计算一次
+- 筛选 + 排序后的行位置按条件缓存，翻页只是切片，换排序只需用掩码过滤已有的排序索引
+"""
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# 默认列名（v3.0 结果表）
+DEFAULT_COLUMNS = {
+    "score": "综合评分",
+    "tier": "评级",
+    "followers": "粉丝数",
+    "name": "达人昵称",
+}
+
+# 缓存的"筛选 + 排序"结果个数
+MAX_CACHED_VIEWS = 8
+
+
+def _filters_key(filters):
+    """筛选条件 -> 可哈希的缓存键（忽略未启用的条件）"""
+    items = []
+    for name, value in sorted((filters or {}).items()):
+        if value is None or value == "" or (isinstance(value, (list, tuple)) and not value):
+            continue
+        items.append((name, tuple(value) if isinstance(value, (list, tuple)) else value))
+    return tuple(items)
+
+
+def _range_mask(values, bounds):
+    """values 落在 [low, high] 内的掩码（None 表示不限，缺失值不满足）；阈值按列的精度比较"""
+    low, high = bounds
+    mask = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        if low is not None:
+            mask &= values >= np.asarray(low, dtype=values.dtype)
+        if high is not None:
+            mask &= values <= np.asarray(high, dtype=values.dtype)
+    return mask
+
+
+class ResultBrowser:
+    """结果表浏览器：服务端筛选、排序与分页，page() 只返回当前页的行"""
+
+    def __init__(self, frame, columns=None, orders=None):
+        self.frame = frame
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+        self._orders = dict(orders or {})
+        self._masks = {}
+        self._views = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def sort_orders(self):
+        """已计算的排序索引 {(列, 是否降序): 行位置}"""
+        return dict(self._orders)
+
+    # --- 排序索引 ---
+    def sort_order(self, column, descending=False):
+        """按列稳定排序后的行位置（int32），缺失值排在最后；每个 (列, 方向) 只计算一次"""
+        key = (column, descending)
+        order = self._orders.get(key)
+        if order is None:
+            values = pa.array(self.frame[column], from_pandas=True)
+            indices = pc.array_sort_indices(values, order="descending" if descending else "ascending",
+                                            null_placement="at_end")
+            order = indices.to_numpy().astype(np.int32)
+            self._orders[key] = order
+        return order
+
+    # --- 筛选 ---
+    def _float_values(self, column):
+        series = self.frame[column]
+        dtype = np.float32 if series.dtype == "float32" else np.float64
+        return series.to_numpy(dtype=dtype, na_value=np.nan)
+
+    def filter_mask(self, filters):
+        """筛选条件 -> 行掩码，没有启用的条件时返回 None
+
+        filters: score / followers 为 (下限, 上限)，tiers 为评级列表，name 为昵称关键字
+        """
+        key = _filters_key(filters)
+        if not key:
+            return None
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        conditions = dict(key)
+        mask = np.ones(len(self.frame), dtype=bool)
+        if "score" in conditions:
+            mask &= _range_mask(self._float_values(self.columns["score"]), conditions["score"])
+        if "followers" in conditions:
+            mask &= _range_mask(self._float_values(self.columns["followers"]), conditions["followers"])
+        if "tiers" in conditions:
+            mask &= self.frame[self.columns["tier"]].isin(conditions["tiers"]).to_numpy()
+        if "name" in conditions:
+            names = pa.array(self.frame[self.columns["name"]], type=pa.string(), from_pandas=True)
+            matched = pc.match_substring(names, conditions["name"], ignore_case=True)
+            mask &= matched.fill_null(False).to_numpy(zero_copy_only=False)
+        self._masks[key] = mask
+        return mask
+
+    # --- 分页 ---
+    def positions(self, filters=None, sort_by=None, descending=False):
+        """筛选并排序后的行位置；不筛选也不排序时返回 None（即原顺序的全部行）"""
+        key = (_filters_key(filters), sort_by, descending)
+        if key in self._views:
+            return self._views[key]
+
+        mask = self.filter_mask(filters)
+        if sort_by is None:
+            positions = None if mask is None else np.flatnonzero(mask).astype(np.int32)
+        else:
+            order = self.sort_order(sort_by, descending)
+            positions = order if mask is None else order[mask[order]]
+
+        if len(self._views) >= MAX_CACHED_VIEWS:
+            self._views.pop(next(iter(self._views)))
+        self._views[key] = positions
+        return positions
+
+    def count(self, filters=None):
+        """符合筛选条件的行数"""
+        mask = self.filter_mask(filters)
+        return len(self.frame) if mask is None else int(mask.sum())
+
+    def page(self, page, page_size, filters=None, sort_by=None, descending=False):
+        """取第 page 页（从1开始），返回 (当前页 DataFrame, 符合条件的总行数)"""
+        positions = self.positions(filters, sort_by, descending)
+        total = len(self.frame) if positions is None else len(positions)
+        start = max(page - 1, 0) * page_size
+        rows = slice(start, start + page_size) if positions is None else positions[start:start + page_size]
+        return self.frame.iloc[rows], total
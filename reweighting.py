@@ -0,0 +1,182 @@
+"""
+已评分批次的即时重新加权
+
+批量评估完成后保留每行的五维度得分（N×5 矩阵）。调整维度权重时，
+只需做一次矩阵-向量乘积即可重算全部综合评分、评级与排名，
+无需重新上传或从原始指标重新评分。
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import (
+    LEVEL_DTYPE,
+    LEVEL_LABELS,
+    RECOMMENDATION_DTYPE,
+    assign_label_codes,
+    build_result_frame,
+    dimension_matrix,
+    reweight_scores,
+)
+from batch_io import build_summary, export_to_tempfile
+from parallel_scoring import score_batch_parallel
+from result_store import round_scores
+from results_browser import ResultBrowser
+
+# 随权重变化的结果列：其余列的排序索引在调整权重后仍可复用
+WEIGHTED_COLUMNS = ("排名", "综合评分", "评级", "建议")
+
+
+class ScoredBatch:
+    """一次批量评估的结果：结果表 + 维度得分矩阵 + 风险/异常标记 + 上传数据的校验报告"""
+
+    def __init__(self, results, matrix, has_risk, invalid, weights, validation=None):
+        self.results = results
+        self.matrix = matrix
+        self.has_risk = has_risk
+        self.invalid = invalid
+        self.weights = dict(weights)
+        self.validation = validation
+        self._view_weights = None
+        self._view = None
+        self._rank_order = None
+        self._browser = None
+        self._exports = {}
+
+    def __len__(self):
+        return len(self.results)
+
+    def cache_entry(self):
+        """可在会话间共享的只读数据：结果表、维度得分矩阵、风险/异常标记、评分权重与校验报告
+
+        上传缓存在所有会话间共享，只缓存这些数据；按权重生成的结果视图与导出文件属于各自的
+        会话，命中缓存时由 from_cache_entry() 为每个会话另建 ScoredBatch。
+        """
+        for array in (self.matrix, self.has_risk, self.invalid):
+            array.setflags(write=False)
+        return self.results, self.matrix, self.has_risk, self.invalid, self.weights, self.validation
+
+    @classmethod
+    def from_cache_entry(cls, entry):
+        """由缓存的只读数据新建一个批次（各会话的结果视图与导出文件互不影响）"""
+        return cls(*entry)
+
+    def __getstate__(self):
+        # 按权重生成的结果视图与导出文件只在当前进程内有效，不随缓存保存
+        state = dict(self.__dict__)
+        state.update(_view_weights=None, _view=None, _rank_order=None, _browser=None, _exports={})
+        return state
+
+    def __del__(self):
+        # 会话不再引用该批次时，删除其导出的临时文件
+        self.clear_exports()
+
+    @classmethod
+    def concat(cls, parts, validation=None):
+        """合并分块评分得到的多个批次"""
+        return cls(
+            pd.concat([part.results for part in parts]),
+            np.asfortranarray(np.concatenate([part.matrix for part in parts])),
+            np.concatenate([part.has_risk for part in parts]),
+            np.concatenate([part.invalid for part in parts]),
+            parts[0].weights,
+            validation,
+        )
+
+    def apply_weights(self, weights):
+        """按新权重重算综合评分、评级、建议与排名，返回结果表（同一权重重复调用直接返回缓存）"""
+        weights = dict(weights)
+        if self._view is not None and self._view_weights == weights:
+            return self._view
+
+        final_scores = reweight_scores(self.matrix, weights)
+        final_scores, level_codes, recommendation_codes = assign_label_codes(
+            final_scores, self.has_risk, self.invalid)
+
+        # 按展示精度（两位小数）排名，分数相同时保持原顺序；整数键稳定排序为基数排序
+        display_scores = round_scores(final_scores)
+        rank_keys = (500 - np.rint(display_scores * 100)).astype(np.int16)
+        rank_order = np.argsort(rank_keys, kind="stable").astype(np.int32)
+        ranks = np.empty(len(final_scores), dtype=np.int32)
+        ranks[rank_order] = np.arange(1, len(final_scores) + 1, dtype=np.int32)
+
+        view = self.results.copy(deep=False)
+        view["综合评分"] = display_scores.astype(np.float32)
+        # 评级/建议以分类列表示，只写入编号，不逐行复制字符串
+        view["评级"] = pd.Categorical.from_codes(level_codes, dtype=LEVEL_DTYPE)
+        view["建议"] = pd.Categorical.from_codes(recommendation_codes, dtype=RECOMMENDATION_DTYPE)
+        view.insert(0, "排名", ranks)
+
+        self._view_weights = weights
+        self._view = view
+        self._rank_order = rank_order
+        self.clear_exports()
+        return view
+
+    def browser(self, weights):
+        """按指定权重的结果浏览器（服务端筛选、排序与分页）
+
+        按排名/综合评分降序的排序索引直接使用重新加权时算出的顺序；与权重无关的列
+        （粉丝数、昵称等）的排序索引在调整权重后继续沿用。
+        """
+        view = self.apply_weights(weights)
+        if self._browser is not None and self._browser.frame is view:
+            return self._browser
+        orders = {}
+        if self._browser is not None:
+            orders = {key: order for key, order in self._browser.sort_orders.items()
+                      if key[0] not in WEIGHTED_COLUMNS}
+        orders[("排名", False)] = self._rank_order
+        orders[("综合评分", True)] = self._rank_order
+        self._browser = ResultBrowser(view, orders=orders)
+        return self._browser
+
+    def summary(self, weights):
+        """按指定权重的汇总表（评分行数、各评级人数、平均分等）"""
+        view = self.apply_weights(weights)
+        level_counts = view["评级"].value_counts().reindex(LEVEL_LABELS[::-1], fill_value=0)
+        rows_invalid = self.validation.rows_invalid if self.validation is not None else 0
+        mean_score = view["综合评分"].to_numpy(dtype=np.float64).mean() if len(view) else None
+        return build_summary(len(view), level_counts, mean_score, rows_invalid, weights)
+
+    def export_file(self, weights, fmt="csv", compression=None, dtypes=None):
+        """按指定权重分块导出到临时文件并返回路径，同一权重、同一格式只生成一次
+
+        Excel 导出包含 汇总 / 明细 / 校验错误 三个工作表。权重变化时旧的导出文件随之删除。
+        """
+        view = self.apply_weights(weights)
+        key = (fmt, compression)
+        path = self._exports.get(key)
+        if path is None or not os.path.exists(path):
+            errors = self.validation.errors if self.validation is not None else None
+            summary = self.summary(weights) if fmt == "xlsx" else None
+            path = export_to_tempfile(view, fmt, dtypes, compression, summary, errors)
+            self._exports[key] = path
+        return path
+
+    def existing_export(self, weights, fmt="csv", compression=None):
+        """按指定权重已生成的导出文件路径，尚未生成时返回 None（不触发导出）"""
+        if self._view is None or self._view_weights != dict(weights):
+            return None
+        path = self._exports.get((fmt, compression))
+        return path if path is not None and os.path.exists(path) else None
+
+    def clear_exports(self):
+        """删除已生成的导出文件"""
+        for path in self._exports.values():
+            if os.path.exists(path):
+                os.remove(path)
+        self._exports = {}
+
+
+def evaluate_scored_batch(df, weights_dict, evaluated_at=None, workers=1):
+    """批量评估并保留维度得分矩阵，供调整权重时即时重算；workers > 1 时使用多进程评分"""
+    scored = score_batch_parallel(df, weights_dict, workers)
+    return ScoredBatch(
+        build_result_frame(df, scored, evaluated_at),
+        dimension_matrix(scored["dimension_scores"]),
+        scored["has_negative"],
+        scored["invalid"],
+        weights_dict,
+    )
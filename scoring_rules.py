@@ -0,0 +1,274 @@
+"""
+评分规则表与规则编译器
+
+所有子项评分规则都以数据形式定义（指标 -> 规则），由编译器生成两种评分函数：
+- 标量函数：单个评估使用，与原先的 if 链逐项一致（含 NaN、非数值时的行为）
+- 列式函数：批量评估使用，基于 np.searchsorted / np.select 一次处理整列
+
+调整阈值只需修改下方规则表，单个评估与批量评估同时生效。
+综合评分到评级/合作建议的分档同样以数据定义（MODERN_TIERS），由 TierSpec 编译。
+
+规则类型：
+- steps：分段阈值。direction 为 ">=" 时 x >= 阈值即进入更高一档；为 "<=" 时
+  x <= 阈值即停留在较低一档。breaks 升序，scores 按 x 从小到大各档的得分
+  （比 breaks 多一个）。NaN 等无法比较的值落入"所有条件都不满足"的一档。
+- bands：按顺序匹配的条件区间。每条为 ({输入名: (下限, 上限)}, 得分)，上下限
+  均为闭区间，None 表示不限；全部不满足时取 default。
+- categories：类别映射，未列出的类别取 default。
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+# --- v3.0 现代化版评分规则 ---
+MODERN_RULES = {
+    # 1. 内容维度
+    "content_focus": {"kind": "steps", "direction": ">=", "breaks": [0.3, 0.5, 0.7, 0.8], "scores": [1, 2, 3, 4, 5]},
+    "viral_rate": {"kind": "steps", "direction": ">=", "breaks": [0.02, 0.05, 0.1, 0.15], "scores": [1, 2, 3, 4, 5]},
+    "completion_rate": {
+        "kind": "bands",
+        "inputs": ["video_ratio", "completion_rate"],
+        "bands": [
+            ({"video_ratio": (0.5, None), "completion_rate": (0.4, None)}, 5),
+            ({"video_ratio": (0.5, None), "completion_rate": (0.3, None)}, 4),
+            ({"video_ratio": (0.3, None), "completion_rate": (0.25, None)}, 3),
+            ({"completion_rate": (0.2, None)}, 2),
+        ],
+        "default": 1,
+    },
+    # 2. 数据维度
+    "cpe": {"kind": "steps", "direction": "<=", "breaks": [8, 15, 25, 40], "scores": [5, 4, 3, 2, 1]},
+    "cpm": {"kind": "steps", "direction": "<=", "breaks": [100, 200, 350, 500], "scores": [5, 4, 3, 2, 1]},
+    # 互动健康度 = 收藏占比得分 + 评论占比得分，再按总分分档
+    "collect_share": {"kind": "steps", "direction": ">=", "breaks": [0.1, 0.15, 0.25], "scores": [0, 1, 1.5, 2]},
+    "comment_share": {
+        "kind": "bands",
+        "inputs": ["comment_ratio"],
+        "bands": [
+            ({"comment_ratio": (0.05, 0.15)}, 2),
+            ({"comment_ratio": (0.03, 0.2)}, 1.5),
+            ({"comment_ratio": (0.03, None)}, 1),
+        ],
+        "default": 0,
+    },
+    "interaction_health": {"kind": "steps", "direction": ">=", "breaks": [0.5, 1.5, 2.5, 3.5], "scores": [1, 2, 3, 4, 5]},
+    "data_stability": {"kind": "steps", "direction": "<=", "breaks": [0.3, 0.5, 0.8, 1.2], "scores": [5, 4, 3, 2, 1]},
+    # 3. 粉丝维度
+    "audience_match": {"kind": "steps", "direction": ">=", "breaks": [0.5, 0.6, 0.7, 0.8], "scores": [1, 2, 3, 4, 5]},
+    "real_interaction": {"kind": "steps", "direction": ">=", "breaks": [0.6, 0.7, 0.8, 0.9], "scores": [1, 2, 3, 4, 5]},
+    "fan_activity": {"kind": "steps", "direction": ">=", "breaks": [0.8, 0.85, 0.9, 0.95], "scores": [1, 2, 3, 4, 5]},
+    # 4. 商业维度
+    "brand_level": {"kind": "steps", "direction": ">=", "breaks": [0.15, 0.25, 0.4, 0.6], "scores": [1, 2, 3, 4, 5]},
+    "commercial_balance": {"kind": "steps", "direction": "<=", "breaks": [0.15, 0.3, 0.45, 0.6], "scores": [5, 4, 3, 2, 1]},
+    # 5. 成长性维度（粉丝来源按 搜索占比 + 推荐占比 分档）
+    "growth_trend": {
+        "kind": "categories",
+        "scores": {"平稳上扬": 5, "缓慢增长": 3, "波动增长": 2, "停滞": 1, "异常陡增": 1},
+        "default": 1,
+    },
+    "fan_source": {"kind": "steps", "direction": ">=", "breaks": [0.15, 0.3, 0.5, 0.7], "scores": [1, 2, 3, 4, 5]},
+}
+
+# --- v2.0 专业版评分规则（只列出与 v3.0 不同的指标）---
+ADVANCED_RULES = dict(
+    MODERN_RULES,
+    cpe={"kind": "steps", "direction": "<=", "breaks": [10, 20, 35, 50], "scores": [5, 4, 3, 2, 1]},
+    cpm={"kind": "steps", "direction": "<=", "breaks": [150, 250, 400, 600], "scores": [5, 4, 3, 2, 1]},
+    data_stability={"kind": "steps", "direction": "<=", "breaks": [0.5, 0.8, 1.2, 1.8], "scores": [5, 4, 3, 2, 1]},
+    brand_level={"kind": "steps", "direction": ">=", "breaks": [0.1, 0.3, 0.5, 0.7], "scores": [1, 2, 3, 4, 5]},
+    commercialization=MODERN_RULES["commercial_balance"],
+    growth_trend={
+        "kind": "categories",
+        "scores": {"平稳上扬": 5, "缓慢增长": 4, "波动增长": 3, "停滞": 2, "异常陡增": 1},
+        "default": 1,
+    },
+)
+
+
+# --- 评级规则：综合评分分档 -> 评级、合作建议与评分卡片样式 ---
+# breaks 升序，评分 >= 阈值即进入更高一档；levels/recommendations/styles 按档位从低到高排列
+MODERN_TIERS = {
+    "breaks": [2.5, 3.0, 3.5, 4.0, 4.5],
+    "levels": ["D级", "C级", "B级", "A级", "A+级", "S级"],
+    "recommendations": [
+        "❌ D级 - 不建议合作",
+        "⚠️ C级 - 谨慎考虑",
+        "👍 B级 - 备选人选，考虑合作",
+        "✅ A级 - 良好人选，推荐合作",
+        "🏆 A+级 - 优质人选，优先合作",
+        "💎 S级 - 顶级人选，立即签约",
+    ],
+    "styles": ["score-d", "score-d", "score-c", "score-b", "score-a", "score-s"],
+    # 存在负面舆情时不论评分高低都使用此建议
+    "risk_recommendation": "❌ 高风险 - 不建议合作",
+}
+
+
+# --- 规则编译 ---
+def _check_steps(name, rule):
+    breaks, scores = rule["breaks"], rule["scores"]
+    if rule["direction"] not in (">=", "<="):
+        raise ValueError(f"{name}: direction 只能是 '>=' 或 '<='")
+    if list(breaks) != sorted(breaks):
+        raise ValueError(f"{name}: breaks 必须升序")
+    if len(scores) != len(breaks) + 1:
+        raise ValueError(f"{name}: scores 应比 breaks 多一个")
+
+
+def _score_dtype(scores):
+    """得分全为整数时使用 int8，否则使用 float64"""
+    if all(float(s).is_integer() for s in scores):
+        return np.int8
+    return np.float64
+
+
+def _in_range(value, bounds):
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _array_in_range(values, bounds):
+    low, high = bounds
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def compile_scalar(name, rule):
+    """规则 -> 标量评分函数"""
+    kind = rule["kind"]
+    if kind == "steps":
+        _check_steps(name, rule)
+        breaks, scores = list(rule["breaks"]), list(rule["scores"])
+        if rule["direction"] == ">=":
+            # 越过的阈值个数即档位；NaN 不满足任何条件，落在最低档
+            def score(value):
+                if value != value:
+                    return scores[0]
+                return scores[bisect_right(breaks, value)]
+        else:
+            def score(value):
+                if value != value:
+                    return scores[-1]
+                return scores[bisect_left(breaks, value)]
+    elif kind == "bands":
+        inputs, bands, default = rule["inputs"], rule["bands"], rule["default"]
+
+        def score(*values):
+            named = dict(zip(inputs, values))
+            for conditions, band_score in bands:
+                if all(_in_range(named[key], bounds) for key, bounds in conditions.items()):
+                    return band_score
+            return default
+    elif kind == "categories":
+        mapping, default = dict(rule["scores"]), rule["default"]
+
+        def score(value):
+            return mapping.get(value, default)
+    else:
+        raise ValueError(f"{name}: 未知的规则类型 {kind}")
+
+    score.__name__ = f"score_{name}"
+    return score
+
+
+def compile_array(name, rule):
+    """规则 -> 列式评分函数（输入 float64 数组，返回 int8/float64 数组）"""
+    kind = rule["kind"]
+    if kind == "steps":
+        _check_steps(name, rule)
+        breaks = np.asarray(rule["breaks"], dtype=np.float64)
+        scores = np.asarray(rule["scores"], dtype=_score_dtype(rule["scores"]))
+        side, unmatched = ("right", 0) if rule["direction"] == ">=" else ("left", len(breaks))
+
+        def score(values):
+            values = np.asarray(values, dtype=np.float64)
+            positions = np.searchsorted(breaks, values, side=side)
+            positions[np.isnan(values)] = unmatched
+            return scores[positions]
+    elif kind == "bands":
+        inputs, bands, default = rule["inputs"], rule["bands"], rule["default"]
+        dtype = _score_dtype([band_score for _, band_score in bands] + [default])
+
+        def score(*values):
+            named = {key: np.asarray(v, dtype=np.float64) for key, v in zip(inputs, values)}
+            length = len(next(iter(named.values())))
+            conditions = [
+                np.logical_and.reduce(
+                    [_array_in_range(named[key], bounds) for key, bounds in band.items()]
+                    + [np.ones(length, dtype=bool)]
+                )
+                for band, _ in bands
+            ]
+            return np.select(conditions, [band_score for _, band_score in bands], default=default).astype(dtype)
+    elif kind == "categories":
+        mapping, default = dict(rule["scores"]), rule["default"]
+        dtype = _score_dtype(list(mapping.values()) + [default])
+
+        def score(values):
+            mapped = pd.Series(values, dtype=object).map(mapping)
+            return mapped.fillna(default).to_numpy(dtype=dtype)
+    else:
+        raise ValueError(f"{name}: 未知的规则类型 {kind}")
+
+    score.__name__ = f"score_{name}_array"
+    return score
+
+
+def compile_rules(rules):
+    """编译整张规则表，返回 (标量函数字典, 列式函数字典)"""
+    scalar = {name: compile_scalar(name, rule) for name, rule in rules.items()}
+    vectorized = {name: compile_array(name, rule) for name, rule in rules.items()}
+    return scalar, vectorized
+
+
+class TierSpec:
+    """编译后的评级规则：一次分档查找得到整列评级编号与建议编号
+
+    评级编号 0..n-1 对应 levels；建议编号 0..n-1 对应各评级的建议，n 为高风险，
+    之后依次为 extra_recommendations（如数据不完整时的兜底建议）。
+    """
+
+    def __init__(self, spec, extra_recommendations=()):
+        _check_steps("tiers", {"direction": ">=", "breaks": spec["breaks"], "scores": spec["levels"]})
+        if len(spec["recommendations"]) != len(spec["levels"]):
+            raise ValueError("tiers: recommendations 应与 levels 一一对应")
+        self.breaks = np.asarray(spec["breaks"], dtype=np.float64)
+        self.levels = np.array(spec["levels"], dtype=object)
+        self.styles = list(spec.get("styles") or [""] * len(self.levels))
+        self.recommendations = np.array(
+            list(spec["recommendations"]) + [spec["risk_recommendation"]] + list(extra_recommendations), dtype=object)
+        self.risk_code = len(self.levels)
+
+    def level_codes(self, final_scores):
+        """综合评分数组 -> 评级编号（int8）；NaN 不满足任何阈值，落在最低档"""
+        final_scores = np.asarray(final_scores, dtype=np.float64)
+        codes = np.searchsorted(self.breaks, final_scores, side="right").astype(np.int8)
+        codes[np.isnan(final_scores)] = 0
+        return codes
+
+    def assign(self, final_scores, has_risk=None):
+        """综合评分数组 -> (评级编号, 建议编号)；has_risk 为真的行建议改为高风险"""
+        level_codes = self.level_codes(final_scores)
+        if has_risk is None:
+            return level_codes, level_codes.copy()
+        return level_codes, np.where(has_risk, np.int8(self.risk_code), level_codes)
+
+    # 单个评估：与列式分档使用同一组阈值
+    def level_code(self, final_score):
+        if final_score != final_score:
+            return 0
+        return bisect_right(self.breaks, final_score)
+
+    def level(self, final_score):
+        return self.levels[self.level_code(final_score)]
+
+    def recommendation(self, final_score, has_risk=False):
+        return self.recommendations[self.risk_code if has_risk else self.level_code(final_score)]
+
+    def style(self, final_score):
+        return self.styles[self.level_code(final_score)]
@@ -0,0 +1,270 @@
+"""
+合成达人池数据生成器（压测与规模测试用）
+
+真实达人数据不能外传，仓库只带五行的数据模板。本工具按批量评估的输入列（INPUT_SCHEMA）
+生成任意规模的达人池，用于在本地复现各项性能数据：
+- 同一 seed 生成的数据完全一致（按固定行数分块，每块使用独立的随机数流）
+- 整列向量化生成，指标之间相关：每个达人有一个潜在"质量"分，爆文率、完播率、真实互动率
+  等随之升高，CPE/CPM、数据稳定性系数随之降低；粉丝数为对数正态分布
+- 可设置缺失值比例与脏数据比例（超出范围、负成本、未知增长趋势、非法舆情标记、空昵称），
+  用于覆盖校验路径；text_rate 另外在 CPE 列写入"暂无"等文本。注意：数值列中出现文本时，
+  读取后整列都是文本，整列都不能通过校验，这正是该选项要复现的情况
+- CSV / Parquet / Arrow 直接由 Arrow 表写出，千万行数秒内即可生成
+
+用法示例:
+    python synthetic_data.py 1000000 -o 达人池_100万.parquet
+    python synthetic_data.py 10000000 -o 达人池_1000万.csv --seed 7
+    python synthetic_data.py 200000 -o 脏数据.csv --missing-rate 0.02 --dirty-rate 0.01 --percent
+    python synthetic_data.py 200000 -o 文本混入.csv --text-rate 0.001
+    python synthetic_data.py 50000 -o 专业版达人池.xlsx --schema advanced
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+import advanced_batch_scoring
+import batch_scoring
+from batch_io import FILE_FORMATS, ResultWriter, detect_format
+from scoring_rules import MODERN_RULES
+
+# 每块行数：分块只影响内存占用；块内随机数流由 (seed, 块序号) 决定，与写出方式无关
+GENERATE_CHUNKSIZE = 1_000_000
+
+SCHEMAS = {
+    "modern": batch_scoring.INPUT_SCHEMA,
+    "advanced": advanced_batch_scoring.INPUT_SCHEMA,
+}
+
+GROWTH_TRENDS = list(MODERN_RULES["growth_trend"]["scores"])
+
+# --- 占比类指标：logistic(中心 + 质量载荷 * 质量 + 噪声标准差 * 噪声) ---
+# 中心取 logit(典型值)，典型值与数据模板中的示例相当
+RATIO_PARAMS = {
+    "vertical_ratio": (1.1, 0.5, 0.6),
+    "viral_ratio": (-2.2, 0.6, 0.7),
+    "video_ratio": (0.4, 0.1, 0.9),
+    "completion_rate": (-0.6, 0.4, 0.5),
+    "collect_ratio": (-0.95, 0.3, 0.5),
+    "comment_ratio": (-2.4, 0.2, 0.5),
+    "audience_match": (1.1, 0.4, 0.6),
+    "real_interaction": (1.5, 0.5, 0.5),
+    "fan_activity": (2.2, 0.4, 0.5),
+    "high_end_ratio": (-0.6, 0.5, 0.8),
+    "commercial_ratio": (-0.95, -0.3, 0.6),
+    "search_ratio": (-0.85, 0.3, 0.5),
+    "recommend_ratio": (-0.4, 0.3, 0.5),
+}
+
+# --- 正值指标：exp(ln(中位数) + 质量载荷 * 质量 + 噪声标准差 * 噪声) ---
+POSITIVE_PARAMS = {
+    "cpe": (16.0, -0.35, 0.4),
+    "stability": (0.6, -0.3, 0.4),
+}
+# CPM 与 CPE 相关：ln(CPM) = ln(200) + 0.5 * (ln(CPE) - ln(16)) + 0.25 * 噪声
+CPM_MEDIAN, CPM_CPE_LOADING, CPM_NOISE = 200.0, 0.5, 0.25
+
+# 粉丝数：log10 正态分布（中位数约 5 万），截断在 [500, 5000万]
+FOLLOWERS_LOG10 = (4.7, 0.6)
+FOLLOWERS_RANGE = (500, 50_000_000)
+
+NEGATIVE_RATE = 0.02
+ABNORMAL_GROWTH_RATE = 0.03
+
+# 脏数据种类：每个脏行随机取一种
+DIRTY_KINDS = ["ratio_out_of_range", "negative_cost", "unknown_trend", "invalid_flag", "blank_name"]
+DIRTY_TEXT = "暂无"
+UNKNOWN_TREND = "未知"
+
+
+def _logistic(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _normal(rng, rows):
+    return rng.standard_normal(rows, dtype=np.float32).astype(np.float64)
+
+
+def _growth_trend_codes(rng, quality, rows):
+    """增长趋势按质量分档，少量随机行为"异常陡增\""""
+    trend = 0.6 * quality + 0.8 * _normal(rng, rows)
+    # 分档边界对应 平稳上扬 / 缓慢增长 / 波动增长 / 停滞
+    codes = np.searchsorted([-0.8, 0.0, 0.8], trend).astype(np.int8)
+    codes = np.array([GROWTH_TRENDS.index(t) for t in ["停滞", "波动增长", "缓慢增长", "平稳上扬"]],
+                     dtype=np.int8)[codes]
+    codes[rng.random(rows) < ABNORMAL_GROWTH_RATE] = GROWTH_TRENDS.index("异常陡增")
+    return codes
+
+
+def generate_chunk(rows, rng, start=0, missing_rate=0.0, dirty_rate=0.0, text_rate=0.0, percent=False,
+                   schema="modern"):
+    """生成一块达人数据（Arrow 表），列名与 schema 对应评分引擎的标准列名一致
+
+    start 为本块第一行的序号（用于生成唯一昵称）；percent 为 True 时占比列写成 0-100 的百分数。
+    """
+    quality = _normal(rng, rows)
+    columns = {}
+
+    log_followers = FOLLOWERS_LOG10[0] + 0.15 * quality + FOLLOWERS_LOG10[1] * _normal(rng, rows)
+    columns["followers"] = np.clip(np.rint(10 ** log_followers), *FOLLOWERS_RANGE)
+
+    for key, (center, loading, noise) in RATIO_PARAMS.items():
+        values = _logistic(center + loading * quality + noise * _normal(rng, rows))
+        columns[key] = np.round(values * 100, 2) if percent else np.round(values, 4)
+
+    for key, (median, loading, noise) in POSITIVE_PARAMS.items():
+        columns[key] = np.round(np.exp(np.log(median) + loading * quality + noise * _normal(rng, rows)), 2)
+    columns["cpm"] = np.round(np.exp(
+        np.log(CPM_MEDIAN) + CPM_CPE_LOADING * (np.log(columns["cpe"]) - np.log(POSITIVE_PARAMS["cpe"][0]))
+        + CPM_NOISE * _normal(rng, rows)), 2)
+
+    trend_codes = _growth_trend_codes(rng, quality, rows)
+    risk = rng.random(rows) < NEGATIVE_RATE * np.exp(-0.5 * quality)
+    columns["has_negative"] = risk.astype(np.int8)
+
+    # 缺失值：各指标列独立抽样（昵称不缺失，空昵称属于脏数据）
+    nulls = {}
+    if missing_rate > 0:
+        for key in list(columns) + ["growth_trend"]:
+            nulls[key] = rng.random(rows) < missing_rate
+
+    # 脏数据：每个脏行随机改坏一个值
+    dirty = {}
+    if dirty_rate > 0:
+        positions = np.flatnonzero(rng.random(rows) < dirty_rate)
+        kinds = rng.integers(0, len(DIRTY_KINDS), len(positions))
+        dirty = {kind: positions[kinds == i] for i, kind in enumerate(DIRTY_KINDS)}
+        ratio_keys = list(RATIO_PARAMS)
+        bad_ratio = dirty["ratio_out_of_range"]
+        ratio_choice = rng.integers(0, len(ratio_keys), len(bad_ratio))
+        for i, key in enumerate(ratio_keys):
+            # 写成负数：大于 1 的值会让整列被识别为百分数，而不是报错
+            columns[key][bad_ratio[ratio_choice == i]] = -20.0 if percent else -0.2
+        columns["cpe"][dirty["negative_cost"]] = -5.0
+        columns["has_negative"][dirty["invalid_flag"]] = 2
+
+    arrays = {}
+    names = pc.binary_join_element_wise("达人", pc.cast(pa.array(np.arange(start + 1, start + rows + 1)), pa.string()), "")
+    if dirty.get("blank_name") is not None and len(dirty["blank_name"]):
+        blank = np.zeros(rows, dtype=bool)
+        blank[dirty["blank_name"]] = True
+        names = pc.if_else(pa.array(blank), pa.scalar(None, pa.string()), names)
+    arrays["name"] = names
+
+    for key, values in columns.items():
+        dtype = pa.int64() if key in ("followers", "has_negative") else pa.float64()
+        arrays[key] = pa.array(values.astype(np.int64) if dtype == pa.int64() else values,
+                               type=dtype, mask=nulls.get(key))
+
+    trends = pa.array(np.array(GROWTH_TRENDS + [UNKNOWN_TREND], dtype=object))
+    if dirty.get("unknown_trend") is not None:
+        trend_codes[dirty["unknown_trend"]] = len(GROWTH_TRENDS)
+    arrays["growth_trend"] = pa.DictionaryArray.from_arrays(
+        pa.array(trend_codes, mask=nulls.get("growth_trend")), trends).cast(pa.string())
+
+    # 非数值文本：CPE 列整列转为文本（只要启用就转换，使各块的列类型一致）
+    if text_rate > 0:
+        text = pa.array(rng.random(rows) < text_rate)
+        arrays["cpe"] = pc.if_else(text, pa.scalar(DIRTY_TEXT), pc.cast(arrays["cpe"], pa.string()))
+
+    return pa.table({column: arrays[key] for key, column in SCHEMAS[schema].spec})
+
+
+def iter_pool(rows, seed=0, **options):
+    """按块生成 rows 行达人数据，逐块返回 Arrow 表；同一 seed 结果完全一致"""
+    chunks = -(-rows // GENERATE_CHUNKSIZE)
+    for index, chunk_seed in enumerate(np.random.SeedSequence(seed).spawn(chunks)):
+        start = index * GENERATE_CHUNKSIZE
+        yield generate_chunk(min(GENERATE_CHUNKSIZE, rows - start), np.random.default_rng(chunk_seed), start,
+                             **options)
+
+
+def generate_pool(rows, seed=0, **options):
+    """生成 rows 行达人数据并返回 DataFrame（文本列为 Arrow 字符串）"""
+    tables = list(iter_pool(rows, seed, **options))
+    if not tables:
+        return generate_chunk(0, np.random.default_rng(seed), **options).to_pandas()
+    return pa.concat_tables(tables).to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def _open_writer(path, fmt, schema):
+    """CSV 带 BOM（与结果导出一致），Parquet / Arrow 使用 zstd 压缩；返回 (写出器, 文件)"""
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd"), None
+    sink = pa.OSFile(path, "wb")
+    if fmt == "csv":
+        sink.write("\ufeff".encode("utf-8"))
+        return pacsv.CSVWriter(sink, schema), sink
+    return pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")), sink
+
+
+def write_pool(path, rows, seed=0, fmt=None, **options):
+    """生成达人数据并逐块写入文件，返回写出的行数；格式按扩展名判断"""
+    fmt = fmt or detect_format(path)
+    if fmt == "xlsx":
+        # Excel 复用结果写出器（逐行写出，较慢，适合十万行以内的数据）
+        writer = ResultWriter(path, fmt)
+        for table in iter_pool(rows, seed, **options):
+            writer.write(table.to_pandas())
+        writer.close()
+        return writer.rows
+
+    writer, sink, written = None, None, 0
+    for table in iter_pool(rows, seed, **options):
+        if writer is None:
+            writer, sink = _open_writer(path, fmt, table.schema)
+        writer.write_table(table)
+        written += table.num_rows
+    if writer is not None:
+        writer.close()
+    if sink is not None:
+        sink.close()
+    return written
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="生成合成达人池数据（压测与规模测试用）")
+    parser.add_argument("rows", type=int, help="生成的行数")
+    parser.add_argument("-o", "--output", required=True,
+                        help=f"输出文件，格式按扩展名判断（{', '.join(FILE_FORMATS)}）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子生成的数据完全一致（默认: 0）")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="各指标列的缺失值比例（默认: 0）")
+    parser.add_argument("--dirty-rate", type=float, default=0.0, help="含脏数据的行比例（默认: 0）")
+    parser.add_argument("--text-rate", type=float, default=0.0,
+                        help="CPE 列写入文本（暂无）的行比例；读取后整列为文本，整列不能通过校验（默认: 0）")
+    parser.add_argument("--percent", action="store_true", help="占比列写成 0-100 的百分数（默认写成 0-1 的小数）")
+    parser.add_argument("--schema", choices=list(SCHEMAS), default="modern",
+                        help="列名使用 v3.0 (modern) 或 v2.0 (advanced) 的标准列名（默认: modern）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    path = args.output
+    try:
+        fmt = detect_format(path)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    for name in ("missing_rate", "dirty_rate", "text_rate"):
+        if not 0 <= getattr(args, name) <= 1:
+            print(f"--{name.replace('_', '-')} 应在 0-1 之间", file=sys.stderr)
+            return 2
+
+    started = time.perf_counter()
+    rows = write_pool(path, args.rows, args.seed, fmt, missing_rate=args.missing_rate,
+                      dirty_rate=args.dirty_rate, text_rate=args.text_rate, percent=args.percent,
+                      schema=args.schema)
+    elapsed = time.perf_counter() - started
+    print(f"已生成 {rows:,} 行 -> {path}（{elapsed:.1f} 秒，{rows / max(elapsed, 1e-9):,.0f} 行/秒）", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+v2.0 批量评分引擎与逐行标量评分的一致性测试
+"""
+import numpy as np
+
+from advanced_batch_scoring import ADVANCED_INPUTS, DIMENSION_LABELS, SCALAR_SCORERS, evaluate_batch
+from batch_scoring import DEFAULT_WEIGHTS, DIMENSIONS, TIERS, comprehensive_evaluation
+
+SEED = 20240901
+ROWS = 20_000
+
+
+def _scalar_row(row, weights):
+    """逐行评估的参考实现：各维度得分为子项得分的平均值"""
+    s = SCALAR_SCORERS
+    value = {key: row.get(column, default) for key, column, default in ADVANCED_INPUTS}
+    interaction = s["collect_share"](value["collect_ratio"]) + s["comment_share"](value["comment_ratio"])
+    scores = {
+        "content": (s["content_focus"](value["vertical_ratio"]) + s["viral_rate"](value["viral_ratio"])
+                    + s["completion_rate"](value["video_ratio"], value["completion_rate"])) / 3,
+        "data": (s["cpe"](value["cpe"]) + s["cpm"](value["cpm"]) + s["interaction_health"](interaction)
+                 + s["data_stability"](value["stability"])) / 4,
+        "audience": (s["audience_match"](value["audience_match"]) + s["real_interaction"](value["real_interaction"])
+                     + s["fan_activity"](value["fan_activity"])) / 3,
+        "business": (s["brand_level"](value["high_end_ratio"]) + s["commercialization"](value["commercial_ratio"])) / 2,
+        "growth": (s["growth_trend"](row.get("粉丝增长趋势", "平稳上扬"))
+                   + s["fan_source"](value["search_ratio"] + value["recommend_ratio"])) / 2,
+    }
+    final_score = comprehensive_evaluation(scores, weights)
+    return final_score, TIERS.recommendation(final_score, bool(row.get("负面舆情", False))), scores
+
+
+def test_batch_matches_scalar(creator_pool, score_frame):
+    pool = creator_pool(ROWS, SEED, schema="advanced")
+    result = score_frame(evaluate_batch, pool)
+    final_scores, recommendations = [], []
+    dimensions = {key: [] for key in DIMENSIONS}
+    for row in pool.to_dict("records"):
+        final_score, recommendation, scores = _scalar_row(row, DEFAULT_WEIGHTS)
+        final_scores.append(round(final_score, 2))
+        recommendations.append(recommendation)
+        for key in DIMENSIONS:
+            dimensions[key].append(round(scores[key], 2))
+
+    assert result["综合评分"].tolist() == final_scores
+    assert list(result["推荐等级"]) == recommendations
+    for key in DIMENSIONS:
+        assert result[DIMENSION_LABELS[key]].tolist() == dimensions[key], key
+    np.testing.assert_array_equal(result.index, pool.index)
@@ -0,0 +1,125 @@
+"""
+结果导出测试：各格式分块写出后读回的内容与原结果表一致
+"""
+import gzip
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+import batch_io
+from batch_io import (ResultWriter, SessionExport, build_summary, count_rows, export_filename, export_frame,
+                      iter_table_chunks, read_table)
+from batch_scoring import DEFAULT_WEIGHTS, evaluate_batch
+from result_store import MODERN_RESULT_SCHEMA, widen_frame
+
+
+@pytest.fixture(scope="module")
+def results(creator_pool, score_frame):
+    return score_frame(evaluate_batch, creator_pool(1200, 5, missing_rate=0.02))
+
+
+def _expected(results):
+    """读回时的预期值：评分按两位小数还原为 float64，其余列按对象比较"""
+    return widen_frame(results).reset_index(drop=True).astype(object).where(results.notna().to_numpy(), None)
+
+
+def _compare(frame, results):
+    # Parquet/Arrow 按 float32 读回，与界面一样按两位小数还原
+    frame = widen_frame(frame)
+    frame = frame.astype(object).where(frame.notna(), None)
+    expected = _expected(results)
+    assert list(frame.columns) == list(expected.columns)
+    for column in expected.columns:
+        if column in ("粉丝数", "综合评分") or column.endswith("维度"):
+            np.testing.assert_array_equal(frame[column].astype(float), expected[column].astype(float), column)
+        else:
+            assert frame[column].astype(str).tolist() == expected[column].astype(str).tolist(), column
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zip"])
+def test_csv_export_in_chunks(tmp_path, results, compression):
+    path = tmp_path / export_filename("结果", "csv", compression)
+    export_frame(str(path), results, "csv", MODERN_RESULT_SCHEMA, compression, chunksize=500)
+    if compression == "gzip":
+        with gzip.open(path, "rb") as f:
+            frame = pd.read_csv(f, encoding="utf-8-sig")
+    elif compression == "zip":
+        with zipfile.ZipFile(path) as archive:
+            assert archive.namelist() == ["结果.csv"]
+            with archive.open("结果.csv") as f:
+                frame = pd.read_csv(f, encoding="utf-8-sig")
+    else:
+        frame = pd.read_csv(path, encoding="utf-8-sig")
+    assert len(frame) == len(results)
+    _compare(frame, results)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_export_uses_one_schema(tmp_path, results, fmt):
+    path = tmp_path / export_filename("结果", fmt)
+    export_frame(str(path), results, fmt, MODERN_RESULT_SCHEMA, chunksize=500)
+    frame = read_table(str(path), fmt)
+    assert frame["综合评分"].dtype == np.float32
+    _compare(frame, results)
+
+
+def test_arrow_reads_only_wanted_columns(tmp_path, results):
+    path = str(tmp_path / export_filename("结果", "arrow"))
+    export_frame(path, results, "arrow", MODERN_RESULT_SCHEMA, chunksize=500)
+    columns = ["综合评分", "达人昵称", "不存在的列"]
+    frame = read_table(path, "arrow", columns)
+    assert list(frame.columns) == ["达人昵称", "综合评分"]
+    with open(path, "rb") as f:
+        chunks = list(iter_table_chunks(f, "arrow", chunksize=700, first_chunksize=100, columns=columns))
+        f.seek(0)
+        assert count_rows(f, "arrow") == len(results)
+    pd.testing.assert_frame_equal(pd.concat(chunks), frame)
+    assert [len(chunk) for chunk in chunks[:2]] == [100, 700]
+
+
+def test_excel_details_overflow_to_more_sheets(tmp_path, results, monkeypatch):
+    monkeypatch.setattr(batch_io, "EXCEL_MAX_ROWS", 501)  # 每个工作表 1 行表头 + 500 行明细
+    path = tmp_path / "结果.xlsx"
+    summary = build_summary(len(results), weights=DEFAULT_WEIGHTS)
+    errors = pd.DataFrame({"行号": [3], "列": ["CPE"], "值": ["-1"], "原因": ["小于 0"]})
+    export_frame(str(path), results, "xlsx", MODERN_RESULT_SCHEMA, summary=summary, errors=errors, chunksize=300)
+
+    workbook = load_workbook(path)
+    assert workbook.sheetnames == ["汇总", "明细", "明细2", "明细3", "校验错误"]
+    assert [workbook[name].max_row for name in ("明细", "明细2", "明细3")] == [501, 501, 201]
+    details = pd.concat(pd.read_excel(path, sheet_name=name) for name in ("明细", "明细2", "明细3"))
+    _compare(details.reset_index(drop=True), results)
+    assert pd.read_excel(path, sheet_name="汇总")["项目"].iloc[0] == "评分行数"
+
+
+def test_empty_excel_export_still_has_details_sheet(tmp_path):
+    path = tmp_path / "空.xlsx"
+    with ResultWriter(str(path)) as writer:
+        assert writer.fmt == "xlsx"
+    assert load_workbook(path).sheetnames == ["明细"]
+
+
+def test_writer_rejects_unsupported_options(tmp_path):
+    with pytest.raises(ValueError, match="只有 CSV 支持压缩"):
+        ResultWriter(str(tmp_path / "a.parquet"), compression="gzip")
+    with pytest.raises(ValueError, match="不支持的文件格式"):
+        ResultWriter(str(tmp_path / "a.txt"))
+    with ResultWriter(str(tmp_path / "a.csv")) as writer, pytest.raises(ValueError, match="多个工作表"):
+        writer.write_sheet("汇总", pd.DataFrame())
+
+
+def test_session_export_replaces_stale_file(results):
+    export = SessionExport()
+    assert export.existing((1, "csv")) is None
+    path = export.create((1, "csv"), results, "csv", MODERN_RESULT_SCHEMA)
+    assert export.existing((1, "csv")) == path
+    _compare(read_table(path, "csv"), results)
+    # 内容版本变化后旧文件删除，需要重新生成
+    assert export.existing((2, "csv")) is None and not os.path.exists(path)
+    path = export.create((2, "csv"), results, "csv", MODERN_RESULT_SCHEMA)
+    del export
+    assert not os.path.exists(path)
@@ -0,0 +1,92 @@
+"""
+批量评分引擎与逐行标量评分的一致性测试
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import (
+    BATCH_INPUTS,
+    DEFAULT_WEIGHTS,
+    DIMENSION_LABELS,
+    DIMENSIONS,
+    SCALAR_SCORERS,
+    TIERS,
+    comprehensive_evaluation,
+    evaluate_batch,
+)
+from result_store import round_scores
+
+SEED = 20240901
+ROWS = 20_000
+
+
+def _scalar_row(row, weights):
+    """逐行评估的参考实现：与原 modern_evaluator 批量评估循环相同的计算顺序"""
+    s = SCALAR_SCORERS
+    value = {key: row.get(column, default) for key, column, default in BATCH_INPUTS}
+    interaction = s["collect_share"](value["collect_ratio"]) + s["comment_share"](value["comment_ratio"])
+    scores = {
+        "content": (
+            s["content_focus"](value["vertical_ratio"]) * 0.4 +
+            s["viral_rate"](value["viral_ratio"]) * 0.3 +
+            s["completion_rate"](value["video_ratio"], value["completion_rate"]) * 0.3
+        ),
+        "data": (
+            s["cpe"](value["cpe"]) * 0.25 +
+            s["cpm"](value["cpm"]) * 0.25 +
+            s["interaction_health"](interaction) * 0.25 +
+            s["data_stability"](value["stability"]) * 0.25
+        ),
+        "audience": (
+            s["audience_match"](value["audience_match"]) * 0.4 +
+            s["real_interaction"](value["real_interaction"]) * 0.3 +
+            s["fan_activity"](value["fan_activity"]) * 0.3
+        ),
+        "business": (
+            s["brand_level"](value["high_end_ratio"]) * 0.6 +
+            s["commercial_balance"](value["commercial_ratio"]) * 0.4
+        ),
+        "growth": (
+            s["growth_trend"](row.get("增长趋势", "平稳上扬")) * 0.6 +
+            s["fan_source"](value["search_ratio"] + value["recommend_ratio"]) * 0.4
+        ),
+    }
+    final_score = comprehensive_evaluation(scores, weights)
+    has_negative = bool(row.get("负面舆情", False))
+    return final_score, TIERS.level(final_score), TIERS.recommendation(final_score, has_negative), scores
+
+
+@pytest.mark.parametrize("weights", [
+    DEFAULT_WEIGHTS,
+    {"content": 0.3, "data": 0.1, "audience": 0.35, "business": 0.05, "growth": 0.2},
+])
+def test_batch_matches_scalar(creator_pool, score_frame, weights):
+    pool = creator_pool(ROWS, SEED)
+    result = score_frame(evaluate_batch, pool, weights)
+    expected = {name: [] for name in ["综合评分", "评级", "建议"] + list(DIMENSION_LABELS.values())}
+    for row in pool.to_dict("records"):
+        final_score, level, recommendation, scores = _scalar_row(row, weights)
+        expected["综合评分"].append(round(final_score, 2))
+        expected["评级"].append(level)
+        expected["建议"].append(recommendation)
+        for key in DIMENSIONS:
+            expected[DIMENSION_LABELS[key]].append(round(scores[key], 2))
+
+    for name, values in expected.items():
+        if name in ("评级", "建议"):
+            assert result[name].astype(object).tolist() == values, name
+        else:
+            # 结果表以 float32 保存两位小数的评分
+            np.testing.assert_array_equal(result[name].to_numpy(), np.float32(values), err_msg=name)
+
+
+def test_round_scores_matches_builtin_round():
+    rng = np.random.default_rng(SEED)
+    # 十进制"五"（3.445、2.675 等）最容易与 round() 不一致，另加随机值与特殊值
+    ties = np.arange(0, 5001) / 1000 + 0.005
+    values = np.concatenate([ties, rng.uniform(0, 5, 10_000), rng.integers(0, 500, 1000) / 100,
+                             [3.445, 2.675, 0.125, 0.375, -1.005, 0.0, 1e6 + 0.005]])
+    expected = [round(value, 2) for value in values.tolist()]
+    assert round_scores(values).tolist() == expected
+    assert np.isnan(round_scores(np.array([np.nan]))[0])
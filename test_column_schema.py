@@ -0,0 +1,83 @@
+"""
+列映射测试：表头别名、百分号标注与占比单位的自动判断
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import INPUT_SCHEMA
+from column_schema import header_is_percent, normalize_header
+
+
+@pytest.mark.parametrize("header, normalized, percent", [
+    ("完播率(%)", "完播率", True),
+    (" 完播率（％） ", "完播率", True),
+    ("完播率%", "完播率", True),
+    ("cpe", "CPE", False),
+    ("完播率", "完播率", False),
+])
+def test_normalize_header(header, normalized, percent):
+    assert normalize_header(header) == normalized
+    assert header_is_percent(header) is percent
+
+
+def test_aliases_map_to_standard_columns():
+    df = pd.DataFrame({"昵称": ["a"], "平均完播率": [0.4], "单次互动成本": [12.0], "无关列": [1]})
+    assert "平均完播率" in INPUT_SCHEMA and "无关列" not in INPUT_SCHEMA
+    result = INPUT_SCHEMA.normalize(df)
+    assert list(result.columns) == ["达人昵称", "完播率", "CPE", "无关列"]
+    mapping = result.attrs["column_mapping"]
+    assert mapping.renames == {"昵称": "达人昵称", "平均完播率": "完播率", "单次互动成本": "CPE"}
+    assert mapping.percent_columns == []
+    assert list(df.columns) == ["昵称", "平均完播率", "单次互动成本", "无关列"]  # 不修改原表
+
+
+def test_duplicate_aliases_keep_first_column():
+    df = pd.DataFrame({"完播率": [0.3], "平均完播率": [0.9]})
+    result = INPUT_SCHEMA.normalize(df)
+    assert result["完播率"].tolist() == [0.3]
+    assert result.attrs["column_mapping"].dropped == ["平均完播率"]
+
+
+def test_percent_detection_per_column_and_per_file():
+    df = pd.DataFrame({
+        "爆文率(%)": [0.5, 0.8],      # 表头标注百分号：即使数值不超过 1 也按百分数
+        "完播率": [35.0, 40.0],       # 存在大于 1 的数值
+        "收藏占比": [30, 25],
+        "视频占比": [60, 70],
+        "评论占比": [0.8, 1.0],       # 本身不超过 1，但文件中多数占比列为百分数
+        "CPE": [15.0, 18.0],          # 非占比列不换算
+    })
+    result = INPUT_SCHEMA.normalize(df)
+    assert sorted(result.attrs["column_mapping"].percent_columns) == sorted(["爆文率", "完播率", "收藏占比", "视频占比", "评论占比"])
+    np.testing.assert_allclose(result["完播率"], [0.35, 0.4])
+    np.testing.assert_allclose(result["评论占比"], [0.008, 0.01])
+    np.testing.assert_allclose(result["爆文率"], [0.005, 0.008])
+    assert result["CPE"].tolist() == [15.0, 18.0]
+
+
+def test_ratio_file_is_left_unchanged():
+    df = pd.DataFrame({"完播率": [0.35, np.nan], "收藏占比": [0.3, 0.2], "评论占比": ["暂无", 0.08]})
+    result = INPUT_SCHEMA.normalize(df)
+    assert result.attrs["column_mapping"].percent_columns == []
+    pd.testing.assert_frame_equal(result, df, check_like=True)
+
+
+def test_object_column_converts_only_numbers():
+    df = pd.DataFrame({"完播率": [35, "暂无", None, 50.0]}, dtype=object)
+    result = INPUT_SCHEMA.normalize(df, units="percent")
+    assert result["完播率"].tolist()[:2] == [0.35, "暂无"]
+    assert result["完播率"].iloc[3] == 0.5
+
+
+def test_chunks_share_first_chunk_mapping():
+    chunks = [pd.DataFrame({"完播率": [35.0]}), pd.DataFrame({"完播率": [0.5]})]
+    results = list(INPUT_SCHEMA.normalize_chunks(chunks))
+    assert [chunk["完播率"].iloc[0] for chunk in results] == [0.35, 0.005]
+    assert results[0].attrs["column_mapping"] is results[1].attrs["column_mapping"]
+
+
+def test_explicit_units_override_detection():
+    df = pd.DataFrame({"完播率": [35.0]})
+    assert INPUT_SCHEMA.normalize(df, units="ratio")["完播率"].tolist() == [35.0]
+    assert INPUT_SCHEMA.normalize(pd.DataFrame({"完播率": [0.5]}), units="percent")["完播率"].tolist() == [0.005]
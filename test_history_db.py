@@ -0,0 +1,93 @@
+"""
+评估历史记录库测试：批量写入、条件筛选与分页查询
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_db import HistoryStore, tier_from_recommendation
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def _modern_frame(rows):
+    scores = np.round(np.linspace(1.0, 5.0, rows), 2).astype(np.float32)
+    return pd.DataFrame({
+        "达人昵称": [f"达人{i:03d}" for i in range(rows)],
+        "粉丝数": pd.array(np.arange(rows) * 1000, dtype="Int32"),
+        "综合评分": scores,
+        "评级": np.where(scores >= 4.0, "A级", "B级"),
+        "建议": "观察",
+        "评估时间": [f"2024-09-{1 + i % 3:02d} 10:00" for i in range(rows)],
+    })
+
+
+def test_tier_from_recommendation():
+    assert tier_from_recommendation("🏆 A+级 - 优质人选") == "A+级"
+    assert tier_from_recommendation("⚠️ 高风险 - 谨慎合作") == "高风险"
+    assert tier_from_recommendation("待定") is None
+    assert tier_from_recommendation(None) is None
+
+
+def test_insert_frame_restores_scores(store):
+    assert store.insert_frame("modern", _modern_frame(0)) == 0
+    assert store.insert_frame("modern", _modern_frame(9)) == 9
+    rows = store.query(order_by="id", descending=False, limit=100)
+    # float32 评分按两位小数还原，不写入 3.0799999 之类的值
+    assert rows["score"].tolist() == np.round(np.linspace(1.0, 5.0, 9), 2).tolist()
+    assert rows["followers"].tolist() == [i * 1000 for i in range(9)]
+    assert rows["extra"].isna().all()
+
+
+def test_insert_records_basic_app(store):
+    store.insert_records("basic", [
+        {"达人昵称": "甲", "综合指数": 4.2, "合作建议": "🏆 A级 - 推荐", "互动率(%)": 5.5},
+        {"达人昵称": "乙", "综合指数": 2.1, "合作建议": "⚠️ 高风险", "互动率(%)": None},
+    ])
+    rows = store.query(order_by="score", limit=10)
+    assert rows["tier"].tolist() == ["A级", "高风险"]
+    assert json.loads(rows["extra"][0]) == {"互动率(%)": 5.5}
+    assert json.loads(rows["extra"][1]) == {"互动率(%)": None}
+    assert store.tiers() == ["A级", "高风险"]
+
+
+def test_paging_covers_every_row_once(store):
+    store.insert_frame("modern", _modern_frame(23))
+    pages = [store.query(order_by="score", descending=True, limit=10, offset=offset)
+             for offset in (0, 10, 20)]
+    assert [len(page) for page in pages] == [10, 10, 3]
+    ids = pd.concat(pages)["id"]
+    assert ids.is_unique and len(ids) == store.count() == 23
+    assert pd.concat(pages)["score"].is_monotonic_decreasing
+
+
+def test_filters_and_summary(store):
+    store.insert_frame("modern", _modern_frame(21))
+    store.insert_records("basic", [{"达人昵称": "达人999", "综合指数": 4.5, "合作建议": "A级"}])
+    assert store.count(app="modern") == 21
+    assert store.count(nickname="达人00") == 10
+    assert store.count(tiers=["A级"], app="modern") == store.count(min_score=4.0, app="modern")
+    assert store.count(min_score=2.0, max_score=3.0) == 6  # 2.0 ~ 3.0 含两端，步长 0.2
+    # 结束日期包含当天全部记录
+    assert store.count(date_from="2024-09-02", date_to="2024-09-02") == 7
+
+    total, avg_score, high_quality = store.summary(app="modern")
+    assert total == 21 and avg_score == pytest.approx(3.0)
+    assert high_quality == store.count(app="modern", min_score=4.0)
+    assert store.summary(nickname="不存在") == (0, None, 0)
+
+
+def test_query_rejects_unknown_sort_and_clear_by_app(store):
+    with pytest.raises(ValueError):
+        store.query(order_by="score; DROP TABLE evaluations")
+    store.insert_frame("modern", _modern_frame(3))
+    store.insert_records("basic", [{"达人昵称": "甲", "综合指数": 3.0}])
+    store.clear("modern")
+    assert store.count() == 1 and store.count(app="basic") == 1
+    store.clear()
+    assert store.count() == 0
@@ -0,0 +1,25 @@
+"""
+多进程并行评分测试：多个会话同时评分时结果与单进程一致，__main__ 最终还原
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from batch_scoring import evaluate_batch
+from parallel_scoring import MIN_SHARD_ROWS, evaluate_batch_parallel
+
+
+def test_concurrent_sessions_match_single_process(creator_pool, score_frame):
+    pool = creator_pool(2 * MIN_SHARD_ROWS, 17)
+    main_module = sys.modules["__main__"]
+    expected = score_frame(evaluate_batch, pool)
+
+    # 与 Streamlit 一样在多个线程中同时评分
+    evaluate = partial(evaluate_batch_parallel, workers=2)
+    with ThreadPoolExecutor(max_workers=3) as threads:
+        results = list(threads.map(lambda _: score_frame(evaluate, pool), range(3)))
+    for result in results:
+        pd.testing.assert_frame_equal(result, expected)
+    assert sys.modules["__main__"] is main_module
@@ -0,0 +1,38 @@
+"""
+列式结果存储测试
+"""
+import pandas as pd
+
+from result_store import SHORTLIST_SCHEMA, ResultStore
+
+
+def _record(name, score):
+    return {"达人昵称": name, "综合指数": score, "合作建议": "👍 B级 - 备选考虑，有潜力", "粉丝数": 1000}
+
+
+def test_version_changes_on_every_write():
+    store = ResultStore(SHORTLIST_SCHEMA)
+    versions = [store.version]
+    store.append(_record("a", 3.2))
+    versions.append(store.version)
+    store.to_frame()
+    assert store.version == versions[-1]  # 读取不改变版本
+    store.extend(pd.DataFrame([_record("b", 4.1), _record("c", 2.5)]))
+    versions.append(store.version)
+    store.extend([])
+    assert store.version == versions[-1]  # 空写入不改变版本
+    store.clear()
+    versions.append(store.version)
+    assert len(set(versions)) == len(versions)
+
+
+def test_buffered_and_bulk_rows_share_one_typed_frame():
+    store = ResultStore(SHORTLIST_SCHEMA)
+    store.append(_record("a", 3.2))
+    store.extend([_record("b", 4.1)])
+    store.append(_record("c", 2.5))
+    frame = store.to_frame()
+    assert frame["达人昵称"].tolist() == ["a", "b", "c"]
+    assert list(frame.columns) == list(SHORTLIST_SCHEMA)
+    assert frame["粉丝数"].dtype == "Int64" and frame["主页链接"].isna().all()
+    assert store.to_frame() is frame and store.browser() is store.browser()
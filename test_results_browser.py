@@ -0,0 +1,53 @@
+"""
+结果表浏览器测试：服务端筛选、排序与分页与 pandas 直接计算的结果一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import evaluate_batch
+from results_browser import ResultBrowser
+
+
+@pytest.fixture(scope="module")
+def results(creator_pool, score_frame):
+    return score_frame(evaluate_batch, creator_pool(5000, 3, missing_rate=0.01))
+
+
+def test_unfiltered_pages_follow_original_order(results):
+    browser = ResultBrowser(results)
+    page, total = browser.page(3, 100)
+    assert total == len(results)
+    pd.testing.assert_frame_equal(page, results.iloc[200:300])
+    assert browser.positions() is None
+
+
+@pytest.mark.parametrize("column, descending", [("综合评分", True), ("粉丝数", False), ("达人昵称", False)])
+def test_sort_matches_stable_pandas_sort(results, column, descending):
+    browser = ResultBrowser(results)
+    expected = results.sort_values(column, ascending=not descending, kind="stable", na_position="last")
+    page, total = browser.page(2, 50, sort_by=column, descending=descending)
+    pd.testing.assert_frame_equal(page, expected.iloc[50:100])
+    assert total == len(results)
+
+
+def test_filters_combine(results):
+    browser = ResultBrowser(results)
+    filters = {"score": (3.0, 4.0), "tiers": ["A级", "B级"], "followers": (None, 200_000), "name": "达人1"}
+    scores = results["综合评分"]
+    expected = results[(scores >= np.float32(3.0)) & (scores <= np.float32(4.0))
+                       & results["评级"].isin(["A级", "B级"])
+                       & (results["粉丝数"] <= 200_000).fillna(False)
+                       & results["达人昵称"].str.contains("达人1").fillna(False)]
+    assert browser.count(filters) == len(expected) > 0
+    page, total = browser.page(1, 20, filters=filters, sort_by="综合评分", descending=True)
+    assert total == len(expected)
+    pd.testing.assert_frame_equal(page, expected.sort_values("综合评分", ascending=False, kind="stable").head(20))
+    # 未启用的条件不影响结果，同一条件复用缓存的掩码
+    assert browser.filter_mask({"tiers": [], "name": ""}) is None
+    assert browser.filter_mask(dict(filters)) is browser.filter_mask(filters)
+
+
+def test_page_past_end_is_empty(results):
+    page, total = ResultBrowser(results).page(1000, 50, filters={"score": (4.9, None)})
+    assert page.empty and total == (results["综合评分"] >= np.float32(4.9)).sum()
@@ -0,0 +1,73 @@
+"""
+已评分批次重新加权测试：按新权重重算的结果与从原始数据重新评分一致
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import DEFAULT_WEIGHTS, evaluate_batch
+from reweighting import ScoredBatch, evaluate_scored_batch
+
+NEW_WEIGHTS = {"content": 0.1, "data": 0.4, "audience": 0.1, "business": 0.3, "growth": 0.1}
+
+
+@pytest.fixture(scope="module")
+def pool(creator_pool):
+    return creator_pool(3000, 11)
+
+
+@pytest.fixture
+def batch(pool, score_frame):
+    return score_frame(evaluate_scored_batch, pool)
+
+
+@pytest.mark.parametrize("weights", [DEFAULT_WEIGHTS, NEW_WEIGHTS])
+def test_reweighting_matches_rescoring(pool, batch, score_frame, weights):
+    view = batch.apply_weights(weights)
+    rescored = score_frame(evaluate_batch, pool, weights)
+    pd.testing.assert_frame_equal(view.drop(columns="排名"), rescored)
+
+    # 排名按展示分数降序，分数相同时保持原顺序
+    expected_order = np.argsort(-rescored["综合评分"].to_numpy(), kind="stable")
+    assert view["排名"].to_numpy()[expected_order].tolist() == list(range(1, len(view) + 1))
+
+
+def test_chunked_batches_concatenate(pool, batch, score_frame):
+    parts = [score_frame(evaluate_scored_batch, pool.iloc[start:start + 1000]) for start in range(0, len(pool), 1000)]
+    combined = ScoredBatch.concat(parts)
+    pd.testing.assert_frame_equal(combined.apply_weights(NEW_WEIGHTS), batch.apply_weights(NEW_WEIGHTS))
+
+
+def test_view_is_cached_per_weights(batch):
+    view = batch.apply_weights(NEW_WEIGHTS)
+    assert batch.apply_weights(dict(NEW_WEIGHTS)) is view
+    assert batch.apply_weights(DEFAULT_WEIGHTS) is not view
+    assert "排名" not in batch.results.columns
+
+
+def test_browser_reuses_rank_order(batch):
+    browser = batch.browser(NEW_WEIGHTS)
+    page, total = browser.page(1, 10, sort_by="排名")
+    assert total == len(batch) and page["排名"].tolist() == list(range(1, 11))
+    by_score, _ = browser.page(1, 10, sort_by="综合评分", descending=True)
+    pd.testing.assert_frame_equal(by_score, page)
+    assert batch.browser(NEW_WEIGHTS) is browser
+
+
+def test_summary_counts_levels(batch):
+    summary = dict(zip(*batch.summary(NEW_WEIGHTS).to_numpy().T))
+    view = batch.apply_weights(NEW_WEIGHTS)
+    assert summary["评分行数"] == len(batch)
+    assert summary["S级 人数"] == (view["评级"] == "S级").sum()
+
+
+def test_exports_follow_weights(batch):
+    assert batch.existing_export(DEFAULT_WEIGHTS) is None
+    path = batch.export_file(DEFAULT_WEIGHTS)
+    assert batch.export_file(DEFAULT_WEIGHTS) == path == batch.existing_export(DEFAULT_WEIGHTS)
+    assert batch.existing_export(DEFAULT_WEIGHTS, "parquet") is None
+    # 权重变化后旧的导出文件随之删除
+    batch.apply_weights(NEW_WEIGHTS)
+    assert not os.path.exists(path) and batch.existing_export(NEW_WEIGHTS) is None
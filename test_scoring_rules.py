@@ -0,0 +1,96 @@
+"""
+评分规则编译器测试：标量函数与列式函数在阈值边界、缺失值处逐项一致；评级分档
+"""
+import numpy as np
+import pytest
+
+from scoring_rules import (ADVANCED_RULES, MODERN_RULES, MODERN_TIERS, TierSpec, compile_array, compile_rules,
+                           compile_scalar)
+
+
+def _probe_values(breaks):
+    """每个阈值本身、两侧最近的浮点数，以及范围外的值与 NaN"""
+    values = [-1e9, -1.0, 0.0, 1e9, np.nan]
+    for value in breaks:
+        values += [value, np.nextafter(value, -np.inf), np.nextafter(value, np.inf)]
+    return np.array(values, dtype=np.float64)
+
+
+def _rule_cases(rules):
+    return [pytest.param(rules, name, id=name) for name in rules]
+
+
+@pytest.mark.parametrize("rules, name", _rule_cases(MODERN_RULES) + _rule_cases(ADVANCED_RULES))
+def test_scalar_and_array_scorers_agree(rules, name):
+    rule = rules[name]
+    scalar, array = compile_scalar(name, rule), compile_array(name, rule)
+    if rule["kind"] == "steps":
+        values = _probe_values(rule["breaks"])
+        expected = [scalar(value) for value in values]
+        assert array(values).tolist() == expected
+    elif rule["kind"] == "bands":
+        bounds = {key: set() for key in rule["inputs"]}
+        for conditions, _ in rule["bands"]:
+            for key, (low, high) in conditions.items():
+                bounds[key].update(value for value in (low, high) if value is not None)
+        grids = np.meshgrid(*[_probe_values(sorted(bounds[key])) for key in rule["inputs"]])
+        columns = [grid.ravel() for grid in grids]
+        expected = [scalar(*row) for row in zip(*columns)]
+        assert array(*columns).tolist() == expected
+    else:
+        values = np.array(list(rule["scores"]) + ["未知", None, np.nan, 3], dtype=object)
+        assert array(values).tolist() == [scalar(value) for value in values]
+
+
+def test_steps_directions():
+    up = compile_scalar("up", {"kind": "steps", "direction": ">=", "breaks": [1, 2], "scores": [1, 2, 3]})
+    down = compile_scalar("down", {"kind": "steps", "direction": "<=", "breaks": [1, 2], "scores": [3, 2, 1]})
+    # ">=": 等于阈值进入更高一档；"<=": 等于阈值停留在较低一档
+    assert [up(0.5), up(1), up(2), up(float("nan"))] == [1, 2, 3, 1]
+    assert [down(0.5), down(1), down(1.5), down(2), down(float("nan"))] == [3, 3, 2, 2, 1]
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"kind": "steps", "direction": ">", "breaks": [1], "scores": [1, 2]}, "direction"),
+    ({"kind": "steps", "direction": ">=", "breaks": [2, 1], "scores": [1, 2, 3]}, "升序"),
+    ({"kind": "steps", "direction": ">=", "breaks": [1], "scores": [1]}, "多一个"),
+    ({"kind": "linear"}, "未知的规则类型"),
+])
+def test_invalid_rules_are_rejected(rule, message):
+    with pytest.raises(ValueError, match=message):
+        compile_rules({"bad": rule})
+
+
+def test_score_dtypes():
+    _, array = compile_rules(MODERN_RULES)
+    assert array["cpe"](np.array([5.0])).dtype == np.int8
+    assert array["collect_share"](np.array([0.12])).dtype == np.float64
+
+
+# --- 评级分档 ---
+def test_tier_spec_scalar_matches_array():
+    tiers = TierSpec(MODERN_TIERS, extra_recommendations=["兜底"])
+    scores = _probe_values(MODERN_TIERS["breaks"])
+    has_risk = np.arange(len(scores)) % 3 == 0
+    level_codes, recommendation_codes = tiers.assign(scores, has_risk)
+    assert tiers.levels[level_codes].tolist() == [tiers.level(score) for score in scores]
+    assert tiers.recommendations[recommendation_codes].tolist() == [
+        tiers.recommendation(score, risk) for score, risk in zip(scores, has_risk)]
+    assert tiers.recommendations[tiers.risk_code] == MODERN_TIERS["risk_recommendation"]
+    assert tiers.recommendations[-1] == "兜底"
+
+
+def test_tier_spec_boundaries():
+    tiers = TierSpec(MODERN_TIERS)
+    assert [tiers.level(score) for score in (2.49, 2.5, 4.0, 4.5, 5.0, float("nan"))] == \
+        ["D级", "C级", "A+级", "S级", "S级", "D级"]
+    assert tiers.style(4.6) == "score-s" and tiers.style(1.0) == "score-d"
+    codes, recommendation_codes = tiers.assign([3.2, 4.7])
+    assert codes.tolist() == recommendation_codes.tolist() == [2, 5]
+
+
+def test_tier_spec_rejects_mismatched_spec():
+    with pytest.raises(ValueError, match="一一对应"):
+        TierSpec(dict(MODERN_TIERS, recommendations=MODERN_TIERS["recommendations"][:-1]))
+    with pytest.raises(ValueError, match="多一个"):
+        TierSpec(dict(MODERN_TIERS, breaks=MODERN_TIERS["breaks"][:-1]))
@@ -0,0 +1,86 @@
+"""
+上传文件缓存测试：内存层按字节数淘汰、磁盘层、多个会话共享同一评分结果
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import DEFAULT_WEIGHTS
+from reweighting import ScoredBatch, evaluate_scored_batch
+from upload_cache import UploadCache, content_hash, estimate_size, weights_key
+
+
+def _frame(rows, value=0):
+    return pd.DataFrame({"x": np.full(rows, value, dtype=np.int64)})
+
+
+def test_content_hash_and_weights_key():
+    assert content_hash(b"abc") == content_hash(b"abc") != content_hash(b"abd")
+    assert weights_key({"b": 0.2, "a": 0.1 + 0.2}) == weights_key({"a": 0.3, "b": 0.2})
+
+
+def test_memory_layer_evicts_least_recently_used():
+    size = estimate_size(_frame(1000))
+    cache = UploadCache(max_bytes=int(size * 2.5), cache_dir=None)
+    cache.put("a", _frame(1000, 1))
+    cache.put("b", _frame(1000, 2))
+    assert cache.get("a") is not None  # a 变为最近使用
+    cache.put("c", _frame(1000, 3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.current_bytes <= cache._memory.maxsize
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_oversized_value_is_not_cached_in_memory():
+    cache = UploadCache(max_bytes=100, cache_dir=None)
+    value = cache.put("big", _frame(1000))
+    assert value is not None and len(cache) == 0
+    assert cache.get_or_compute("big", lambda: _frame(10)).shape == (10, 1)
+
+
+def test_disk_layer_survives_new_cache(tmp_path):
+    cache = UploadCache(max_bytes=1 << 20, cache_dir=str(tmp_path))
+    cache.put(("parsed", "abc"), _frame(5, 7))
+    fresh = UploadCache(max_bytes=1 << 20, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(fresh.get(("parsed", "abc")), _frame(5, 7))
+    assert len(fresh) == 1
+    fresh.clear()
+    assert not os.listdir(tmp_path)
+
+
+@pytest.fixture
+def shared_entry(creator_pool, score_frame):
+    cache = UploadCache(max_bytes=1 << 30, cache_dir=None)
+    batch = score_frame(evaluate_scored_batch, creator_pool(2000, 1))
+    cache.put("key", batch.cache_entry())
+    return cache.get("key")
+
+
+def test_sessions_get_independent_batches(shared_entry):
+    first = ScoredBatch.from_cache_entry(shared_entry)
+    second = ScoredBatch.from_cache_entry(shared_entry)
+    assert first is not second and first.matrix is second.matrix
+    assert not first.matrix.flags.writeable
+
+    other_weights = {"content": 0.6, "data": 0.1, "audience": 0.1, "business": 0.1, "growth": 0.1}
+    default_view = first.apply_weights(DEFAULT_WEIGHTS).copy()
+    second.apply_weights(other_weights)
+    pd.testing.assert_frame_equal(first.apply_weights(DEFAULT_WEIGHTS), default_view)
+    # 共享的结果表不被重新加权修改
+    assert "排名" not in shared_entry[0].columns
+
+
+def test_exports_belong_to_one_session(shared_entry):
+    first = ScoredBatch.from_cache_entry(shared_entry)
+    second = ScoredBatch.from_cache_entry(shared_entry)
+    first_path = first.export_file(DEFAULT_WEIGHTS)
+    second_path = second.export_file(DEFAULT_WEIGHTS)
+    assert first_path != second_path
+    first.clear_exports()
+    del first
+    assert os.path.exists(second_path)
+    second.clear_exports()
+    assert not os.path.exists(second_path)
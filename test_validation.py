@@ -0,0 +1,102 @@
+"""
+上传数据校验测试：各类规则、分块校验与错误表上限
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import advanced_batch_scoring
+import validation
+from batch_io import read_table
+from validation import ERROR_COLUMNS, ValidationReport, validate_frame
+
+RULES = {
+    "达人昵称": {"kind": "text", "required": True},
+    "爆文率": {"kind": "number", "min": 0, "max": 1},
+    "CPE": {"kind": "number", "min": 0},
+    "增长趋势": {"kind": "category", "values": ["平稳上扬", "停滞"]},
+    "负面舆情": {"kind": "flag"},
+}
+
+
+def _chunks(df, size):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def test_validate_frame_reports_each_error():
+    df = pd.DataFrame({
+        "达人昵称": ["a", "", None, "d", "e"],
+        "爆文率": [0.1, 1.5, 0.2, np.nan, -0.1],
+        "CPE": [10, "暂无", 5, np.inf, 3],
+        "增长趋势": ["平稳上扬", "暴涨", None, "停滞", "停滞"],
+        "负面舆情": [0, 1, 2, True, None],
+    })
+    valid, errors = validate_frame(df, RULES)
+    assert valid.tolist() == [True, False, False, False, False]
+    assert list(errors.columns) == ERROR_COLUMNS
+    found = set(zip(errors["行号"], errors["列"], errors["原因"]))
+    assert found == {
+        (2, "达人昵称", "不能为空"),
+        (3, "达人昵称", "不能为空"),
+        (2, "爆文率", "超出范围 [0, 1]"),
+        (5, "爆文率", "超出范围 [0, 1]"),
+        (2, "CPE", "非数值"),
+        (4, "CPE", "非有限数值"),
+        (2, "增长趋势", "未知取值（可选: 平稳上扬、停滞）"),
+        (3, "负面舆情", "不是有效的是/否标记（应为 True/False 或 1/0）"),
+    }
+    assert errors["行号"].is_monotonic_increasing
+
+
+def test_missing_columns_and_clean_frame():
+    df = pd.DataFrame({"爆文率": [0.1, 0.2]})
+    valid, errors = validate_frame(df, RULES)
+    assert valid.all() and errors.empty
+    assert list(errors.columns) == ERROR_COLUMNS
+
+
+def test_filter_yields_only_valid_rows_with_file_row_numbers():
+    df = pd.DataFrame({"达人昵称": [f"n{i}" for i in range(10)], "CPE": [1.0] * 10})
+    df.loc[[2, 7], "CPE"] = -1.0
+    report = ValidationReport(RULES)
+    kept = pd.concat(report.filter(_chunks(df, 4)))
+    assert kept.index.tolist() == [0, 1, 3, 4, 5, 6, 8, 9]
+    assert (report.rows_checked, report.rows_invalid) == (10, 2)
+    assert report.errors["行号"].tolist() == [3, 8]
+
+
+def test_error_cap_applies_across_chunks(monkeypatch):
+    monkeypatch.setattr(validation, "MAX_ERRORS_PER_COLUMN", 5)
+    df = pd.DataFrame({"达人昵称": [""] * 12, "CPE": [-1.0] * 6 + [1.0] * 6})
+    report = ValidationReport(RULES)
+    assert list(report.filter(_chunks(df, 4))) == []
+    errors = report.errors
+    assert errors.groupby("列").size().to_dict() == {"CPE": 5, "达人昵称": 5}
+    assert errors.loc[errors["列"] == "CPE", "行号"].tolist() == [1, 2, 3, 4, 5]
+    # 超出上限的错误只计数：昵称 12 - 5，CPE 6 - 5
+    assert report.errors_suppressed == 8
+    assert report.rows_invalid == 12
+
+
+def test_scoring_rules_accept_template_values():
+    # 模板中的占比为百分数，读取时换算为小数后应全部通过校验
+    with open(os.path.join(os.path.dirname(__file__), "data_template.csv"), "rb") as f:
+        template = read_table(f, "csv", advanced_batch_scoring.INPUT_SCHEMA)
+    valid, errors = validate_frame(template, advanced_batch_scoring.VALIDATION_RULES)
+    assert valid.all(), errors
+
+
+def test_arrow_string_columns_match_object_columns():
+    df = pd.DataFrame({
+        "达人昵称": ["a", None, "c", "d"],
+        "增长趋势": ["停滞", "暴涨", None, "平稳上扬"],
+        "CPE": [1.0, np.nan, np.inf, -2.0],
+    })
+    valid, errors = validate_frame(df, RULES)
+    arrow = df.astype({"达人昵称": "string[pyarrow]", "增长趋势": "string[pyarrow]"})
+    arrow_valid, arrow_errors = validate_frame(arrow, RULES)
+    assert valid.tolist() == arrow_valid.tolist() == [True, False, False, False]
+    pd.testing.assert_frame_equal(arrow_errors, errors)
+    assert errors["值"].tolist() == ["", "暴涨", "inf", "-2.0"]
@@ -0,0 +1,127 @@
+"""
+上传文件解析/评分结果缓存
+
+以上传文件内容的哈希为键（评分结果再加上权重与评分模型版本），缓存解析后的
+DataFrame 和批量评分结果。同一文件在重新运行、重复点击评估时只需查一次缓存。
+
+- 内存层：按占用字节数限制大小的 LRU（cachetools.LRUCache）
+- 磁盘层（可选）：pickle 文件，目录由环境变量 REDBOOK_CACHE_DIR 指定，未设置时不落盘
+"""
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+DEFAULT_MAX_BYTES = int(os.environ.get("REDBOOK_CACHE_MAX_MB", "512")) * 1024 * 1024
+DEFAULT_CACHE_DIR = os.environ.get("REDBOOK_CACHE_DIR") or None
+
+
+def content_hash(data):
+    """上传文件内容的哈希（blake2b）"""
+    if hasattr(data, "getvalue"):
+        data = data.getvalue()
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def weights_key(weights):
+    """权重字典 -> 可哈希的键（保留6位小数，避免浮点误差导致缓存未命中）"""
+    return tuple(sorted((key, round(float(value), 6)) for key, value in weights.items()))
+
+
+def estimate_size(value):
+    """估算缓存对象占用的字节数"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if hasattr(value, "__dict__"):
+        return sum(estimate_size(v) for v in vars(value).values())
+    return 64
+
+
+class UploadCache:
+    """内存 LRU + 可选磁盘层的两级缓存，可在多个 Streamlit 会话间共享"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=DEFAULT_CACHE_DIR):
+        self._memory = LRUCache(maxsize=max_bytes, getsizeof=estimate_size)
+        self._lock = threading.Lock()
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._memory)
+
+    @property
+    def current_bytes(self):
+        return self._memory.currsize
+
+    def _disk_path(self, key):
+        name = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=20).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._memory:
+                self.hits += 1
+                return self._memory[key]
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    value = None
+                if value is not None:
+                    self._put_memory(key, value)
+                    with self._lock:
+                        self.hits += 1
+                    return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._put_memory(key, value)
+        if self.cache_dir:
+            # 先写临时文件再改名，避免其他会话读到写了一半的文件
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        return value
+
+    def get_or_compute(self, key, compute):
+        """命中缓存直接返回，否则调用 compute() 计算并写入缓存"""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _put_memory(self, key, value):
+        with self._lock:
+            try:
+                self._memory[key] = value
+            except ValueError:
+                # 单个对象超过内存上限时不进内存层（磁盘层仍可保存）
+                pass
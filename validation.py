@@ -0,0 +1,223 @@
+"""
+批量上传数据的列式校验
+
+按整列一次性检查类型、取值范围与枚举值，得到每行是否有效的掩码和逐项错误表
+（行号、列、值、原因）。只有通过校验的行送入评分引擎，未通过的行不再以兜底分数
+（3.0 分 / B级）混入结果，而是列在错误表中供核对修改。
+
+校验规则以字典描述（列名 -> 规则），由评分引擎的 ColumnSchema 与评分规则表生成：
+- number：数值列，可选 min / max（闭区间）；缺失值允许（评分时落入最低档）
+- category：枚举列，values 为可选取值；缺失值允许（评分时取默认分）
+- flag：是/否标记列，只接受 True/False/0/1；缺失值按"否"处理
+- text：文本列，required 为 True 时不允许为空
+"""
+import numpy as np
+import pandas as pd
+
+from column_schema import RATIO_KEYS
+
+ERROR_COLUMNS = ["行号", "列", "值", "原因"]
+
+# 错误表中每列最多记录的错误数（分块校验时跨块累计），避免整列格式错误时错误表与数据一样大
+MAX_ERRORS_PER_COLUMN = 10_000
+
+
+def build_validation_rules(schema, categories):
+    """由评分引擎的输入列规格生成校验规则；categories 为增长趋势的可选取值"""
+    rules = {}
+    for key, column in schema.spec:
+        if key == "name":
+            rules[column] = {"kind": "text", "required": True}
+        elif key == "growth_trend":
+            rules[column] = {"kind": "category", "values": list(categories)}
+        elif key == "has_negative":
+            rules[column] = {"kind": "flag"}
+        elif key in RATIO_KEYS:
+            rules[column] = {"kind": "number", "min": 0, "max": 1}
+        else:
+            rules[column] = {"kind": "number", "min": 0}
+    return rules
+
+
+# --- 单列检查：返回 (错误行位置, 原因) 列表；错误通常很少，只返回位置，不构建整列掩码 ---
+def _is_real_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def _range_text(rule):
+    low, high = rule.get("min"), rule.get("max")
+    if low is not None and high is not None:
+        return f"超出范围 [{low}, {high}]"
+    if low is not None:
+        return f"小于 {low}"
+    return f"大于 {high}"
+
+
+def _check_number(series, rule):
+    checks = []
+    if series.dtype == np.float64:
+        # 最常见的 float64 列直接使用底层数组（指定 na_value 会复制整列）
+        values = series.to_numpy()
+    elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        # 对象列：字符串等非数值与评分引擎一样视为无效
+        present = series.notna().to_numpy()
+        numeric = series.map(_is_real_number).to_numpy(dtype=bool)
+        checks.append((np.flatnonzero(present & ~numeric), "非数值"))
+        values = pd.to_numeric(series.where(numeric), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # 一次比较找出不在范围内的值（含缺失值与无穷大），只对这些少数位置细分原因
+    low, high = rule.get("min"), rule.get("max")
+    with np.errstate(invalid="ignore"):
+        inside = values > -np.inf if low is None else values >= low
+        inside &= values < np.inf if high is None else values <= high
+    suspect = np.flatnonzero(~inside)
+    checks.append((suspect[np.isinf(values[suspect])], "非有限数值"))
+    if low is not None or high is not None:
+        checks.append((suspect[np.isfinite(values[suspect])], _range_text(rule)))
+    return checks
+
+
+def _check_category(series, rule):
+    allowed = rule["values"]
+    if series.dtype == "string[pyarrow]":
+        # Arrow 字符串列由 pyarrow 直接比较，比先编码去重更快
+        bad = (series.notna() & ~series.isin(allowed)).to_numpy(dtype=bool)
+    else:
+        # 枚举列取值种类很少：先编码去重，只比较不同取值（缺失值编码为 -1，不算错误）
+        codes, uniques = pd.factorize(series)
+        bad_codes = np.flatnonzero(~pd.Index(uniques).isin(allowed))
+        bad = np.isin(codes, bad_codes)
+    return [(np.flatnonzero(bad), f"未知取值（可选: {'、'.join(map(str, allowed))}）")]
+
+
+def _check_flag(series, rule):
+    if pd.api.types.is_bool_dtype(series):
+        return []
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        bad = ~np.isnan(values) & (values != 0) & (values != 1)
+    else:
+        bad = (series.notna() & ~series.map(lambda v: v is True or v is False or (
+            _is_real_number(v) and v in (0, 1)))).to_numpy(dtype=bool)
+    return [(np.flatnonzero(bad), "不是有效的是/否标记（应为 True/False 或 1/0）")]
+
+
+def _check_text(series, rule):
+    if not rule.get("required"):
+        return []
+    # 只按缺失判断（CSV 空字段、Excel 空单元格都读为缺失值），不逐个检查字符串内容
+    blank = series.isna().to_numpy()
+    if series.dtype == object:
+        blank |= series.to_numpy() == ""
+    return [(np.flatnonzero(blank), "不能为空")]
+
+
+_CHECKS = {
+    "number": _check_number,
+    "category": _check_category,
+    "flag": _check_flag,
+    "text": _check_text,
+}
+
+
+def empty_errors():
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in
+                         zip(ERROR_COLUMNS, ["int64", "object", "object", "object"])})
+
+
+def validate_frame(df, rules):
+    """整表校验，返回 (有效行掩码, 错误表)；行号为数据行序号（行索引 + 1）"""
+    valid, errors, _ = _validate(df, rules, {})
+    return valid, errors
+
+
+def _validate(df, rules, recorded):
+    """校验一块数据，返回 (有效行掩码, 错误表, 未记录的错误数)
+
+    recorded 为各列已记录的错误数（分块校验时跨块累计），每列记录满 MAX_ERRORS_PER_COLUMN 条后
+    只计数、不再写入错误表。
+    """
+    valid = np.ones(len(df), dtype=bool)
+    parts = []
+    suppressed = 0
+    row_numbers = None
+    for column, rule in rules.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        for positions, reason in _CHECKS[rule["kind"]](series, rule):
+            if not len(positions):
+                continue
+            valid[positions] = False
+            room = MAX_ERRORS_PER_COLUMN - recorded.get(column, 0)
+            suppressed += max(len(positions) - room, 0)
+            positions = positions[:max(room, 0)]
+            if not len(positions):
+                continue
+            recorded[column] = recorded.get(column, 0) + len(positions)
+            if row_numbers is None:
+                row_numbers = np.asarray(df.index) + 1 if pd.api.types.is_integer_dtype(df.index) \
+                    else np.arange(1, len(df) + 1)
+            # 只取出错误位置的值再转为文本，不转换整列；缺失值显示为空
+            bad_values = series.iloc[positions]
+            text = bad_values.astype(str).to_numpy(dtype=object)
+            text[bad_values.isna().to_numpy()] = ""
+            parts.append((row_numbers[positions], column, text, reason))
+    if not parts:
+        return valid, empty_errors(), suppressed
+    # 各项错误按数组收集，最后一次构建错误表并按行号稳定排序
+    rows, columns, values, reasons = zip(*parts)
+    lengths = [len(part) for part in rows]
+    rows = np.concatenate(rows)
+    order = np.argsort(rows, kind="stable")
+    errors = pd.DataFrame({
+        "行号": rows[order],
+        "列": np.repeat(np.array(columns, dtype=object), lengths)[order],
+        "值": np.concatenate(values)[order],
+        "原因": np.repeat(np.array(reasons, dtype=object), lengths)[order],
+    })
+    return valid, errors, suppressed
+
+
+class ValidationReport:
+    """分块校验的汇总：已检查行数、无效行数与错误表
+
+    错误表每列最多记录 MAX_ERRORS_PER_COLUMN 条（跨块累计），超出部分只计入 errors_suppressed。
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.rows_checked = 0
+        self.rows_invalid = 0
+        self.errors_suppressed = 0
+        self._errors = []
+        self._recorded = {}
+
+    def check(self, df):
+        """校验一块数据，记录错误并返回其中的有效行"""
+        valid, errors, suppressed = _validate(df, self.rules, self._recorded)
+        self.rows_checked += len(df)
+        self.errors_suppressed += suppressed
+        if not valid.all():
+            self.rows_invalid += int(len(valid) - valid.sum())
+            if len(errors):
+                self._errors.append(errors)
+            df = df[valid]
+        return df
+
+    def filter(self, chunks):
+        """逐块校验，只输出有效行（整块无效时跳过）"""
+        for chunk in chunks:
+            chunk = self.check(chunk)
+            if len(chunk):
+                yield chunk
+
+    @property
+    def errors(self):
+        if not self._errors:
+            return empty_errors()
+        if len(self._errors) > 1:
+            self._errors = [pd.concat(self._errors, ignore_index=True)]
+        return self._errors[0]